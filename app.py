@@ -1,14 +1,22 @@
 import streamlit as st
-import pandas as pd
 import sqlite3
 import os
 import hashlib
 import datetime
 from enum import Enum
-import random
-import string
 from PIL import Image
 import base64
+from arquivo import criar_tabelas_arquivo, proximo_id
+from backups import iniciar_backup_periodico
+from busca import criar_indice_busca
+from database import DB_FILE, ConflitoVersao, atualizar_versionado, campos_alterados, conectar, diferencas_conflito, query_arrow
+from db_writer import executar_escrita
+from dimensoes import criar_tabelas_dimensoes, vincular_dimensoes
+from manutencao import (criar_tabela_log_manutencao, detalhes_indice_processo, iniciar_otimizacao_periodica,
+                        iniciar_varredura_periodica, registrar_manutencao)
+from presentation import COLUMN_CONFIG_DATAS
+from snapshots import get_snapshot
+from workflow import alocar_numero_processo, atribuicoes_status, criar_tabela_eventos, criar_tabela_sequencias
 
 # Configuração da página
 st.set_page_config(
@@ -32,9 +40,12 @@ class StatusAproveitamento(str, Enum):
 
 # Funções de banco de dados
 def init_db():
-    conn = sqlite3.connect('ppgop.db')
+    conn = conectar()
     c = conn.cursor()
     
+    # Banco novo já nasce com auto_vacuum incremental (ver manutencao.vacuum_incremental)
+    c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
     # Tabela de usuários
     c.execute('''
     CREATE TABLE IF NOT EXISTS users (
@@ -86,6 +97,36 @@ def init_db():
     )
     ''')
     
+    # O antigo trigger de data_atualizacao (criado por streamlit_app.py) fazia um segundo
+    # UPDATE a cada edição; save_aluno já define a data no próprio UPDATE
+    c.execute("DROP TRIGGER IF EXISTS update_alunos_timestamp")
+    
+    # Histórico de mudanças de status (tabela, índices e triggers)
+    criar_tabela_eventos(c)
+    
+    # Contador anual dos números de processo
+    duplicados_processo = criar_tabela_sequencias(c)
+    
+    # Busca textual (FTS5) em alunos e aproveitamentos, sincronizada por triggers
+    criar_indice_busca(c)
+    
+    # Orientadores e linhas de pesquisa como dimensões (IDs indexados em alunos)
+    criar_tabelas_dimensoes(c)
+    
+    # Versão da linha para o controle de concorrência otimista
+    for tabela in ("alunos", "aproveitamentos"):
+        c.execute(f"PRAGMA table_info({tabela})")
+        if "version" not in [info[1] for info in c.fetchall()]:
+            c.execute(f"ALTER TABLE {tabela} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    
+    # Tabelas de arquivo (alunos inativos) e views de histórico
+    criar_tabelas_arquivo(c)
+    
+    # Registro das tarefas de manutenção (ANALYZE, vacuum, checkpoint)
+    criar_tabela_log_manutencao(c)
+    if duplicados_processo: # Registrado uma vez: nas próximas execuções o índice sem UNIQUE já existe
+        registrar_manutencao(c, "indice_numero_processo", detalhes_indice_processo(duplicados_processo))
+    
     # Inserir usuários padrão se não existirem
     c.execute("SELECT COUNT(*) FROM users WHERE username = 'Breno'")
     if c.fetchone()[0] == 0:
@@ -102,17 +143,9 @@ def init_db():
     conn.commit()
     conn.close()
 
-# Função para gerar número de processo
-def gerar_numero_processo():
-    """Gera um número de processo no formato 23081.XXXXXX/ANO-XX"""
-    ano_atual = datetime.datetime.now().year
-    numero = ''.join(random.choices(string.digits, k=6))
-    sequencial = ''.join(random.choices(string.digits, k=2))
-    return f"23081.{numero}/{ano_atual}-{sequencial}"
-
 # Funções de autenticação
 def login(username, password):
-    conn = sqlite3.connect('ppgop.db')
+    conn = conectar()
     c = conn.cursor()
     
     password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -126,9 +159,46 @@ def login(username, password):
         return {'id': user[0], 'username': user[1], 'email': user[2]}
     return None
 
+# Campos editáveis e seus rótulos (usados também para mostrar conflitos de edição)
+CAMPOS_ALUNO = {
+    'matricula': 'Matrícula',
+    'nome': 'Nome',
+    'email': 'Email',
+    'orientador': 'Orientador(a)',
+    'linha_pesquisa': 'Linha de Pesquisa',
+    'data_ingresso': 'Data de Ingresso',
+    'prazo_defesa_projeto': 'Prazo Defesa Projeto',
+    'prazo_defesa_tese': 'Prazo Defesa Tese'
+}
+
+CAMPOS_APROVEITAMENTO = {
+    'aluno_id': 'Aluno',
+    'tipo': 'Tipo de Aproveitamento',
+    'nome_disciplina': 'Nome da Disciplina',
+    'codigo_disciplina': 'Código da Disciplina',
+    'creditos': 'Créditos',
+    'idioma': 'Idioma',
+    'nota': 'Nota',
+    'instituicao': 'Instituição',
+    'observacoes': 'Observações',
+    'link_documentos': 'Link para Documentos',
+    'status': 'Status'
+}
+
+def exibir_conflito(conflito, original, editado, campos):
+    """Mostra o conflito de edição e prepara o formulário para gravar sobre a versão atual."""
+    if conflito.atual is None:
+        st.error("Este registro foi excluído por outra pessoa enquanto você editava.")
+        return
+    st.error("Este registro foi alterado por outra pessoa enquanto você editava. "
+             "Revise as diferenças: clique em Salvar novamente para gravar seus valores "
+             "sobre a versão atual, ou em Cancelar para descartá-los.")
+    st.dataframe(diferencas_conflito(original, editado, conflito.atual, campos), hide_index=True)
+    original['version'] = conflito.atual['version']
+
 # Funções CRUD para alunos
 def get_alunos():
-    conn = sqlite3.connect('ppgop.db')
+    conn = conectar()
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
@@ -139,7 +209,7 @@ def get_alunos():
     return alunos
 
 def get_aluno(aluno_id):
-    conn = sqlite3.connect('ppgop.db')
+    conn = conectar()
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
@@ -149,72 +219,64 @@ def get_aluno(aluno_id):
     conn.close()
     return dict(aluno) if aluno else None
 
-def save_aluno(aluno_data, aluno_id=None):
-    conn = sqlite3.connect('ppgop.db')
+def _gravar_aluno(conn, aluno_data, aluno_id=None, versao=None):
+    """Operação de escrita: insere ou atualiza um aluno (ConflitoVersao se a versão mudou)."""
     c = conn.cursor()
+    aluno_data = vincular_dimensoes(conn, aluno_data) # IDs de orientador/linha dos textos informados
     
-    if aluno_id:  # Atualizar
-        c.execute("""
-        UPDATE alunos SET 
-            matricula = ?,
-            nome = ?,
-            email = ?,
-            orientador = ?,
-            linha_pesquisa = ?,
-            data_ingresso = ?,
-            prazo_defesa_projeto = ?,
-            prazo_defesa_tese = ?,
-            data_atualizacao = CURRENT_TIMESTAMP
-        WHERE id = ?
-        """, (
-            aluno_data['matricula'],
-            aluno_data['nome'],
-            aluno_data['email'],
-            aluno_data['orientador'],
-            aluno_data['linha_pesquisa'],
-            aluno_data['data_ingresso'],
-            aluno_data['prazo_defesa_projeto'],
-            aluno_data['prazo_defesa_tese'],
-            aluno_id
-        ))
+    if aluno_id:  # Atualizar apenas as colunas recebidas
+        atualizar_versionado(conn, "alunos", aluno_id, aluno_data, versao,
+                             atribuicoes=["data_atualizacao = CURRENT_TIMESTAMP"])
     else:  # Inserir
         c.execute("""
         INSERT INTO alunos (
-            matricula, nome, email, orientador, linha_pesquisa, 
+            id, matricula, nome, email, orientador, orientador_id, linha_pesquisa, linha_pesquisa_id,
             data_ingresso, prazo_defesa_projeto, prazo_defesa_tese
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
+            proximo_id(conn, 'alunos'), # Não reaproveita IDs de alunos arquivados
             aluno_data['matricula'],
             aluno_data['nome'],
             aluno_data['email'],
             aluno_data['orientador'],
+            aluno_data['orientador_id'],
             aluno_data['linha_pesquisa'],
+            aluno_data['linha_pesquisa_id'],
             aluno_data['data_ingresso'],
             aluno_data['prazo_defesa_projeto'],
             aluno_data['prazo_defesa_tese']
         ))
-    
-    conn.commit()
-    conn.close()
 
-def delete_aluno(aluno_id):
-    conn = sqlite3.connect('ppgop.db')
+def save_aluno(aluno_data, aluno_id=None, original=None):
+    versao = None
+    if aluno_id:
+        aluno_data = {campo: aluno_data[campo] for campo in CAMPOS_ALUNO}
+        if original:
+            # Gravar só o que mudou em relação à linha carregada; nada, se nada mudou
+            aluno_data = campos_alterados(original, aluno_data)
+            versao = original.get('version')
+            if not aluno_data:
+                return
+    executar_escrita(_gravar_aluno, aluno_data, aluno_id, versao)
+
+def _excluir_aluno(conn, aluno_id):
+    """Operação de escrita: exclui o aluno se não houver aproveitamentos."""
     c = conn.cursor()
     
     # Verificar se existem aproveitamentos relacionados
     c.execute("SELECT COUNT(*) FROM aproveitamentos WHERE aluno_id = ?", (aluno_id,))
     if c.fetchone()[0] > 0:
-        conn.close()
         return False
     
     c.execute("DELETE FROM alunos WHERE id = ?", (aluno_id,))
-    conn.commit()
-    conn.close()
     return True
 
+def delete_aluno(aluno_id):
+    return executar_escrita(_excluir_aluno, aluno_id)
+
 # Funções CRUD para aproveitamentos
 def get_aproveitamentos():
-    conn = sqlite3.connect('ppgop.db')
+    conn = conectar()
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
@@ -230,7 +292,7 @@ def get_aproveitamentos():
     return aproveitamentos
 
 def get_aproveitamento(aproveitamento_id):
-    conn = sqlite3.connect('ppgop.db')
+    conn = conectar()
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
     
@@ -245,75 +307,42 @@ def get_aproveitamento(aproveitamento_id):
     conn.close()
     return dict(aproveitamento) if aproveitamento else None
 
-def save_aproveitamento(aproveitamento_data, aproveitamento_id=None):
-    conn = sqlite3.connect('ppgop.db')
+def _gravar_aproveitamento(conn, aproveitamento_data, aproveitamento_id=None, versao=None):
+    """Operação de escrita: insere ou atualiza um aproveitamento (ConflitoVersao se a versão mudou)."""
     c = conn.cursor()
     
     if aproveitamento_id:  # Atualizar
-        # Verificar status anterior
-        c.execute("SELECT status FROM aproveitamentos WHERE id = ?", (aproveitamento_id,))
-        status_anterior = c.fetchone()[0]
-        
         # Preparar campos para atualização
-        fields = [
-            "aluno_id = ?",
-            "tipo = ?",
-            "instituicao = ?",
-            "observacoes = ?",
-            "link_documentos = ?",
-            "status = ?"
-        ]
-        params = [
-            aproveitamento_data['aluno_id'],
-            aproveitamento_data['tipo'],
-            aproveitamento_data['instituicao'],
-            aproveitamento_data['observacoes'],
-            aproveitamento_data['link_documentos'],
-            aproveitamento_data['status']
-        ]
+        valores = {
+            'aluno_id': aproveitamento_data['aluno_id'],
+            'tipo': aproveitamento_data['tipo'],
+            'instituicao': aproveitamento_data['instituicao'],
+            'observacoes': aproveitamento_data['observacoes'],
+            'link_documentos': aproveitamento_data['link_documentos'],
+            'status': aproveitamento_data['status']
+        }
         
         # Adicionar campos específicos por tipo
         if aproveitamento_data['tipo'] == TipoAproveitamento.DISCIPLINA:
-            fields.extend([
-                "nome_disciplina = ?",
-                "codigo_disciplina = ?",
-                "creditos = ?"
-            ])
-            params.extend([
-                aproveitamento_data['nome_disciplina'],
-                aproveitamento_data['codigo_disciplina'],
-                aproveitamento_data['creditos']
-            ])
+            for campo in ('nome_disciplina', 'codigo_disciplina', 'creditos'):
+                valores[campo] = aproveitamento_data[campo]
         elif aproveitamento_data['tipo'] == TipoAproveitamento.IDIOMA:
-            fields.extend([
-                "idioma = ?",
-                "nota = ?"
-            ])
-            params.extend([
-                aproveitamento_data['idioma'],
-                aproveitamento_data['nota']
-            ])
+            for campo in ('idioma', 'nota'):
+                valores[campo] = aproveitamento_data[campo]
         
-        # Atualizar datas com base no status
-        if status_anterior != aproveitamento_data['status']:
-            if aproveitamento_data['status'] == StatusAproveitamento.APROVADO_COORDENACAO:
-                fields.append("data_aprovacao_coordenacao = CURRENT_TIMESTAMP")
-            elif aproveitamento_data['status'] == StatusAproveitamento.APROVADO_COLEGIADO:
-                fields.append("data_aprovacao_colegiado = CURRENT_TIMESTAMP")
-            elif aproveitamento_data['status'] in [StatusAproveitamento.DEFERIDO, StatusAproveitamento.INDEFERIDO]:
-                fields.append("data_deferimento = CURRENT_TIMESTAMP")
+        # Mudança de status segue o fluxo (datas da etapa registradas junto)
+        atribuicoes = atribuicoes_status(conn, aproveitamento_id, aproveitamento_data['status'])
         
-        # Executar atualização
-        query = f"UPDATE aproveitamentos SET {', '.join(fields)} WHERE id = ?"
-        params.append(aproveitamento_id)
-        c.execute(query, params)
+        # Executar atualização (só se ninguém gravou desde que foi carregado)
+        atualizar_versionado(conn, "aproveitamentos", aproveitamento_id, valores, versao, atribuicoes)
         
     else:  # Inserir
-        # Gerar número de processo
-        numero_processo = gerar_numero_processo()
+        # Próximo número do contador anual (na mesma transação do INSERT)
+        numero_processo = alocar_numero_processo(conn)
         
         # Preparar campos comuns
         fields = [
+            "id",
             "aluno_id",
             "tipo",
             "numero_processo",
@@ -323,6 +352,7 @@ def save_aproveitamento(aproveitamento_data, aproveitamento_id=None):
             "link_documentos"
         ]
         params = [
+            proximo_id(conn, 'aproveitamentos'),
             aproveitamento_data['aluno_id'],
             aproveitamento_data['tipo'],
             numero_processo,
@@ -357,26 +387,42 @@ def save_aproveitamento(aproveitamento_data, aproveitamento_id=None):
         # Executar inserção
         query = f"INSERT INTO aproveitamentos ({', '.join(fields)}) VALUES ({', '.join(['?'] * len(fields))})"
         c.execute(query, params)
-    
-    conn.commit()
-    conn.close()
 
-def delete_aproveitamento(aproveitamento_id):
-    conn = sqlite3.connect('ppgop.db')
+def save_aproveitamento(aproveitamento_data, aproveitamento_id=None, versao=None):
+    executar_escrita(_gravar_aproveitamento, aproveitamento_data, aproveitamento_id, versao)
+
+def _excluir_aproveitamento(conn, aproveitamento_id):
+    """Operação de escrita: exclui um aproveitamento."""
     c = conn.cursor()
     
     c.execute("DELETE FROM aproveitamentos WHERE id = ?", (aproveitamento_id,))
-    conn.commit()
-    conn.close()
     return True
 
+def delete_aproveitamento(aproveitamento_id):
+    return executar_escrita(_excluir_aproveitamento, aproveitamento_id)
+
 # Função para exibir o cabeçalho
 def display_header():
     header_image = Image.open('assets/header.jpg')
     st.image(header_image, use_column_width=True)
 
+@st.cache_resource(show_spinner=False)
+def _inicializar_banco(db_file, inode):
+    """Executa init_db uma vez por processo e arquivo de banco, e não a cada rerun.
+
+    init_db grava por uma conexão própria, fora do escritor único; um banco
+    apagado ou recriado tem outro inode e é inicializado de novo.
+    """
+    init_db()
+    return True
+
 # Inicializar banco de dados
-init_db()
+if not os.path.exists(DB_FILE):
+    conectar().close() # Cria o arquivo: o inode dele identifica o banco já na primeira execução
+_inicializar_banco(os.path.abspath(DB_FILE), os.stat(DB_FILE).st_ino)
+iniciar_varredura_periodica() # Remove aproveitamentos órfãos (uma vez por processo)
+iniciar_backup_periodico() # Backup diário com rotação (uma vez por processo)
+iniciar_otimizacao_periodica() # ANALYZE, vacuum incremental e checkpoint do WAL (uma vez por processo)
 
 # Inicializar estado da sessão
 if 'authenticated' not in st.session_state:
@@ -633,45 +679,37 @@ else:
                             'prazo_defesa_tese': prazo_defesa_tese.strftime('%Y-%m-%d') if prazo_defesa_tese else None
                         }
                         
-                        save_aluno(aluno_data, aluno_id)
-                        st.session_state.show_aluno_form = False
-                        st.success("Aluno salvo com sucesso!")
-                        st.rerun()
+                        try:
+                            save_aluno(aluno_data, aluno_id, st.session_state.editing_aluno)
+                        except ConflitoVersao as conflito:
+                            exibir_conflito(conflito, st.session_state.editing_aluno, aluno_data, CAMPOS_ALUNO)
+                        else:
+                            st.session_state.show_aluno_form = False
+                            st.success("Aluno salvo com sucesso!")
+                            st.rerun()
         
         # Lista de alunos
-        alunos = get_alunos()
-        if alunos:
-            # Converter para DataFrame para exibição
-            df_alunos = pd.DataFrame(alunos)
-            
-            # Formatar datas
-            for col in ['data_ingresso', 'prazo_defesa_projeto', 'prazo_defesa_tese']:
-                if col in df_alunos.columns:
-                    df_alunos[col] = pd.to_datetime(df_alunos[col]).dt.strftime('%d/%m/%Y')
-            
-            # Selecionar e renomear colunas para exibição
-            cols_display = {
-                'id': 'ID',
-                'matricula': 'Matrícula',
-                'nome': 'Nome',
-                'email': 'Email',
-                'orientador': 'Orientador(a)',
-                'linha_pesquisa': 'Linha de Pesquisa',
-                'data_ingresso': 'Ingresso'
-            }
-            
-            df_display = df_alunos[list(cols_display.keys())].rename(columns=cols_display)
+        nomes_alunos = get_snapshot().nomes_alunos
+        if nomes_alunos:
+            # Apenas as colunas exibidas, direto do cursor para Arrow
+            tabela_alunos = query_arrow("""
+            SELECT id AS "ID", matricula AS "Matrícula", nome AS "Nome", email AS "Email",
+                   orientador AS "Orientador(a)", linha_pesquisa AS "Linha de Pesquisa",
+                   strftime('%d/%m/%Y', data_ingresso) AS "Ingresso"
+            FROM alunos
+            ORDER BY nome
+            """)
             
             # Exibir tabela
-            st.dataframe(df_display, hide_index=True)
+            st.dataframe(tabela_alunos, hide_index=True)
             
             # Ações para cada aluno
             col1, col2 = st.columns(2)
             
             with col1:
                 aluno_id_edit = st.selectbox("Selecione um aluno para editar:", 
-                                           options=[a['id'] for a in alunos],
-                                           format_func=lambda x: next((a['nome'] for a in alunos if a['id'] == x), ''))
+                                           options=list(nomes_alunos),
+                                           format_func=nomes_alunos.get)
                 if st.button("Editar Aluno"):
                     aluno = get_aluno(aluno_id_edit)
                     if aluno:
@@ -681,8 +719,8 @@ else:
             
             with col2:
                 aluno_id_delete = st.selectbox("Selecione um aluno para excluir:", 
-                                             options=[a['id'] for a in alunos],
-                                             format_func=lambda x: next((a['nome'] for a in alunos if a['id'] == x), ''))
+                                             options=list(nomes_alunos),
+                                             format_func=nomes_alunos.get)
                 if st.button("Excluir Aluno"):
                     if st.session_state.get('confirm_delete', False):
                         success = delete_aluno(aluno_id_delete)
@@ -730,8 +768,7 @@ else:
                 aproveitamento_id = st.session_state.editing_aproveitamento.get('id', None)
                 
                 # Campos comuns
-                alunos = get_alunos()
-                aluno_options = {a['id']: a['nome'] for a in alunos}
+                aluno_options = get_snapshot().nomes_alunos
                 
                 aluno_id = st.selectbox("Aluno", 
                                       options=list(aluno_options.keys()),
@@ -822,39 +859,25 @@ else:
                             aproveitamento_data['status'] = status
                         
                         # Salvar
-                        save_aproveitamento(aproveitamento_data, aproveitamento_id)
-                        st.session_state.show_aproveitamento_form = False
-                        st.success("Aproveitamento salvo com sucesso!")
-                        st.rerun()
+                        try:
+                            save_aproveitamento(aproveitamento_data, aproveitamento_id,
+                                                st.session_state.editing_aproveitamento.get('version'))
+                        except ConflitoVersao as conflito:
+                            exibir_conflito(conflito, st.session_state.editing_aproveitamento,
+                                            aproveitamento_data, CAMPOS_APROVEITAMENTO)
+                        except ValueError as e:
+                            st.error(str(e))
+                        else:
+                            st.session_state.show_aproveitamento_form = False
+                            st.success("Aproveitamento salvo com sucesso!")
+                            st.rerun()
         
         # Lista de aproveitamentos
-        aproveitamentos = get_aproveitamentos()
-        if aproveitamentos:
-            # Converter para DataFrame para exibição
-            df_aproveitamentos = pd.DataFrame(aproveitamentos)
-            
-            # Formatar datas
-            for col in ['data_solicitacao', 'data_aprovacao_coordenacao', 'data_aprovacao_colegiado', 'data_deferimento']:
-                if col in df_aproveitamentos.columns:
-                    df_aproveitamentos[col] = pd.to_datetime(df_aproveitamentos[col]).dt.strftime('%d/%m/%Y')
-            
-            # Adicionar colunas formatadas
-            df_aproveitamentos['tipo_formatado'] = df_aproveitamentos['tipo'].apply(lambda x: "Disciplina" if x == TipoAproveitamento.DISCIPLINA else "Idioma")
-            
-            df_aproveitamentos['disciplina_idioma'] = df_aproveitamentos.apply(
-                lambda row: row['nome_disciplina'] if row['tipo'] == TipoAproveitamento.DISCIPLINA 
-                else f"{row['idioma']} (Nota: {row['nota']})", axis=1
-            )
-            
-            df_aproveitamentos['status_formatado'] = df_aproveitamentos['status'].apply(
-                lambda x: {
-                    'solicitado': 'Solicitado',
-                    'aprovado_coordenacao': 'Aprovado (Coord.)',
-                    'aprovado_colegiado': 'Aprovado (Coleg.)',
-                    'deferido': 'Deferido',
-                    'indeferido': 'Indeferido'
-                }.get(x, x)
-            )
+        # Tabela formatada do snapshot compartilhado
+        snapshot = get_snapshot()
+        df_aproveitamentos = snapshot.aproveitamentos
+        if not df_aproveitamentos.empty:
+            rotulos_aproveitamentos = snapshot.rotulos_aproveitamentos
             
             # Selecionar e renomear colunas para exibição
             cols_display = {
@@ -870,15 +893,16 @@ else:
             df_display = df_aproveitamentos[list(cols_display.keys())].rename(columns=cols_display)
             
             # Exibir tabela
-            st.dataframe(df_display, hide_index=True)
+            st.dataframe(df_display, hide_index=True,
+                         column_config={'Data Solicitação': COLUMN_CONFIG_DATAS['data_solicitacao']})
             
             # Ações para cada aproveitamento
             col1, col2 = st.columns(2)
             
             with col1:
                 aproveitamento_id_edit = st.selectbox("Selecione um aproveitamento para editar:", 
-                                                    options=[a['id'] for a in aproveitamentos],
-                                                    format_func=lambda x: f"{next((a['aluno_nome'] for a in aproveitamentos if a['id'] == x), '')} - {next((a['disciplina_idioma'] for a in aproveitamentos if a['id'] == x), '')}")
+                                                    options=list(rotulos_aproveitamentos),
+                                                    format_func=rotulos_aproveitamentos.get)
                 if st.button("Editar Aproveitamento"):
                     aproveitamento = get_aproveitamento(aproveitamento_id_edit)
                     if aproveitamento:
@@ -888,8 +912,8 @@ else:
             
             with col2:
                 aproveitamento_id_delete = st.selectbox("Selecione um aproveitamento para excluir:", 
-                                                      options=[a['id'] for a in aproveitamentos],
-                                                      format_func=lambda x: f"{next((a['aluno_nome'] for a in aproveitamentos if a['id'] == x), '')} - {next((a['disciplina_idioma'] for a in aproveitamentos if a['id'] == x), '')}")
+                                                      options=list(rotulos_aproveitamentos),
+                                                      format_func=rotulos_aproveitamentos.get)
                 if st.button("Excluir Aproveitamento"):
                     if st.session_state.get('confirm_delete_aproveitamento', False):
                         delete_aproveitamento(aproveitamento_id_delete)
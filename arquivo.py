@@ -0,0 +1,184 @@
+"""Arquivo de alunos egressos e inativos: tabelas frias fora do conjunto de trabalho.
+
+alunos e aproveitamentos só crescem, e toda lista de seleção, listagem e
+exportação lê também quem se formou há anos. Arquivar move o aluno, com seus
+aproveitamentos e prorrogações, para tabelas *_arquivo no mesmo arquivo de
+banco (assim a movimentação é uma única transação do escritor e as chaves
+estrangeiras e triggers continuam valendo). As consultas do sistema leem as
+tabelas quentes, que passam a ter apenas os alunos ativos; as views
+alunos_historico e aproveitamentos_historico unem ativos e arquivados
+(coluna arquivado) para relatórios históricos. Restaurar faz o caminho inverso.
+
+O SQLite dá a uma linha nova o maior rowid da tabela + 1; sem o aluno de maior
+ID, que foi para o arquivo, um aluno novo herdaria o ID dele (e o histórico de
+eventos de um aproveitamento arquivado). O mesmo vale para um aproveitamento
+excluído, cujo histórico fica. Por isso as inclusões usam proximo_id.
+"""
+import json
+
+import database
+from db_writer import executar_escrita
+from workflow import STATUS_EM_ABERTO
+
+SUFIXO_ARQUIVO = "_arquivo"
+
+# Tabela quente -> coluna que liga a linha ao aluno, na ordem de restauração (pais antes dos filhos)
+TABELAS_ARQUIVO = {
+    "alunos": "id",
+    "aproveitamentos": "aluno_id",
+    "prorrogacoes_prazo": "aluno_id",
+}
+
+# Tabela quente -> colunas buscadas também no arquivo (pelas views de histórico), além do ID
+COLUNAS_INDEXADAS = {
+    "alunos": ["email", "matricula"], # Verificação de duplicados na importação, a cada linha
+    "aproveitamentos": ["numero_processo"], # alocar_numero_processo, a cada inclusão
+}
+
+# Tabela quente -> view com as linhas ativas e as arquivadas
+VIEWS_HISTORICO = {
+    "alunos": "alunos_historico",
+    "aproveitamentos": "aproveitamentos_historico",
+}
+
+def _colunas(cursor, tabela):
+    """[(nome, tipo declarado)] das colunas de uma tabela ou view."""
+    return [(info[1], info[2]) for info in cursor.execute(f"PRAGMA table_info({tabela})").fetchall()]
+
+def criar_tabelas_arquivo(cursor):
+    """Cria (ou completa) as tabelas de arquivo e as views de histórico.
+
+    As tabelas de arquivo acompanham as colunas das tabelas quentes: colunas novas
+    (ex.: por check_and_add_column) são acrescentadas aqui.
+    """
+    for tabela, chave in TABELAS_ARQUIVO.items():
+        colunas = _colunas(cursor, tabela)
+        if not colunas: # Tabela ainda não criada por este init_db (ex.: app.py não tem prorrogações)
+            continue
+        arquivo = tabela + SUFIXO_ARQUIVO
+        extras = ", data_arquivamento TIMESTAMP, motivo_arquivamento TEXT" if tabela == "alunos" else ""
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {arquivo} ({', '.join(f'{nome} {tipo}' for nome, tipo in colunas)}{extras})")
+        existentes = {nome for nome, _ in _colunas(cursor, arquivo)}
+        for nome, tipo in colunas:
+            if nome not in existentes:
+                cursor.execute(f"ALTER TABLE {arquivo} ADD COLUMN {nome} {tipo}")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{arquivo}_id ON {arquivo} (id)")
+        nomes = {nome for nome, _ in colunas}
+        for coluna in ([chave] if chave != "id" else []) + COLUNAS_INDEXADAS.get(tabela, []):
+            if coluna in nomes:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{arquivo}_{coluna} ON {arquivo} ({coluna})")
+
+    for tabela, view in VIEWS_HISTORICO.items():
+        nomes = [nome for nome, _ in _colunas(cursor, tabela)]
+        # Recriada só quando as colunas mudam: init_db roda a cada execução do script
+        if not nomes or [nome for nome, _ in _colunas(cursor, view)] == nomes + ["arquivado"]:
+            continue
+        lista = ", ".join(nomes)
+        cursor.execute(f"DROP VIEW IF EXISTS {view}")
+        cursor.execute(f"""
+        CREATE VIEW {view} AS
+        SELECT {lista}, 0 AS arquivado FROM {tabela}
+        UNION ALL
+        SELECT {lista}, 1 AS arquivado FROM {tabela}{SUFIXO_ARQUIVO}
+        """)
+
+# Tabela -> outras (tabela, coluna) que guardam IDs dela e sobrevivem à exclusão da linha
+IDS_REGISTRADOS = {
+    "aproveitamentos": [("aproveitamento_events", "aproveitamento_id")], # Histórico sem FOREIGN KEY
+}
+
+def proximo_id(conn, tabela):
+    """ID para uma linha nova de tabela ("alunos" ou "aproveitamentos").
+
+    Maior que os IDs ativos, os arquivados e os ainda referenciados após uma
+    exclusão (ex.: o histórico de status de um aproveitamento excluído).
+    """
+    fontes = [(tabela, "id"), (tabela + SUFIXO_ARQUIVO, "id")] + IDS_REGISTRADOS.get(tabela, [])
+    maximos = ", ".join(f"COALESCE((SELECT MAX({coluna}) FROM {origem}), 0)" for origem, coluna in fontes)
+    return conn.execute(f"SELECT MAX({maximos}) + 1").fetchone()[0]
+
+def _mover(conn, ids, origem, destino, extras=None):
+    """Copia as linhas dos alunos em ids de origem para destino e as remove da origem, em todas as tabelas.
+
+    extras: {coluna: valor} gravados só na linha do aluno (data e motivo do arquivamento).
+    Retorna quantos alunos foram movidos.
+    """
+    lista_ids = json.dumps(ids)
+    tabelas = list(TABELAS_ARQUIVO.items())
+    for tabela, chave in tabelas:
+        colunas = ", ".join(nome for nome, _ in _colunas(conn, tabela)) # Colunas da tabela quente
+        colunas_extras, valores_extras = "", []
+        if tabela == "alunos" and extras:
+            colunas_extras = ", " + ", ".join(extras)
+            valores_extras = list(extras.values())
+        conn.execute(f"""
+            INSERT INTO {destino(tabela)} ({colunas}{colunas_extras})
+            SELECT {colunas}{", ?" * len(valores_extras)} FROM {origem(tabela)}
+            WHERE {chave} IN (SELECT value FROM json_each(?))
+        """, valores_extras + [lista_ids])
+    movidos = 0
+    for tabela, chave in reversed(tabelas): # Filhos antes dos pais
+        cursor = conn.execute(f"DELETE FROM {origem(tabela)} WHERE {chave} IN (SELECT value FROM json_each(?))",
+                              (lista_ids,))
+        movidos = cursor.rowcount
+    return movidos
+
+def _arquivar_alunos(conn, ids, motivo):
+    data = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+    return _mover(conn, ids, lambda tabela: tabela, lambda tabela: tabela + SUFIXO_ARQUIVO,
+                  {"data_arquivamento": data, "motivo_arquivamento": motivo})
+
+def arquivar_alunos(ids, motivo=None):
+    """Move os alunos (e seus aproveitamentos e prorrogações) para o arquivo. Retorna quantos foram movidos."""
+    return executar_escrita(_arquivar_alunos, [int(aluno_id) for aluno_id in ids], motivo)
+
+def _restaurar_alunos(conn, ids):
+    return _mover(conn, ids, lambda tabela: tabela + SUFIXO_ARQUIVO, lambda tabela: tabela)
+
+def restaurar_alunos(ids):
+    """Devolve alunos arquivados às tabelas ativas. Retorna quantos foram restaurados.
+
+    Levanta sqlite3.IntegrityError (e nada é restaurado) se o ID, e-mail, matrícula ou
+    número de processo de algum deles já estiver em uso por um registro ativo.
+    """
+    return executar_escrita(_restaurar_alunos, [int(aluno_id) for aluno_id in ids])
+
+def alunos_para_arquivar(nivel=None, turma=None, prazo_tese_antes_de=None, sem_pendencias=True):
+    """Alunos ativos que atendem a todos os critérios informados, com a quantidade de aproveitamentos.
+
+    prazo_tese_antes_de: data ISO; só alunos com prazo de defesa da tese anterior a ela.
+    sem_pendencias: exclui alunos com aproveitamentos ainda em análise.
+    """
+    filtros, params = [], {}
+    if nivel:
+        filtros.append("TRIM(a.nivel) = :nivel")
+        params["nivel"] = nivel
+    if turma:
+        filtros.append("TRIM(a.turma) = :turma")
+        params["turma"] = str(turma).strip()
+    if prazo_tese_antes_de:
+        # Busca por intervalo no índice do prazo (ver prazos.py sobre o limite inferior)
+        filtros.append("a.prazo_defesa_tese >= '0000-00-00' AND a.prazo_defesa_tese < :prazo")
+        params["prazo"] = str(prazo_tese_antes_de)
+    if sem_pendencias:
+        em_aberto = ", ".join(f":status{i}" for i in range(len(STATUS_EM_ABERTO)))
+        filtros.append(f"""NOT EXISTS (
+            SELECT 1 FROM aproveitamentos p WHERE p.aluno_id = a.id AND p.status IN ({em_aberto})
+        )""")
+        params.update({f"status{i}": status for i, status in enumerate(STATUS_EM_ABERTO)})
+    return database.query_frame(f"""
+        SELECT a.id, a.nome, a.nivel, a.turma, a.prazo_defesa_tese,
+               (SELECT COUNT(*) FROM aproveitamentos p WHERE p.aluno_id = a.id) AS aproveitamentos
+        FROM alunos a
+        {"WHERE " + " AND ".join(filtros) if filtros else ""}
+        ORDER BY a.nome, a.id
+    """, params)
+
+def alunos_arquivados():
+    """Alunos arquivados, do arquivamento mais recente ao mais antigo."""
+    return database.query_frame(f"""
+        SELECT a.id, a.nome, a.email, a.nivel, a.turma, a.data_arquivamento, a.motivo_arquivamento,
+               (SELECT COUNT(*) FROM aproveitamentos{SUFIXO_ARQUIVO} p WHERE p.aluno_id = a.id) AS aproveitamentos
+        FROM alunos{SUFIXO_ARQUIVO} a
+        ORDER BY a.data_arquivamento DESC, a.nome
+    """)
@@ -0,0 +1,179 @@
+"""Backups do banco com a API de backup do SQLite, com rotação e verificação.
+
+Copiar o arquivo ppgop.db enquanto alguma sessão grava pode gerar uma cópia
+corrompida (páginas de antes e de depois de uma transação, WAL de fora). A API
+de backup (sqlite3.Connection.backup) copia um retrato consistente do banco; em
+passos de PAGINAS_POR_PASSO páginas, com uma pausa entre eles, ela só segura o
+lock de leitura durante cada passo e não impede o escritor de gravar. Cada
+cópia passa por PRAGMA integrity_check antes de receber o nome definitivo.
+
+Backups são feitos automaticamente antes de operações destrutivas (recriar o
+banco, restaurar um backup) e periodicamente, com rotação por motivo: os
+periódicos não apagam os feitos antes de uma operação destrutiva.
+
+Linha de comando: ver manutencao.py (backup, backups, verificar-backup, restaurar).
+"""
+import datetime
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import database
+
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS_S = 0.01
+INTERVALO_BACKUP_S = 24 * 60 * 60 # Backup periódico diário
+FORMATO_DATA = "%Y%m%d-%H%M%S-%f" # No nome do arquivo: ppgop-AAAAMMDD-HHMMSS-micro-motivo.db
+
+# Motivo -> quantos backups manter (os mais recentes)
+RETENCAO = {
+    "periodico": 14,
+    "manual": 10,
+    "antes-recriar": 5,
+    "antes-restaurar": 5,
+}
+RETENCAO_PADRAO = 10
+
+def pasta_backups(db_file=None):
+    """Pasta dos backups: PPGOP_BACKUP_DIR ou "backups" ao lado do arquivo do banco."""
+    db_file = os.path.abspath(db_file or database.DB_FILE)
+    return os.environ.get("PPGOP_BACKUP_DIR") or os.path.join(os.path.dirname(db_file), "backups")
+
+def _prefixo(db_file):
+    return os.path.splitext(os.path.basename(db_file))[0]
+
+def verificar_backup(caminho):
+    """Executa PRAGMA integrity_check no arquivo; retorna a lista de problemas (vazia se íntegro)."""
+    conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    try:
+        resultado = [linha[0] for linha in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e: # Cabeçalho ilegível: nem chega a verificar
+        resultado = [str(e)]
+    finally:
+        conn.close()
+    return [] if resultado == ["ok"] else resultado
+
+def criar_backup(motivo="manual", db_file=None):
+    """Faz o backup do banco (em passos, sem bloquear o escritor), verifica e aplica a rotação.
+
+    Returns:
+        str: Caminho do backup.
+
+    Raises:
+        FileNotFoundError: Se o banco não existir.
+        sqlite3.DatabaseError: Se a cópia não passar no integrity_check (ela é descartada).
+    """
+    db_file = os.path.abspath(db_file or database.DB_FILE)
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(db_file)
+    pasta = pasta_backups(db_file)
+    os.makedirs(pasta, exist_ok=True)
+    caminho = None
+    while caminho is None or os.path.exists(caminho):
+        carimbo = datetime.datetime.now().strftime(FORMATO_DATA)
+        caminho = os.path.join(pasta, f"{_prefixo(db_file)}-{carimbo}-{motivo}.db")
+    parcial = caminho + ".parcial"
+
+    inicio = time.perf_counter()
+    origem = database.conectar(db_file)
+    destino = sqlite3.connect(parcial)
+    try:
+        origem.backup(destino, pages=PAGINAS_POR_PASSO, sleep=PAUSA_ENTRE_PASSOS_S)
+        destino.execute("PRAGMA journal_mode = DELETE") # Arquivo único, sem -wal/-shm
+    finally:
+        destino.close()
+        origem.close()
+
+    problemas = verificar_backup(parcial)
+    if problemas:
+        os.remove(parcial)
+        raise sqlite3.DatabaseError(f"Backup descartado, integrity_check falhou: {problemas[:5]}")
+    os.replace(parcial, caminho) # Só cópias verificadas recebem o nome definitivo
+    print(f"Backup ({motivo}) salvo em {caminho} em {time.perf_counter() - inicio:.1f} s.")
+    rotacionar(motivo, db_file)
+    return caminho
+
+def listar_backups(db_file=None, motivo=None):
+    """Backups do banco, do mais recente ao mais antigo: [{"caminho", "motivo", "data", "tamanho"}]."""
+    db_file = os.path.abspath(db_file or database.DB_FILE)
+    padrao = os.path.join(pasta_backups(db_file), f"{_prefixo(db_file)}-*-{motivo or '*'}.db")
+    nome_backup = re.compile(rf"^{re.escape(_prefixo(db_file))}-(\d{{8}}-\d{{6}}-\d{{6}})-(.+)\.db$")
+    backups = []
+    for caminho in glob.glob(padrao):
+        partes = nome_backup.match(os.path.basename(caminho))
+        if not partes or (motivo and partes.group(2) != motivo):
+            continue # Arquivo que não é um backup deste módulo (ou de outro motivo)
+        backups.append({
+            "caminho": caminho, "motivo": partes.group(2),
+            "data": datetime.datetime.strptime(partes.group(1), FORMATO_DATA), "tamanho": os.path.getsize(caminho),
+        })
+    return sorted(backups, key=lambda backup: backup["data"], reverse=True)
+
+def rotacionar(motivo, db_file=None):
+    """Apaga os backups mais antigos do motivo além da retenção. Retorna os caminhos apagados."""
+    manter = RETENCAO.get(motivo, RETENCAO_PADRAO)
+    apagados = [backup["caminho"] for backup in listar_backups(db_file, motivo)[manter:]]
+    for caminho in apagados:
+        os.remove(caminho)
+    return apagados
+
+def restaurar_backup(caminho, db_file=None):
+    """Substitui o conteúdo do banco pelo do backup, depois de verificá-lo.
+
+    O banco atual é salvo antes (motivo "antes-restaurar"). A cópia é feita pela API
+    de backup no próprio arquivo, então conexões abertas (escritor, leitura da versão
+    dos dados) passam a ver o conteúdo restaurado.
+
+    Returns:
+        str: Caminho do backup do banco anterior (None se o banco não existia).
+    """
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(caminho)
+    problemas = verificar_backup(caminho)
+    if problemas:
+        raise sqlite3.DatabaseError(f"Backup corrompido, nada foi restaurado: {problemas[:5]}")
+    db_file = os.path.abspath(db_file or database.DB_FILE)
+    anterior = criar_backup("antes-restaurar", db_file) if os.path.exists(db_file) else None
+    origem = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    destino = database.conectar(db_file, timeout=30)
+    try:
+        origem.backup(destino) # De uma vez: o destino fica bloqueado até o fim de qualquer forma
+    finally:
+        destino.close()
+        origem.close()
+    print(f"Banco {db_file} restaurado de {caminho}.")
+    return anterior
+
+# --- Backup Periódico ---
+# Uma thread por arquivo de banco; o intervalo é contado a partir do backup
+# periódico mais recente, então reiniciar o sistema não adia nem repete backups.
+
+_periodicos_lock = threading.Lock()
+_periodicos = set()
+
+def _loop_backup(db_file, intervalo):
+    while True:
+        espera = intervalo
+        try:
+            recentes = listar_backups(db_file, "periodico")
+            idade = (datetime.datetime.now() - recentes[0]["data"]).total_seconds() if recentes else None
+            if os.path.exists(db_file) and (idade is None or idade >= intervalo):
+                criar_backup("periodico", db_file)
+            elif idade is not None:
+                espera = intervalo - idade
+        except Exception as e:
+            print(f"Erro no backup periódico: {e}")
+        time.sleep(max(espera, 60))
+
+def iniciar_backup_periodico(intervalo=INTERVALO_BACKUP_S):
+    """Inicia, uma única vez por banco, os backups periódicos."""
+    db_file = os.path.abspath(database.DB_FILE)
+    with _periodicos_lock:
+        if db_file in _periodicos:
+            return
+        _periodicos.add(db_file)
+    threading.Thread(target=_loop_backup, args=(db_file, intervalo),
+                     name=f"backup-periodico:{db_file}", daemon=True).start()
@@ -0,0 +1,99 @@
+"""Busca textual (FTS5) em alunos e aproveitamentos, compartilhada por streamlit_app.py e app.py.
+
+Os índices alunos_fts e aproveitamentos_fts são tabelas FTS5 de conteúdo externo:
+guardam apenas os tokens e leem o texto das próprias tabelas. Triggers os mantêm
+em sincronia em toda inclusão, exclusão (inclusive em cascata) e alteração dos
+campos indexados. O tokenizador unicode61 com remove_diacritics ignora acentos e
+maiúsculas ("joao" encontra "João"), e cada termo digitado é buscado como prefixo.
+"""
+import re
+
+import database
+
+LIMITE_RESULTADOS = 20
+
+# {tabela: colunas indexadas}; a ordem define os pesos de bm25 abaixo
+CAMPOS_BUSCA = {
+    "alunos": ["nome", "email", "matricula", "orientador", "linha_pesquisa"],
+    "aproveitamentos": ["nome_disciplina", "codigo_disciplina", "idioma", "instituicao", "numero_processo", "observacoes"],
+}
+
+# Pesos por coluna no ranking: nome, matrícula e processo valem mais que texto livre
+PESOS_BM25 = {
+    "alunos": "10.0, 4.0, 8.0, 2.0, 1.0",
+    "aproveitamentos": "8.0, 8.0, 4.0, 2.0, 10.0, 1.0",
+}
+
+def criar_indice_busca(cursor):
+    """Cria os índices FTS5 e os triggers de sincronia; na primeira vez, indexa os dados existentes."""
+    for tabela, colunas in CAMPOS_BUSCA.items():
+        indice = f"{tabela}_fts"
+        existia = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (indice,)
+        ).fetchone()
+        lista = ", ".join(colunas)
+        novos = ", ".join(f"new.{coluna}" for coluna in colunas)
+        antigos = ", ".join(f"old.{coluna}" for coluna in colunas)
+
+        # prefix='2 3': índices extras que aceleram as buscas por prefixo curtas
+        cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5(
+            {lista}, content='{tabela}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {indice}_insert AFTER INSERT ON {tabela} BEGIN
+            INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {novos});
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {indice}_delete AFTER DELETE ON {tabela} BEGIN
+            INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos});
+        END
+        """)
+        # Só reindexa quando um campo indexado muda (não a cada status ou versão)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {indice}_update AFTER UPDATE OF {lista} ON {tabela} BEGIN
+            INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos});
+            INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {novos});
+        END
+        """)
+        if not existia:
+            cursor.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+
+def consulta_fts(texto):
+    """Converte o texto digitado em uma consulta FTS5: todos os termos, cada um como prefixo.
+
+    Retorna None se não houver termos. Aspas e operadores digitados são tratados como texto.
+    """
+    termos = re.findall(r"\w+", texto or "")
+    if not termos:
+        return None
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+def _buscar(tabela, texto, limite):
+    """IDs de tabela cujos campos indexados contêm todos os termos, do mais ao menos relevante.
+
+    limite=None retorna todos os encontrados.
+    """
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+    indice = f"{tabela}_fts"
+    df = database.query_frame(f"""
+        SELECT rowid AS id
+        FROM {indice}
+        WHERE {indice} MATCH ?
+        ORDER BY bm25({indice}, {PESOS_BM25[tabela]})
+        LIMIT ?
+    """, (consulta, -1 if limite is None else limite))
+    return df["id"].tolist()
+
+def buscar_alunos(texto, limite=LIMITE_RESULTADOS):
+    """IDs dos alunos encontrados (nome, e-mail, matrícula, orientador, linha de pesquisa)."""
+    return _buscar("alunos", texto, limite)
+
+def buscar_aproveitamentos(texto, limite=LIMITE_RESULTADOS):
+    """IDs dos aproveitamentos encontrados (disciplina, código, idioma, instituição, processo, observações)."""
+    return _buscar("aproveitamentos", texto, limite)
@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+import pytest
+
+# Os scripts test_*.py importam streamlit_app, que inicializa o banco ao ser
+# executado. Durante os testes, usar um banco temporário em vez do ppgop.db.
+os.environ.setdefault("PPGOP_DB_FILE", os.path.join(tempfile.mkdtemp(prefix="ppgop_test_"), "ppgop.db"))
+
+import database
+from esquema import criar_esquema
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    """Banco temporário vazio com o esquema do sistema (o mesmo do init_db; ver esquema.py).
+
+    Cada módulo de teste insere seus dados sobrescrevendo esta fixture:
+    def db_file(db_file): ...; return db_file
+    """
+    path = str(tmp_path / "ppgop.db")
+    monkeypatch.setattr(database, "DB_FILE", path)
+    conn = database.conectar(path)
+    criar_esquema(conn.cursor())
+    conn.commit()
+    conn.close()
+    return path
@@ -0,0 +1,88 @@
+"""Indicadores do programa por coorte (nível, turma, orientador, linha de pesquisa).
+
+Os números vêm de um GROUP BY no SQLite sobre os aproveitamentos já agregados
+por aluno, então só as linhas dos grupos chegam ao pandas. O resultado é
+guardado em cache por versão dos dados (PRAGMA data_version): enquanto ninguém
+grava, todas as sessões reaproveitam o mesmo cálculo.
+"""
+import pandas as pd
+import streamlit as st
+
+import database
+from workflow import STATUS_EM_ABERTO
+
+# Agrupamento -> (rótulo, expressão do grupo, expressão da chave de filtro, JOIN necessário)
+# orientador e linha de pesquisa agrupam pelas dimensões (IDs), não pelo texto de cada aluno
+AGRUPAMENTOS = {
+    "nivel": ("Nível", "a.nivel", "NULLIF(TRIM(a.nivel), '')", ""),
+    "turma": ("Turma", "a.turma", "NULLIF(TRIM(a.turma), '')", ""),
+    "orientador": ("Orientador(a)", "o.nome", "a.orientador_id", "LEFT JOIN orientadores o ON o.id = a.orientador_id"),
+    "linha_pesquisa": ("Linha de Pesquisa", "l.nome", "a.linha_pesquisa_id",
+                       "LEFT JOIN linhas_pesquisa l ON l.id = a.linha_pesquisa_id"),
+}
+
+SEM_GRUPO = "Não informado"
+
+def _totais_por_aluno_sql():
+    """CTE com os totais de aproveitamentos de cada aluno e seus parâmetros."""
+    em_aberto = ", ".join("?" * len(STATUS_EM_ABERTO))
+    return f"""
+    por_aluno AS (
+        SELECT aluno_id,
+               SUM(CASE WHEN tipo = 'disciplina' AND status = 'deferido' THEN COALESCE(creditos, 0) ELSE 0 END)
+                   AS creditos_deferidos,
+               SUM(tipo = 'idioma' AND status = 'deferido') AS idiomas_deferidos,
+               SUM(status IN ({em_aberto})) AS pendentes
+        FROM aproveitamentos
+        GROUP BY aluno_id
+    )
+    """, list(STATUS_EM_ABERTO)
+
+def _indicadores(agrupamento):
+    _, grupo, chave, juncao = AGRUPAMENTOS[agrupamento]
+    cte, params = _totais_por_aluno_sql()
+    return database.query_frame(f"""
+        WITH {cte}
+        SELECT COALESCE(NULLIF(TRIM({grupo}), ''), '{SEM_GRUPO}') AS grupo,
+               {chave} AS chave,
+               COUNT(*) AS alunos,
+               COALESCE(SUM(p.creditos_deferidos), 0) AS creditos_deferidos,
+               COALESCE(SUM(p.idiomas_deferidos), 0) AS idiomas_deferidos,
+               COALESCE(SUM(p.pendentes), 0) AS pendentes
+        FROM alunos a
+        LEFT JOIN por_aluno p ON p.aluno_id = a.id
+        {juncao}
+        GROUP BY {chave}
+        ORDER BY alunos DESC, grupo
+    """, params)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _indicadores_em_cache(agrupamento, db_file, versao):
+    return _indicadores(agrupamento)
+
+def indicadores_por_coorte(agrupamento):
+    """Uma linha por grupo: alunos, créditos deferidos, idiomas deferidos e aproveitamentos pendentes.
+
+    A coluna chave identifica o grupo em alunos_da_coorte (None para "Não informado").
+    """
+    return _indicadores_em_cache(agrupamento, database.DB_FILE, database.get_data_version())
+
+def alunos_da_coorte(agrupamento, chave):
+    """Alunos de um grupo de indicadores_por_coorte, com seus totais de aproveitamentos."""
+    chave_sql = AGRUPAMENTOS[agrupamento][2]
+    if pd.isna(chave):
+        chave = None
+    elif hasattr(chave, "item"): # Escalares numpy não são aceitos como parâmetro do sqlite3
+        chave = chave.item()
+    cte, params = _totais_por_aluno_sql()
+    return database.query_frame(f"""
+        WITH {cte}
+        SELECT a.id, a.nome, a.email, a.nivel, a.turma, a.orientador, a.linha_pesquisa,
+               COALESCE(p.creditos_deferidos, 0) AS creditos_deferidos,
+               COALESCE(p.idiomas_deferidos, 0) AS idiomas_deferidos,
+               COALESCE(p.pendentes, 0) AS pendentes
+        FROM alunos a
+        LEFT JOIN por_aluno p ON p.aluno_id = a.id
+        WHERE {chave_sql} IS ?
+        ORDER BY a.nome, a.id
+    """, params + [chave])
@@ -0,0 +1,196 @@
+"""Funções de banco de dados compartilhadas por streamlit_app.py e app.py."""
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+DB_FILE = os.environ.get("PPGOP_DB_FILE", "ppgop.db") # Permite apontar para outro banco (ex.: testes)
+
+def conectar(db_file=None, **kwargs):
+    """Abre uma conexão com o banco, com as chaves estrangeiras ativadas.
+
+    O SQLite só aplica FOREIGN KEY (e o ON DELETE CASCADE) nas conexões que
+    executam "PRAGMA foreign_keys = ON"; toda conexão do sistema deve vir daqui.
+    """
+    conn = sqlite3.connect(db_file or DB_FILE, **kwargs)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def get_connection():
+    """Retorna uma conexão com o banco de dados (linhas como sqlite3.Row)."""
+    conn = conectar()
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def migracao_pendente(cursor, nome):
+    """Registra a migração de dados nome e retorna True só na primeira vez, quando ela deve ser aplicada.
+
+    Para correções que rodam uma única vez por banco (dentro do init_db), sem
+    depender de reconhecer os dados a corrigir.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS migracoes (
+        nome TEXT PRIMARY KEY,
+        data_aplicacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    return cursor.execute("INSERT OR IGNORE INTO migracoes (nome) VALUES (?)", (nome,)).rowcount == 1
+
+# --- Consultas em Formato Colunar ---
+# As listagens buscam apenas as colunas exibidas (já renomeadas no SQL) e montam
+# a tabela Arrow direto das tuplas do cursor, sem sqlite3.Row nem dicts. O
+# st.dataframe aceita pyarrow.Table sem conversão adicional.
+
+def _coluna_arrow(valores):
+    """Monta um array Arrow; colunas com tipos mistos (SQLite é dinâmico) viram texto."""
+    try:
+        return pa.array(valores)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+def query_arrow(sql, params=()):
+    """Executa uma consulta e retorna o resultado como pyarrow.Table."""
+    conn = conectar()
+    try:
+        cursor = conn.execute(sql, params)
+        nomes = [descricao[0] for descricao in cursor.description]
+        linhas = cursor.fetchall()
+    finally:
+        conn.close()
+    colunas = zip(*linhas) if linhas else ([] for _ in nomes)
+    return pa.table({nome: _coluna_arrow(list(valores)) for nome, valores in zip(nomes, colunas)})
+
+def query_frame(sql, params=()):
+    """Executa uma consulta e retorna um DataFrame com dtypes baseados em Arrow."""
+    return query_arrow(sql, params).to_pandas(types_mapper=pd.ArrowDtype)
+
+# --- Versão dos Dados ---
+# "PRAGMA data_version" muda sempre que outra conexão confirma uma alteração no
+# banco. Uma conexão dedicada, que nunca escreve, é mantida aberta para lê-lo;
+# o valor serve de chave para caches que devem ser refeitos só quando os dados mudam.
+
+_versao_lock = threading.Lock()
+_versao_estado = {"conn": None, "inode": None, "geracao": 0}
+
+def get_data_version():
+    """Retorna um identificador que muda sempre que os dados do banco mudam.
+
+    Returns:
+        tuple: (inode do arquivo, geração da conexão, PRAGMA data_version), ou None
+               se o banco ainda não existir.
+    """
+    try:
+        inode = os.stat(DB_FILE).st_ino
+    except FileNotFoundError:
+        return None
+
+    with _versao_lock:
+        estado = _versao_estado
+        # O arquivo foi recriado (ex.: init_db(force_recreate=True)): reabrir a conexão
+        if estado["conn"] is None or estado["inode"] != inode:
+            if estado["conn"] is not None:
+                estado["conn"].close()
+            estado["conn"] = conectar(check_same_thread=False)
+            estado["inode"] = inode
+            estado["geracao"] += 1
+        data_version = estado["conn"].execute("PRAGMA data_version").fetchone()[0]
+        return (inode, estado["geracao"], data_version)
+
+# --- Controle de Concorrência Otimista ---
+# alunos e aproveitamentos têm uma coluna "version", incrementada a cada UPDATE.
+# Quem edita guarda a versão carregada e grava com "WHERE id = ? AND version = ?";
+# se outra sessão gravou antes, nenhuma linha é afetada e o conflito é devolvido
+# à interface, que mostra a diferença campo a campo. Nenhum lock é mantido.
+
+class ConflitoVersao(Exception):
+    """A linha foi alterada (ou excluída) por outra sessão depois de carregada.
+
+    Attributes:
+        tabela (str): Tabela do registro.
+        registro_id (int): ID do registro.
+        atual (dict | None): Linha atual no banco, ou None se foi excluída.
+    """
+
+    def __init__(self, tabela, registro_id, atual):
+        self.tabela = tabela
+        self.registro_id = registro_id
+        self.atual = atual
+        situacao = "excluído" if atual is None else "alterado"
+        super().__init__(f"Registro {registro_id} de {tabela} foi {situacao} por outra sessão.")
+
+def atualizar_versionado(conn, tabela, registro_id, valores, versao=None, atribuicoes=()):
+    """Executa o UPDATE de um registro incrementando sua versão.
+
+    Args:
+        conn: Conexão de escrita.
+        tabela (str): "alunos" ou "aproveitamentos".
+        registro_id (int): ID do registro.
+        valores (dict): {coluna: valor} a gravar.
+        versao (int | None): Versão carregada pelo usuário; se informada, o UPDATE só
+                             ocorre se o registro ainda estiver nessa versão.
+        atribuicoes (iterable): Atribuições SQL adicionais sem parâmetros
+                                (ex.: "data_deferimento = CURRENT_TIMESTAMP").
+
+    Raises:
+        ConflitoVersao: Se o registro mudou de versão ou não existe mais.
+    """
+    sets = [f"{coluna} = ?" for coluna in valores] + list(atribuicoes) + ["version = version + 1"]
+    sql = f"UPDATE {tabela} SET {', '.join(sets)} WHERE id = ?"
+    params = list(valores.values()) + [registro_id]
+    if versao is not None:
+        sql += " AND version = ?"
+        params.append(versao)
+    if conn.execute(sql, params).rowcount == 0:
+        cursor = conn.execute(f"SELECT * FROM {tabela} WHERE id = ?", (registro_id,))
+        linha = cursor.fetchone()
+        atual = dict(zip([d[0] for d in cursor.description], linha)) if linha else None
+        raise ConflitoVersao(tabela, registro_id, atual)
+
+def _valor_comparavel(valor):
+    """Normaliza um valor de formulário ou do banco para comparação e exibição."""
+    if valor is None or valor == "":
+        return ""
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%Y-%m-%d")
+    return str(valor)
+
+def campos_alterados(original, editado, campos=None):
+    """Retorna {coluna: valor} apenas das colunas cujo valor editado difere do carregado.
+
+    Vazio e None são tratados como iguais, assim como datas e suas strings ISO.
+    """
+    campos = editado.keys() if campos is None else campos
+    return {
+        coluna: editado[coluna] for coluna in campos
+        if coluna in editado and _valor_comparavel(editado[coluna]) != _valor_comparavel(original.get(coluna))
+    }
+
+def diferencas_conflito(original, editado, atual, campos):
+    """Monta a diferença campo a campo de um conflito de edição.
+
+    Args:
+        original (dict): Linha como estava quando o usuário começou a editar.
+        editado (dict): Valores enviados pelo usuário.
+        atual (dict): Linha atual no banco (gravada por outra sessão).
+        campos (dict): {coluna: rótulo} dos campos a comparar.
+
+    Returns:
+        pd.DataFrame: Uma linha por campo alterado por alguém, com a coluna
+                      "Conflito" marcando os alterados pelos dois lados com valores diferentes.
+    """
+    linhas = []
+    for coluna, rotulo in campos.items():
+        antes = _valor_comparavel(original.get(coluna))
+        meu = _valor_comparavel(editado.get(coluna, original.get(coluna)))
+        deles = _valor_comparavel(atual.get(coluna))
+        if meu != antes or deles != antes:
+            linhas.append({
+                "Campo": rotulo,
+                "Ao carregar": antes,
+                "Sua versão": meu,
+                "Versão atual": deles,
+                "Conflito": meu != antes and deles != antes and meu != deles,
+            })
+    return pd.DataFrame(linhas, columns=["Campo", "Ao carregar", "Sua versão", "Versão atual", "Conflito"])
@@ -0,0 +1,184 @@
+"""Escritor único do banco de dados, compartilhado por streamlit_app.py e app.py.
+
+O SQLite aceita apenas um escritor por vez; com várias sessões gravando ao mesmo
+tempo, conexões independentes disputam o lock e falham com "database is locked".
+Aqui uma thread dedicada é dona da única conexão de escrita. As operações chegam
+por uma fila e as que se acumulam enquanto a anterior é confirmada são gravadas
+juntas em uma só transação (group commit). Cada operação roda em um SAVEPOINT
+próprio, então o erro de uma (ex.: IntegrityError) não desfaz as demais do lote;
+o resultado ou a exceção volta a quem chamou por um Future. Depois de cada
+commit que alterou dados, o escritor chama as funções registradas com
+ao_confirmar (ex.: a publicação do snapshot de leitura, ver snapshots.py).
+
+Uso:
+    aluno_id = executar_escrita(gravar_aluno, dados)  # gravar_aluno(conn, dados)
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import database
+
+MAX_OPERACOES_POR_LOTE = 64
+BUSY_TIMEOUT_MS = 5000
+
+class DatabaseWriter:
+    """Thread que serializa as escritas em um arquivo de banco."""
+
+    def __init__(self, db_file, max_lote=MAX_OPERACOES_POR_LOTE):
+        self.db_file = db_file
+        self.max_lote = max_lote
+        self._fila = queue.Queue()
+        self._conn = None
+        self._inode = None
+        # Lidos pela manutenção agendada (manutencao.py): linhas gravadas desde o início
+        # do processo e instante (time.monotonic) do último commit com alterações
+        self.linhas_alteradas = 0
+        self.ultima_escrita = None
+        self._thread = threading.Thread(target=self._loop, name=f"db-writer:{db_file}", daemon=True)
+        self._thread.start()
+
+    def submit(self, operacao, *args, **kwargs):
+        """Enfileira operacao(conn, *args, **kwargs) e retorna um Future com o resultado."""
+        futuro = Future()
+        self._fila.put((futuro, operacao, args, kwargs))
+        return futuro
+
+    def executar(self, operacao, *args, **kwargs):
+        """Enfileira a operação e espera o commit; exceções da operação são relançadas."""
+        return self.submit(operacao, *args, **kwargs).result()
+
+    def _conectar(self):
+        """Abre (ou reabre, se o arquivo foi recriado) a conexão de escrita."""
+        inode = os.stat(self.db_file).st_ino if os.path.exists(self.db_file) else None
+        if self._conn is not None and inode is not None and inode == self._inode:
+            return self._conn
+        if self._conn is not None:
+            self._conn.close()
+        # isolation_level=None: as transações são controladas explicitamente abaixo
+        conn = database.conectar(self.db_file, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode = WAL") # Leitores não bloqueiam o escritor
+        self._conn = conn
+        self._inode = os.stat(self.db_file).st_ino
+        return conn
+
+    def _proximo_lote(self):
+        """Espera a primeira operação e junta as que já estiverem na fila."""
+        lote = [self._fila.get()]
+        while len(lote) < self.max_lote:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _descartar_conexao(self):
+        """Fecha a conexão de escrita (desfazendo a transação aberta); a próxima operação reconecta."""
+        conn, self._conn, self._inode = self._conn, None, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _loop(self):
+        while True:
+            lote = [item for item in self._proximo_lote() if item[0].set_running_or_notify_cancel()]
+            if not lote:
+                continue
+            try:
+                self._gravar_lote(lote)
+            except Exception as e:
+                # A thread não pode morrer: quem espera no Future ficaria bloqueado para sempre.
+                # O estado da transação é desconhecido, então o lote inteiro falha.
+                self._descartar_conexao()
+                for futuro, *_ in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def _gravar_lote(self, lote):
+        """Grava o lote em uma transação; cada operação fica isolada em um SAVEPOINT."""
+        resultados = []
+        try:
+            conn = self._conectar()
+            alteracoes_antes = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            for futuro, *_ in lote:
+                futuro.set_exception(e)
+            return
+
+        for futuro, operacao, args, kwargs in lote:
+            conn.execute("SAVEPOINT operacao")
+            try:
+                resultados.append((True, operacao(conn, *args, **kwargs)))
+                conn.execute("RELEASE operacao")
+            except Exception as e:
+                try:
+                    conn.execute("ROLLBACK TO operacao")
+                    conn.execute("RELEASE operacao")
+                except Exception as erro_savepoint:
+                    # Ex.: a operação fechou a conexão ou encerrou a transação; tratado em _loop
+                    raise erro_savepoint from e
+                resultados.append((False, e))
+
+        try:
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for futuro, *_ in lote:
+                futuro.set_exception(e)
+            return
+        alteracoes = conn.total_changes - alteracoes_antes
+        if alteracoes:
+            self.linhas_alteradas += alteracoes
+            self.ultima_escrita = time.monotonic()
+
+        # Só depois do commit: quem chamou já enxerga os dados gravados
+        for (futuro, *_), (sucesso, valor) in zip(lote, resultados):
+            if sucesso:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+        if alteracoes:
+            for funcao in list(_apos_commit):
+                try:
+                    funcao(self.db_file)
+                except Exception as e:
+                    print(f"Erro em {funcao.__qualname__} após o commit: {e}")
+
+# Funções chamadas pelo escritor (na sua thread) depois de cada commit com alterações
+_apos_commit = []
+
+def ao_confirmar(funcao):
+    """Registra funcao(db_file), chamada depois de cada commit que alterou dados do banco."""
+    if funcao not in _apos_commit:
+        _apos_commit.append(funcao)
+
+# Um escritor por arquivo de banco (database.DB_FILE pode mudar, ex.: testes)
+_escritores_lock = threading.Lock()
+_escritores = {}
+
+def get_writer(db_file=None):
+    """Retorna o escritor único do banco (por padrão, o atual), criando-o na primeira chamada."""
+    db_file = os.path.abspath(db_file or database.DB_FILE)
+    with _escritores_lock:
+        escritor = _escritores.get(db_file)
+        if escritor is None:
+            escritor = _escritores[db_file] = DatabaseWriter(db_file)
+        return escritor
+
+def executar_escrita(operacao, *args, **kwargs):
+    """Executa operacao(conn, *args, **kwargs) no escritor único e retorna o resultado."""
+    return get_writer().executar(operacao, *args, **kwargs)
+
+def enviar_escrita(operacao, *args, **kwargs):
+    """Enfileira operacao(conn, *args, **kwargs) no escritor único e retorna o Future."""
+    return get_writer().submit(operacao, *args, **kwargs)
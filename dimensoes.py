@@ -0,0 +1,104 @@
+"""Tabelas de dimensão de orientadores e linhas de pesquisa, compartilhadas por streamlit_app.py e app.py.
+
+orientador e linha_pesquisa eram apenas texto repetido em cada aluno, e grafias
+diferentes do mesmo nome ("Márcia Silva", "MARCIA  SILVA") separavam os grupos.
+Cada valor distinto agora é uma linha de orientadores/linhas_pesquisa, identificada
+pela chave normalizada do nome (ver duplicados.normalizar_nome), e alunos
+guarda orientador_id e linha_pesquisa_id (indexados) para agrupar e filtrar por
+inteiro. As colunas de texto continuam sendo gravadas para exibição, busca e app.py.
+"""
+from collections import Counter
+
+import database
+from duplicados import normalizar_nome
+
+# Coluna de texto em alunos -> (tabela de dimensão, coluna de chave estrangeira)
+DIMENSOES = {
+    "orientador": ("orientadores", "orientador_id"),
+    "linha_pesquisa": ("linhas_pesquisa", "linha_pesquisa_id"),
+}
+
+def chave_dimensao(nome):
+    """Chave de comparação de um nome (sem acentos, maiúsculas, pontuação e partículas)."""
+    return " ".join(normalizar_nome(nome))
+
+def criar_tabelas_dimensoes(cursor):
+    """Cria as dimensões, as chaves estrangeiras indexadas em alunos e migra os textos existentes."""
+    for coluna, (tabela, coluna_id) in DIMENSOES.items():
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {tabela} (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            chave TEXT NOT NULL UNIQUE
+        )
+        """)
+        colunas = [info[1] for info in cursor.execute("PRAGMA table_info(alunos)").fetchall()]
+        if coluna_id not in colunas:
+            cursor.execute(f"ALTER TABLE alunos ADD COLUMN {coluna_id} INTEGER REFERENCES {tabela} (id)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_alunos_{coluna_id} ON alunos ({coluna_id})")
+        _migrar_dimensao(cursor, coluna, tabela, coluna_id)
+
+def _migrar_dimensao(cursor, coluna, tabela, coluna_id):
+    """Vincula os alunos ainda sem ID; grafias com a mesma chave viram uma só linha da dimensão.
+
+    O nome de uma dimensão nova é a grafia mais frequente entre os alunos.
+    """
+    pendentes = cursor.execute(f"""
+        SELECT {coluna}, COUNT(*) FROM alunos
+        WHERE {coluna_id} IS NULL AND TRIM(COALESCE({coluna}, '')) != ''
+        GROUP BY {coluna}
+    """).fetchall()
+    if not pendentes:
+        return
+    grafias = {} # chave -> Counter({grafia: alunos})
+    for nome, quantidade in pendentes:
+        chave = chave_dimensao(nome)
+        if chave:
+            grafias.setdefault(chave, Counter())[nome] += quantidade
+    for chave, contagem in grafias.items():
+        cursor.execute(f"INSERT INTO {tabela} (nome, chave) VALUES (?, ?) ON CONFLICT (chave) DO NOTHING",
+                       (contagem.most_common(1)[0][0], chave))
+    ids = dict(cursor.execute(f"SELECT chave, id FROM {tabela}").fetchall())
+    cursor.executemany(
+        f"UPDATE alunos SET {coluna_id} = ? WHERE {coluna_id} IS NULL AND {coluna} = ?",
+        [(ids[chave], nome) for chave, contagem in grafias.items() for nome in contagem],
+    )
+    print(f"{sum(len(c) for c in grafias.values())} grafia(s) de {coluna} vinculadas a {len(grafias)} registro(s) de {tabela}.")
+
+def _id_dimensao(conn, tabela, nome):
+    """Retorna o ID do nome na dimensão, inserindo-o se for novo (None para vazio)."""
+    chave = chave_dimensao(nome)
+    if not chave:
+        return None
+    conn.execute(f"INSERT INTO {tabela} (nome, chave) VALUES (?, ?) ON CONFLICT (chave) DO NOTHING",
+                 (str(nome).strip(), chave))
+    return conn.execute(f"SELECT id FROM {tabela} WHERE chave = ?", (chave,)).fetchone()[0]
+
+def vincular_dimensoes(conn, aluno_data):
+    """Retorna uma cópia de aluno_data com orientador_id/linha_pesquisa_id dos textos presentes.
+
+    Para uso dentro de uma operação de escrita. IDs já informados (ex.: resolvidos
+    pela importação com resolver_dimensoes) são mantidos.
+    """
+    aluno_data = dict(aluno_data)
+    for coluna, (tabela, coluna_id) in DIMENSOES.items():
+        if coluna in aluno_data and coluna_id not in aluno_data:
+            aluno_data[coluna_id] = _id_dimensao(conn, tabela, aluno_data[coluna])
+    return aluno_data
+
+def resolver_dimensoes(conn, nomes_por_coluna):
+    """Operação de escrita da importação: garante todos os nomes de uma vez.
+
+    nomes_por_coluna: {"orientador": [nomes], "linha_pesquisa": [nomes]}.
+    Retorna o mapa em memória {coluna: {chave: id}} usado para vincular as linhas.
+    """
+    mapas = {}
+    for coluna, nomes in nomes_por_coluna.items():
+        tabela = DIMENSOES[coluna][0]
+        mapas[coluna] = {chave_dimensao(nome): _id_dimensao(conn, tabela, nome) for nome in set(nomes)}
+    return mapas
+
+def opcoes_dimensao(coluna):
+    """Retorna {id: nome} da dimensão de coluna ("orientador" ou "linha_pesquisa"), por nome."""
+    df = database.query_frame(f"SELECT id, nome FROM {DIMENSOES[coluna][0]} ORDER BY nome")
+    return dict(zip(df["id"].tolist(), df["nome"].tolist()))
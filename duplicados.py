@@ -0,0 +1,103 @@
+"""Detecção de possíveis alunos duplicados por semelhança de nome (importação de planilhas).
+
+E-mail e matrícula só pegam duplicados exatos: o mesmo aluno com outro e-mail
+entraria de novo. Comparar cada nome da planilha com todos os cadastrados seria
+quadrático, então os nomes são normalizados (minúsculas, sem acentos e sem
+partículas como "de" e "da") e distribuídos em blocos por chaves baratas: cada
+par de palavras do nome e as três primeiras letras do primeiro e do último nome.
+Só nomes que dividem algum bloco são comparados, e o custo cresce quase
+linearmente com o número de nomes.
+"""
+import difflib
+import itertools
+import re
+import unicodedata
+from collections import defaultdict
+
+PARTICULAS = {"da", "das", "de", "do", "dos", "e"}
+LIMIAR_SIMILARIDADE = 0.75
+MAX_BLOCO = 200 # Chaves muito comuns (ex.: "maria silva") não discriminam e não geram candidatos
+
+def normalizar_nome(nome):
+    """Retorna as palavras do nome em minúsculas, sem acentos, pontuação e partículas."""
+    # Mesma ideia de normalize_column_name, mas para qualquer acento (decomposição Unicode)
+    texto = unicodedata.normalize("NFKD", str(nome or "")).encode("ascii", "ignore").decode().lower()
+    return [palavra for palavra in re.findall(r"[a-z0-9]+", texto) if palavra not in PARTICULAS]
+
+def chaves_bloco(palavras):
+    """Chaves de bloco de um nome normalizado."""
+    significativas = sorted({palavra for palavra in palavras if len(palavra) > 1})
+    chaves = {" ".join(par) for par in itertools.combinations(significativas, 2)}
+    if len(palavras) > 1:
+        # Pega nomes com grafias diferentes no meio (ex.: abreviações)
+        chaves.add(f"{palavras[0][:3]}|{palavras[-1][:3]}")
+    return chaves or set(significativas)
+
+def similaridade(a, b, limiar=0.0):
+    """Semelhança entre dois nomes normalizados, de 0 a 1 (média de palavras em comum e grafia).
+
+    Retorna 0 sem comparar a grafia quando nem com grafia idêntica o limiar seria atingido.
+    """
+    conjunto_a, conjunto_b = set(a), set(b)
+    jaccard = len(conjunto_a & conjunto_b) / len(conjunto_a | conjunto_b)
+    if (jaccard + 1) / 2 < limiar:
+        return 0.0
+    grafia = difflib.SequenceMatcher(None, " ".join(sorted(a)), " ".join(sorted(b))).ratio()
+    return (jaccard + grafia) / 2
+
+class IndiceNomes:
+    """Índice de blocos: chave de bloco -> referências dos nomes que a possuem."""
+
+    def __init__(self):
+        self._blocos = defaultdict(list)
+        self._nomes = {} # referência -> (nome original, palavras)
+
+    def adicionar(self, referencia, nome):
+        palavras = normalizar_nome(nome)
+        if not palavras:
+            return
+        self._nomes[referencia] = (nome, palavras)
+        for chave in chaves_bloco(palavras):
+            self._blocos[chave].append(referencia)
+
+    def semelhantes(self, nome, limiar=LIMIAR_SIMILARIDADE):
+        """Retorna [(referência, nome, similaridade)] acima do limiar, do mais ao menos semelhante."""
+        palavras = normalizar_nome(nome)
+        if not palavras:
+            return []
+        candidatos = set()
+        for chave in chaves_bloco(palavras):
+            bloco = self._blocos.get(chave, [])
+            if len(bloco) <= MAX_BLOCO:
+                candidatos.update(bloco)
+        resultado = []
+        for referencia in candidatos:
+            nome_candidato, palavras_candidato = self._nomes[referencia]
+            pontuacao = similaridade(palavras, palavras_candidato, limiar)
+            if pontuacao >= limiar:
+                resultado.append((referencia, nome_candidato, round(pontuacao, 3)))
+        return sorted(resultado, key=lambda item: -item[2])
+
+def possiveis_duplicados(novos, existentes, limiar=LIMIAR_SIMILARIDADE, arquivados=()):
+    """Compara os nomes novos com os cadastrados e entre si.
+
+    novos: [(linha da planilha, nome)]; existentes: [(id do aluno, nome)];
+    arquivados: IDs de existentes que estão no arquivo de alunos.
+    Retorna uma lista de dicts (linha, nome, origem, referencia, semelhante_a,
+    similaridade), da maior para a menor similaridade. origem é "Cadastro" ou
+    "Arquivo" (referencia = id do aluno) ou "Planilha" (referencia = linha anterior).
+    """
+    arquivados = set(arquivados)
+    indice = IndiceNomes()
+    for aluno_id, nome in existentes:
+        indice.adicionar(("Arquivo" if aluno_id in arquivados else "Cadastro", aluno_id), nome)
+
+    relatorio = []
+    for linha, nome in novos:
+        for (origem, referencia), semelhante, pontuacao in indice.semelhantes(nome, limiar):
+            relatorio.append({
+                "linha": linha, "nome": nome, "origem": origem, "referencia": referencia,
+                "semelhante_a": semelhante, "similaridade": pontuacao,
+            })
+        indice.adicionar(("Planilha", linha), nome) # Também pega repetições dentro da planilha
+    return sorted(relatorio, key=lambda item: (-item["similaridade"], item["linha"]))
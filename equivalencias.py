@@ -0,0 +1,182 @@
+"""Regras de equivalência de créditos e requisitos por nível, avaliadas no SQLite.
+
+Cada nível tem suas regras na tabela regras_creditos: horas por crédito,
+créditos exigidos no curso, limite de créditos que podem ser aproveitados de
+disciplinas externas e quantos idiomas diferentes precisam de proficiência. A
+tabela entra por JOIN numa única consulta, que calcula para todos os alunos
+os totais, o que falta e os indicadores de requisito cumprido; a pergunta
+"quem já atingiu o limite de aproveitamento" é um filtro dessa consulta, e não
+um laço por aluno em Python. O resultado do programa fica em cache por versão
+dos dados.
+"""
+import streamlit as st
+
+import database
+from db_writer import executar_escrita
+from workflow import STATUS_EM_ABERTO
+
+HORAS_POR_CREDITO_PADRAO = 15 # Nível sem regra configurada (valor usado antes das regras por nível)
+
+# Regras de exemplo que versões anteriores gravavam na criação da tabela, sem base no
+# regulamento do programa. A tabela agora nasce vazia: as regras são do administrador.
+REGRAS_CREDITOS_EXEMPLO = {("Mestrado", 15, 24, 12, 1), ("Doutorado", 15, 48, 24, 2)}
+
+# Horas de um aproveitamento (linha de aproveitamentos) pela regra do nível do aluno
+HORAS_APROVEITAMENTO_SQL = f"""
+    COALESCE(aproveitamentos.creditos, 0) * COALESCE((
+        SELECT r.horas_por_credito FROM alunos a JOIN regras_creditos r ON r.nivel = TRIM(a.nivel)
+        WHERE a.id = aproveitamentos.aluno_id
+    ), {HORAS_POR_CREDITO_PADRAO})
+"""
+
+# Indicadores de requisito cumprido (0/1 no SQLite, booleanos anuláveis no DataFrame)
+INDICADORES = ["limite_atingido", "creditos_ok", "idiomas_ok"]
+
+# Filtro -> (rótulo, condição sobre as colunas de situacao_creditos)
+FILTROS_SITUACAO = {
+    "todos": ("Todos", "1"),
+    "limite_atingido": ("Atingiram o limite de aproveitamento", "limite_atingido"),
+    "creditos_pendentes": ("Com créditos a cumprir", "NOT creditos_ok"),
+    "idiomas_pendentes": ("Com idiomas pendentes", "NOT idiomas_ok"),
+    "sem_regra": ("Nível sem regra", "creditos_exigidos IS NULL"),
+}
+
+def criar_tabela_regras_creditos(cursor):
+    """Cria a tabela de regras de créditos por nível (vazia: todo nível fica "sem regra" até ser configurado)."""
+    existia = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'regras_creditos'"
+    ).fetchone()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS regras_creditos (
+        nivel TEXT PRIMARY KEY,
+        horas_por_credito INTEGER NOT NULL DEFAULT 15 CHECK (horas_por_credito > 0),
+        creditos_exigidos INTEGER NOT NULL,
+        limite_aproveitamento INTEGER,
+        idiomas_exigidos INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    # Uma única vez por banco: regras iguais às de exemplo gravadas depois disso são do administrador
+    if database.migracao_pendente(cursor, "regras_creditos_sem_exemplo") and existia:
+        regras = set(cursor.execute("""
+            SELECT nivel, horas_por_credito, creditos_exigidos, limite_aproveitamento, idiomas_exigidos
+            FROM regras_creditos
+        """).fetchall())
+        if regras == REGRAS_CREDITOS_EXEMPLO: # Nunca editadas: remove os valores de exemplo
+            cursor.execute("DELETE FROM regras_creditos")
+
+def _situacao_sql():
+    """Consulta da situação de créditos (CTE situacao) e seus parâmetros."""
+    em_aberto = ", ".join("?" * len(STATUS_EM_ABERTO))
+    return f"""
+    WITH por_aluno AS (
+        SELECT aluno_id,
+               SUM(tipo = 'disciplina') AS disciplinas,
+               SUM(tipo = 'disciplina' AND status = 'deferido') AS disciplinas_deferidas,
+               SUM(tipo = 'idioma') AS idiomas,
+               SUM(tipo = 'idioma' AND status = 'deferido') AS idiomas_aprovados,
+               SUM(CASE WHEN tipo = 'disciplina' AND status = 'deferido' THEN COALESCE(creditos, 0) ELSE 0 END)
+                   AS creditos_deferidos,
+               SUM(CASE WHEN tipo = 'disciplina' AND status IN ({em_aberto}) THEN COALESCE(creditos, 0) ELSE 0 END)
+                   AS creditos_em_analise,
+               -- Proficiência no mesmo idioma aprovada duas vezes conta uma vez
+               COUNT(DISTINCT CASE WHEN tipo = 'idioma' AND status = 'deferido' THEN LOWER(TRIM(idioma)) END)
+                   AS idiomas_deferidos
+        FROM aproveitamentos
+        GROUP BY aluno_id
+    ),
+    totais AS (
+        SELECT a.id, a.nome, a.nivel,
+               COALESCE(p.disciplinas, 0) AS disciplinas,
+               COALESCE(p.disciplinas_deferidas, 0) AS disciplinas_deferidas,
+               COALESCE(p.idiomas, 0) AS idiomas,
+               COALESCE(p.idiomas_aprovados, 0) AS idiomas_aprovados,
+               COALESCE(p.creditos_deferidos, 0) AS creditos_deferidos,
+               COALESCE(p.creditos_em_analise, 0) AS creditos_em_analise,
+               COALESCE(p.idiomas_deferidos, 0) AS idiomas_deferidos,
+               COALESCE(r.horas_por_credito, {HORAS_POR_CREDITO_PADRAO}) AS horas_por_credito,
+               r.creditos_exigidos, r.limite_aproveitamento, r.idiomas_exigidos,
+               -- Sem limite configurado, todos os créditos deferidos valem
+               MIN(COALESCE(p.creditos_deferidos, 0),
+                   COALESCE(r.limite_aproveitamento, COALESCE(p.creditos_deferidos, 0))) AS creditos_aproveitados
+        FROM alunos a
+        LEFT JOIN por_aluno p ON p.aluno_id = a.id
+        LEFT JOIN regras_creditos r ON r.nivel = TRIM(a.nivel)
+    ),
+    situacao AS (
+        SELECT id, nome, nivel, creditos_deferidos, creditos_em_analise, creditos_aproveitados,
+               creditos_deferidos - creditos_aproveitados AS creditos_excedentes,
+               creditos_aproveitados * horas_por_credito AS horas_aproveitadas,
+               creditos_deferidos * horas_por_credito AS horas_deferidas,
+               creditos_exigidos, limite_aproveitamento, idiomas_deferidos, idiomas_exigidos,
+               -- MAX(NULL, 0) é NULL: nível sem regra não tem requisito a cumprir
+               MAX(creditos_exigidos - creditos_aproveitados, 0) AS creditos_restantes,
+               MAX(limite_aproveitamento - creditos_deferidos, 0) AS limite_disponivel,
+               MAX(idiomas_exigidos - idiomas_deferidos, 0) AS idiomas_restantes,
+               creditos_deferidos >= limite_aproveitamento AS limite_atingido,
+               creditos_aproveitados >= creditos_exigidos AS creditos_ok,
+               idiomas_deferidos >= idiomas_exigidos AS idiomas_ok,
+               horas_por_credito, disciplinas, disciplinas_deferidas, idiomas, idiomas_aprovados
+        FROM totais
+    )
+    """, list(STATUS_EM_ABERTO)
+
+def _situacao(filtro, nivel):
+    cte, params = _situacao_sql()
+    condicao = FILTROS_SITUACAO[filtro][1]
+    filtro_nivel = ""
+    if nivel:
+        filtro_nivel = "AND TRIM(nivel) = ?"
+        params.append(nivel)
+    df = database.query_frame(f"""
+        {cte}
+        SELECT * FROM situacao
+        WHERE {condicao} {filtro_nivel}
+        ORDER BY nome, id
+    """, params)
+    return df.astype({indicador: "boolean" for indicador in INDICADORES})
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _situacao_em_cache(filtro, nivel, db_file, versao):
+    return _situacao(filtro, nivel)
+
+def situacao_creditos(filtro="todos", nivel=None):
+    """Uma linha por aluno com os totais de créditos e idiomas, o que falta e os requisitos cumpridos.
+
+    filtro: chave de FILTROS_SITUACAO. Os indicadores (limite_atingido, creditos_ok,
+    idiomas_ok) e os restantes ficam nulos para alunos de nível sem regra.
+    """
+    return _situacao_em_cache(filtro, nivel, database.DB_FILE, database.get_data_version())
+
+def situacao_aluno(aluno_id):
+    """Linha de situacao_creditos de um aluno, como dict (None se o aluno não existir).
+
+    Lida do resultado do programa inteiro, que fica em cache: abrir o dashboard de
+    vários alunos não refaz a consulta enquanto os dados não mudam.
+    """
+    df = situacao_creditos()
+    linha = df[df["id"] == aluno_id]
+    return None if linha.empty else linha.iloc[0].to_dict()
+
+def carregar_regras_creditos():
+    """Regras de créditos configuradas, uma linha por nível."""
+    return database.query_frame("""
+        SELECT nivel, horas_por_credito, creditos_exigidos, limite_aproveitamento, idiomas_exigidos
+        FROM regras_creditos ORDER BY nivel
+    """)
+
+def _salvar_regras_creditos(conn, regras):
+    conn.execute("DELETE FROM regras_creditos")
+    conn.executemany("""
+        INSERT INTO regras_creditos (nivel, horas_por_credito, creditos_exigidos, limite_aproveitamento, idiomas_exigidos)
+        VALUES (?, ?, ?, ?, ?)
+    """, regras)
+
+def salvar_regras_creditos(regras):
+    """Substitui as regras de créditos ([(nivel, horas_por_credito, creditos_exigidos, limite, idiomas)]).
+
+    limite None significa sem limite de aproveitamento.
+    """
+    executar_escrita(_salvar_regras_creditos, [
+        (nivel, int(horas), int(exigidos), None if limite is None else int(limite), int(idiomas))
+        for nivel, horas, exigidos, limite, idiomas in regras
+    ])
@@ -0,0 +1,119 @@
+"""Criação do esquema do banco, compartilhada pelo init_db de streamlit_app.py e pelos testes.
+
+criar_esquema cria (ou completa, em bancos antigos) as tabelas alunos e
+aproveitamentos e chama os criar_* de cada módulo, na ordem em que dependem
+umas das outras. A tabela de usuários e os usuários padrão ficam no init_db.
+"""
+import sqlite3
+
+from arquivo import criar_tabelas_arquivo
+from busca import criar_indice_busca
+from dimensoes import criar_tabelas_dimensoes
+from equivalencias import criar_tabela_regras_creditos
+from manutencao import criar_tabela_log_manutencao, detalhes_indice_processo, registrar_manutencao
+from prazos import criar_indices_prazos, criar_tabelas_regras
+from workflow import criar_tabela_eventos, criar_tabela_sequencias
+
+def check_and_add_column(cursor, table_name, column_name, column_type):
+    """Verifica se uma coluna existe e a adiciona se não existir."""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = [info[1] for info in cursor.fetchall()]
+    if column_name not in columns:
+        try:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+            print(f"Coluna 	'{column_name}'	 adicionada à tabela 	'{table_name}'.")
+        except sqlite3.Error as e:
+            print(f"Erro ao adicionar coluna 	'{column_name}'	 à tabela 	'{table_name}': {e}")
+            # Não relançar o erro aqui, pode ser que a coluna já exista de alguma forma
+            # mas não foi detectada pelo PRAGMA (improvável, mas seguro)
+
+def criar_tabelas_principais(cursor):
+    """Cria as tabelas alunos e aproveitamentos e garante as colunas acrescentadas depois."""
+    # Tabela de alunos (estrutura base)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS alunos (
+        id INTEGER PRIMARY KEY,
+        matricula TEXT UNIQUE,
+        -- nivel TEXT, -- Será adicionado/verificado abaixo
+        nome TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE, -- Email deve ser único
+        orientador TEXT,
+        linha_pesquisa TEXT,
+        data_ingresso DATE, -- Data de Ingresso
+        turma TEXT, -- Turma (pode ser ano ou outra identificação)
+        prazo_defesa_projeto DATE,
+        prazo_defesa_tese DATE,
+        data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # GARANTIR que a coluna 'nivel' existe na tabela 'alunos'
+    check_and_add_column(cursor, "alunos", "nivel", "TEXT")
+
+    # Tabela de aproveitamentos
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS aproveitamentos (
+        id INTEGER PRIMARY KEY,
+        aluno_id INTEGER NOT NULL,
+        tipo TEXT NOT NULL, -- 'disciplina' ou 'idioma'
+        nome_disciplina TEXT,
+        codigo_disciplina TEXT,
+        creditos INTEGER,
+        idioma TEXT,
+        nota REAL,
+        instituicao TEXT,
+        observacoes TEXT,
+        link_documentos TEXT,
+        numero_processo TEXT,
+        status TEXT DEFAULT 'solicitado', -- Usar StatusAproveitamento
+        data_solicitacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        data_aprovacao_coordenacao TIMESTAMP,
+        data_aprovacao_colegiado TIMESTAMP,
+        data_deferimento TIMESTAMP,
+        FOREIGN KEY (aluno_id) REFERENCES alunos (id) ON DELETE CASCADE
+    )
+    """)
+
+    # Versão da linha para o controle de concorrência otimista
+    check_and_add_column(cursor, "alunos", "version", "INTEGER NOT NULL DEFAULT 0")
+    check_and_add_column(cursor, "aproveitamentos", "version", "INTEGER NOT NULL DEFAULT 0")
+
+    # Índice para a listagem de alunos ordenada por nome (paginação)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alunos_nome ON alunos (nome, id)")
+
+    # Índice para as consultas por aluno (dashboard e página de aproveitamentos)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_aproveitamentos_aluno ON aproveitamentos (aluno_id, data_solicitacao)")
+
+def criar_esquema(cursor):
+    """Cria as tabelas, índices, triggers e views do sistema (exceto usuários)."""
+    criar_tabelas_principais(cursor)
+
+    # Histórico de mudanças de status (tabela, índices e triggers)
+    criar_tabela_eventos(cursor)
+
+    # Contador anual dos números de processo e índice UNIQUE em numero_processo
+    duplicados_processo = criar_tabela_sequencias(cursor)
+
+    # Busca textual (FTS5) em alunos e aproveitamentos, sincronizada por triggers
+    criar_indice_busca(cursor)
+
+    # Orientadores e linhas de pesquisa como dimensões (IDs indexados em alunos)
+    criar_tabelas_dimensoes(cursor)
+
+    # Índices para as buscas por intervalo do monitor de prazos e da linha do tempo
+    criar_indices_prazos(cursor)
+
+    # Regras de cálculo dos prazos (por nível) e prorrogações
+    criar_tabelas_regras(cursor)
+
+    # Regras de equivalência de créditos e requisitos por nível
+    criar_tabela_regras_creditos(cursor)
+
+    # Tabelas de arquivo (alunos inativos) e views de histórico; depois das tabelas que acompanham
+    criar_tabelas_arquivo(cursor)
+
+    # Registro das tarefas de manutenção (ANALYZE, vacuum, checkpoint)
+    criar_tabela_log_manutencao(cursor)
+    if duplicados_processo: # Registrado uma vez: nas próximas execuções o índice sem UNIQUE já existe
+        registrar_manutencao(cursor, "indice_numero_processo", detalhes_indice_processo(duplicados_processo))
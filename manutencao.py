@@ -0,0 +1,394 @@
+"""Rotinas de manutenção do banco de dados.
+
+Integridade referencial: com "PRAGMA foreign_keys = ON" (ver database.conectar)
+o ON DELETE CASCADE passa a valer, mas bancos antigos podem conter
+aproveitamentos órfãos, cujo aluno já foi excluído. A varredura os remove uma
+vez ao iniciar o sistema e depois periodicamente.
+
+Otimização agendada: o banco nunca passava por ANALYZE, vacuum ou checkpoint.
+Uma thread verifica a cada minuto o que está pendente e executa, registrando
+cada tarefa (e sua duração) na tabela log_manutencao:
+- ANALYZE e PRAGMA optimize depois de muitas linhas gravadas (importações,
+  arquivamentos, correções em lote) ou se o banco nunca foi analisado;
+- PRAGMA incremental_vacuum quando a proporção de páginas livres passa do limite;
+- PRAGMA wal_checkpoint(TRUNCATE) quando ninguém grava há algum tempo.
+
+Linha de comando:
+    python manutencao.py verificar           # PRAGMA foreign_key_check
+    python manutencao.py orfaos              # lista aproveitamentos órfãos
+    python manutencao.py orfaos --remover    # lista e remove
+    python manutencao.py backup              # backup verificado (ver backups.py)
+    python manutencao.py backups             # lista os backups
+    python manutencao.py verificar-backup ARQUIVO
+    python manutencao.py restaurar ARQUIVO   # salva o banco atual e restaura o backup
+    python manutencao.py otimizar            # ANALYZE, vacuum e checkpoint agora
+    python manutencao.py log                 # últimas execuções da manutenção
+    python manutencao.py indice-processo     # índice UNIQUE em numero_processo, após corrigir duplicados
+"""
+import argparse
+import datetime
+import os
+import threading
+import time
+
+import backups
+import database
+from db_writer import get_writer
+from workflow import criar_indice_processo
+
+INTERVALO_VARREDURA_S = 6 * 60 * 60 # Varredura de órfãos a cada 6 horas
+INTERVALO_OTIMIZACAO_S = 60 # Frequência com que a otimização agendada verifica o que está pendente
+LINHAS_PARA_ANALYZE = 1000 # Linhas gravadas desde o último ANALYZE
+LIMITE_ANALISE = 1000 # PRAGMA analysis_limit: ANALYZE por amostragem, rápido mesmo em tabelas grandes
+SILENCIO_CHECKPOINT_S = 120 # Sem escritas há esse tempo: hora do checkpoint e do vacuum
+PROPORCAO_PAGINAS_LIVRES = 0.2 # freelist_count / page_count a partir da qual o vacuum roda
+MIN_PAGINAS_LIVRES = 256 # Abaixo disso não compensa (1 MB com páginas de 4 KB)
+TIMEOUT_OTIMIZACAO_S = 5
+RETENCAO_LOG_DIAS = 90
+
+ORFAOS_SQL = """
+    SELECT a.id, a.aluno_id, a.tipo, a.numero_processo, a.status
+    FROM aproveitamentos a
+    WHERE NOT EXISTS (SELECT 1 FROM alunos b WHERE b.id = a.aluno_id)
+    ORDER BY a.id
+"""
+
+# --- Integridade Referencial ---
+
+def verificar_chaves_estrangeiras():
+    """Executa PRAGMA foreign_key_check.
+
+    Returns:
+        pd.DataFrame: Uma linha por violação (table, rowid, parent, fkid); vazio se íntegro.
+    """
+    return database.query_frame("PRAGMA foreign_key_check")
+
+def listar_orfaos():
+    """Retorna os aproveitamentos cujo aluno não existe mais."""
+    return database.query_frame(ORFAOS_SQL)
+
+def _remover_orfaos(conn):
+    """Operação de escrita: remove os aproveitamentos órfãos e retorna os removidos."""
+    orfaos = [dict(linha) for linha in conn.execute(ORFAOS_SQL)]
+    if orfaos:
+        conn.execute("""
+        DELETE FROM aproveitamentos
+        WHERE NOT EXISTS (SELECT 1 FROM alunos b WHERE b.id = aproveitamentos.aluno_id)
+        """)
+    return orfaos
+
+def varrer_orfaos(db_file=None):
+    """Remove os aproveitamentos órfãos (pelo escritor único) e retorna a lista dos removidos."""
+    orfaos = get_writer(db_file).executar(_remover_orfaos)
+    if orfaos:
+        ids = [orfao["id"] for orfao in orfaos]
+        print(f"Varredura de órfãos: {len(orfaos)} aproveitamento(s) removido(s), IDs {ids}.")
+    return orfaos
+
+# Uma thread de varredura por arquivo de banco
+_varreduras_lock = threading.Lock()
+_varreduras = set()
+
+def _loop_varredura(db_file, intervalo):
+    while True:
+        try:
+            if os.path.exists(db_file):
+                varrer_orfaos(db_file)
+        except Exception as e:
+            print(f"Erro na varredura de aproveitamentos órfãos: {e}")
+        time.sleep(intervalo)
+
+def iniciar_varredura_periodica(intervalo=INTERVALO_VARREDURA_S):
+    """Inicia, uma única vez por banco, a varredura de órfãos (imediata e depois periódica)."""
+    db_file = os.path.abspath(database.DB_FILE)
+    with _varreduras_lock:
+        if db_file in _varreduras:
+            return
+        _varreduras.add(db_file)
+    threading.Thread(target=_loop_varredura, args=(db_file, intervalo),
+                     name=f"varredura-orfaos:{db_file}", daemon=True).start()
+
+# --- Otimização Agendada ---
+# ANALYZE grava nas tabelas sqlite_stat*, então passa pelo escritor único. VACUUM
+# e checkpoint não podem rodar dentro da transação do escritor e usam uma
+# conexão própria, sempre em momentos sem escrita.
+
+def criar_tabela_log_manutencao(cursor):
+    """Cria a tabela com o registro das tarefas de manutenção executadas."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS log_manutencao (
+        id INTEGER PRIMARY KEY,
+        tarefa TEXT NOT NULL,
+        inicio TIMESTAMP NOT NULL,
+        duracao_ms REAL NOT NULL,
+        detalhes TEXT
+    )
+    """)
+
+def registrar_manutencao(cursor, tarefa, detalhes, inicio=None, duracao_ms=0):
+    """Registra uma tarefa no log (na transação do cursor) e apaga os registros antigos."""
+    criar_tabela_log_manutencao(cursor) # A linha de comando pode rodar em um banco sem init_db
+    inicio = inicio or datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+    cursor.execute("INSERT INTO log_manutencao (tarefa, inicio, duracao_ms, detalhes) VALUES (?, ?, ?, ?)",
+                   (tarefa, inicio, duracao_ms, detalhes))
+    cursor.execute("DELETE FROM log_manutencao WHERE inicio < datetime('now', 'localtime', ?)",
+                   (f"-{RETENCAO_LOG_DIAS} days",))
+
+def _registrar(conn, tarefa, inicio, duracao_ms, detalhes):
+    """Operação de escrita: registra uma tarefa no log."""
+    registrar_manutencao(conn, tarefa, detalhes, inicio, duracao_ms)
+
+def _analisar(conn):
+    """Operação de escrita: ANALYZE por amostragem e PRAGMA optimize; retorna quantas tabelas têm estatísticas."""
+    conn.execute(f"PRAGMA analysis_limit = {LIMITE_ANALISE}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    return conn.execute("SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1").fetchone()[0]
+
+def analisar(db_file=None):
+    """Atualiza as estatísticas do planejador de consultas (pelo escritor único)."""
+    tabelas = get_writer(db_file).executar(_analisar)
+    return f"{tabelas} tabela(s) com estatísticas"
+
+def _paginas(conn):
+    """(páginas livres, total de páginas, modo de auto_vacuum) do banco."""
+    return tuple(conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                 for pragma in ("freelist_count", "page_count", "auto_vacuum"))
+
+def paginas_livres(db_file=None):
+    """(páginas livres, total de páginas, modo de auto_vacuum: 0 nenhum, 1 completo, 2 incremental)."""
+    conn = database.conectar(db_file)
+    try:
+        return _paginas(conn)
+    finally:
+        conn.close()
+
+def vacuum_incremental(db_file=None):
+    """Devolve ao sistema de arquivos as páginas livres do banco.
+
+    Bancos criados antes do auto_vacuum incremental (ver init_db) passam uma vez
+    por um VACUUM completo, que faz a conversão.
+    """
+    conn = database.conectar(db_file, isolation_level=None, timeout=TIMEOUT_OTIMIZACAO_S)
+    try:
+        livres, total, modo = _paginas(conn)
+        if modo == 0:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            acao = "VACUUM (auto_vacuum convertido para incremental)"
+        else:
+            # executescript executa o PRAGMA até o fim; execute liberaria uma página por passo
+            conn.executescript("PRAGMA incremental_vacuum;")
+            acao = "incremental_vacuum"
+        depois, total_depois, _ = _paginas(conn)
+    finally:
+        conn.close()
+    return f"{acao}: {livres} de {total} páginas livres, agora {depois} de {total_depois}"
+
+def checkpoint_wal(db_file=None):
+    """Copia o WAL para o banco e o trunca (PRAGMA wal_checkpoint(TRUNCATE))."""
+    conn = database.conectar(db_file, timeout=TIMEOUT_OTIMIZACAO_S)
+    try:
+        ocupado, paginas_wal, copiadas = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        conn.close()
+    if paginas_wal == -1:
+        return "banco fora do modo WAL"
+    if ocupado:
+        return f"incompleto (banco em uso): {copiadas} de {paginas_wal} página(s) copiada(s)"
+    return f"{copiadas} página(s) copiada(s), WAL truncado"
+
+# Tarefa -> função(db_file) que a executa e retorna os detalhes para o log, na ordem de execução
+# (o vacuum grava no WAL, então o checkpoint vem por último)
+TAREFAS_OTIMIZACAO = {
+    "analyze": analisar,
+    "incremental_vacuum": vacuum_incremental,
+    "wal_checkpoint": checkpoint_wal,
+}
+
+def executar_otimizacao(db_file=None, tarefas=None):
+    """Executa as tarefas (por padrão, todas) e registra cada uma em log_manutencao.
+
+    O erro de uma tarefa é registrado e não impede as seguintes.
+
+    Returns:
+        list[dict]: {"tarefa", "inicio", "duracao_ms", "detalhes"} de cada tarefa executada.
+    """
+    db_file = os.path.abspath(db_file or database.DB_FILE)
+    execucoes = []
+    for tarefa, funcao in TAREFAS_OTIMIZACAO.items():
+        if tarefas is not None and tarefa not in tarefas:
+            continue
+        inicio = datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+        cronometro = time.perf_counter()
+        try:
+            detalhes = funcao(db_file)
+        except Exception as e:
+            detalhes = f"erro: {e}"
+        execucao = {"tarefa": tarefa, "inicio": inicio,
+                    "duracao_ms": round((time.perf_counter() - cronometro) * 1000, 1), "detalhes": detalhes}
+        get_writer(db_file).executar(_registrar, *execucao.values())
+        print(f"Manutenção: {tarefa} em {execucao['duracao_ms']:.0f} ms ({detalhes}).")
+        execucoes.append(execucao)
+    return execucoes
+
+def _tem_estatisticas(db_file):
+    conn = database.conectar(db_file)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is not None
+    finally:
+        conn.close()
+
+def otimizacoes_pendentes(db_file, estado):
+    """Tarefas de TAREFAS_OTIMIZACAO que devem rodar agora.
+
+    estado: {"linhas": linhas_alteradas do escritor no último ANALYZE,
+             "escrita": ultima_escrita do escritor no último checkpoint}.
+    """
+    escritor = get_writer(db_file)
+    pendentes = []
+    if escritor.linhas_alteradas - estado["linhas"] >= LINHAS_PARA_ANALYZE or not _tem_estatisticas(db_file):
+        pendentes.append("analyze")
+    if escritor.ultima_escrita is not None and time.monotonic() - escritor.ultima_escrita < SILENCIO_CHECKPOINT_S:
+        return pendentes
+    livres, total, _ = paginas_livres(db_file)
+    if livres >= MIN_PAGINAS_LIVRES and livres / total >= PROPORCAO_PAGINAS_LIVRES:
+        pendentes.append("incremental_vacuum")
+    if escritor.ultima_escrita != estado["escrita"] or "incremental_vacuum" in pendentes:
+        pendentes.append("wal_checkpoint")
+    return pendentes
+
+def ultimas_execucoes(limite=50):
+    """Registros mais recentes de log_manutencao."""
+    return database.query_frame("""
+        SELECT inicio, tarefa, duracao_ms, detalhes FROM log_manutencao
+        ORDER BY id DESC LIMIT ?
+    """, (limite,))
+
+# Uma thread de otimização por arquivo de banco
+_otimizacoes_lock = threading.Lock()
+_otimizacoes = set()
+
+def _loop_otimizacao(db_file, intervalo):
+    escritor = get_writer(db_file)
+    estado = {"linhas": 0, "escrita": None}
+    while True:
+        try:
+            if os.path.exists(db_file):
+                pendentes = otimizacoes_pendentes(db_file, estado)
+                executar_otimizacao(db_file, pendentes)
+                # As gravações da própria manutenção (estatísticas, log) não contam como escrita nova
+                if "analyze" in pendentes:
+                    estado["linhas"] = escritor.linhas_alteradas
+                if "wal_checkpoint" in pendentes:
+                    estado["escrita"] = escritor.ultima_escrita
+        except Exception as e:
+            print(f"Erro na otimização agendada do banco: {e}")
+        time.sleep(intervalo)
+
+def iniciar_otimizacao_periodica(intervalo=INTERVALO_OTIMIZACAO_S):
+    """Inicia, uma única vez por banco, a otimização agendada (ANALYZE, vacuum e checkpoint)."""
+    db_file = os.path.abspath(database.DB_FILE)
+    with _otimizacoes_lock:
+        if db_file in _otimizacoes:
+            return
+        _otimizacoes.add(db_file)
+    threading.Thread(target=_loop_otimizacao, args=(db_file, intervalo),
+                     name=f"otimizacao:{db_file}", daemon=True).start()
+
+# --- Índice de Números de Processo ---
+
+def _criar_indice_processo(conn):
+    """Operação de escrita: tenta de novo o índice UNIQUE e registra o resultado no log."""
+    inicio = time.perf_counter()
+    duplicados = criar_indice_processo(conn)
+    registrar_manutencao(conn, "indice_numero_processo", detalhes_indice_processo(duplicados),
+                         duracao_ms=round((time.perf_counter() - inicio) * 1000, 1))
+    return duplicados
+
+def detalhes_indice_processo(duplicados):
+    """Texto do log para o resultado da criação do índice de numero_processo."""
+    if not duplicados:
+        return "índice UNIQUE criado"
+    return (f"índice UNIQUE não criado, {len(duplicados)} número(s) duplicado(s): {', '.join(duplicados[:20])}. "
+            "Corrija-os e execute python manutencao.py indice-processo")
+
+def recriar_indice_processo(db_file=None):
+    """Tenta criar o índice UNIQUE em numero_processo (pelo escritor único). Retorna os duplicados."""
+    return get_writer(db_file).executar(_criar_indice_processo)
+
+# --- Linha de Comando ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco de dados do PPGOP.")
+    parser.add_argument("--db", help="Arquivo do banco (padrão: PPGOP_DB_FILE ou ppgop.db)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("verificar", help="Verifica as chaves estrangeiras (PRAGMA foreign_key_check)")
+    orfaos = comandos.add_parser("orfaos", help="Lista (e opcionalmente remove) aproveitamentos órfãos")
+    orfaos.add_argument("--remover", action="store_true", help="Remove os órfãos encontrados")
+    backup = comandos.add_parser("backup", help="Faz um backup verificado do banco")
+    backup.add_argument("--motivo", default="manual", help="Motivo no nome do arquivo (define a rotação)")
+    comandos.add_parser("backups", help="Lista os backups do banco")
+    verificar_backup = comandos.add_parser("verificar-backup", help="Executa PRAGMA integrity_check em um backup")
+    verificar_backup.add_argument("arquivo")
+    restaurar = comandos.add_parser("restaurar", help="Restaura o banco a partir de um backup")
+    restaurar.add_argument("arquivo")
+    comandos.add_parser("otimizar", help="Executa agora ANALYZE, vacuum incremental e checkpoint do WAL")
+    log = comandos.add_parser("log", help="Mostra as últimas execuções da manutenção")
+    log.add_argument("--limite", type=int, default=50)
+    comandos.add_parser("indice-processo", help="Cria o índice UNIQUE em numero_processo (após corrigir duplicados)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.DB_FILE = args.db
+
+    if args.comando == "backup":
+        print(backups.criar_backup(args.motivo))
+        return 0
+    if args.comando == "backups":
+        for backup in backups.listar_backups():
+            print(f"{backup['data']:%d/%m/%Y %H:%M:%S}  {backup['motivo']:<16} "
+                  f"{backup['tamanho'] / 2**20:8.1f} MB  {backup['caminho']}")
+        return 0
+    if args.comando == "verificar-backup":
+        problemas = backups.verificar_backup(args.arquivo)
+        print("\n".join(problemas) if problemas else "Backup íntegro (integrity_check: ok).")
+        return 1 if problemas else 0
+    if args.comando == "restaurar":
+        anterior = backups.restaurar_backup(args.arquivo)
+        if anterior:
+            print(f"O banco anterior foi salvo em {anterior}.")
+        return 0
+
+    if args.comando == "otimizar":
+        executar_otimizacao()
+        return 0
+    if args.comando == "indice-processo":
+        duplicados = recriar_indice_processo()
+        print(detalhes_indice_processo(duplicados))
+        return 1 if duplicados else 0
+    if args.comando == "log":
+        print(ultimas_execucoes(args.limite).to_string(index=False))
+        return 0
+
+    if args.comando == "verificar":
+        violacoes = verificar_chaves_estrangeiras()
+        if violacoes.empty:
+            print("Nenhuma violação de chave estrangeira encontrada.")
+        else:
+            print(f"{len(violacoes)} violação(ões) de chave estrangeira:")
+            print(violacoes.to_string(index=False))
+        return 1 if not violacoes.empty else 0
+
+    orfaos = listar_orfaos()
+    if orfaos.empty:
+        print("Nenhum aproveitamento órfão encontrado.")
+        return 0
+    print(f"{len(orfaos)} aproveitamento(s) órfão(s):")
+    print(orfaos.to_string(index=False))
+    if args.remover:
+        varrer_orfaos()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
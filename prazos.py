@@ -0,0 +1,306 @@
+"""Monitor dos prazos de defesa (projeto e tese) e linha do tempo das datas dos alunos.
+
+As datas ficam em texto ISO (AAAA-MM-DD), então a ordem do texto é a ordem
+cronológica e os índices em prazo_defesa_projeto, prazo_defesa_tese e
+data_ingresso atendem às consultas por intervalo ("vence nos próximos N dias",
+"vencido", "alunos deste mês") sem ler nem converter as datas de todos os
+alunos. A linha do tempo agrupa as datas por mês ou semestre no próprio SQLite
+(strftime), e só as contagens chegam ao gráfico. Os resultados ficam em cache
+por versão dos dados (o monitor, também por dia).
+
+Os prazos também podem ser calculados por regras configuráveis (meses e dias a
+partir de data_ingresso, por nível, mais as prorrogações de cada aluno), de
+forma vetorizada para a tabela inteira.
+"""
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+import database
+from arquivo import VIEWS_HISTORICO
+from db_writer import executar_escrita
+
+# Coluna de prazo -> rótulo
+PRAZOS = {
+    "prazo_defesa_projeto": "Projeto",
+    "prazo_defesa_tese": "Tese",
+}
+
+# Coluna de data -> rótulo, na linha do tempo
+DATAS_LINHA_DO_TEMPO = {
+    "prazo_defesa_projeto": "Defesa do projeto",
+    "prazo_defesa_tese": "Defesa da tese",
+    "data_ingresso": "Ingresso",
+}
+
+def criar_indices_prazos(cursor):
+    """Cria os índices das colunas de prazo e de ingresso (chamado pelo init_db)."""
+    for coluna in DATAS_LINHA_DO_TEMPO:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_alunos_{coluna} ON alunos ({coluna})")
+
+def _prazos(dias, incluir_vencidos, nivel, orientador_id, hoje):
+    hoje = datetime.date.fromisoformat(hoje)
+    params = {
+        "hoje": hoje.isoformat(),
+        "fim": (hoje + datetime.timedelta(days=dias)).isoformat(),
+        # Antes de qualquer data e depois de textos vazios (e não numérico: as colunas DATE
+        # têm afinidade NUMERIC e converteriam "0" em número, que fica antes de todo texto)
+        "inicio": "0000-00-00" if incluir_vencidos else hoje.isoformat(),
+        "nivel": nivel,
+        "orientador_id": orientador_id,
+    }
+    filtros = ""
+    if nivel:
+        filtros += " AND a.nivel = :nivel"
+    if orientador_id is not None:
+        filtros += " AND a.orientador_id = :orientador_id"
+    # Uma busca por intervalo em cada índice de prazo, unidas
+    consultas = [f"""
+        SELECT a.id, a.nome, a.nivel, a.orientador, '{rotulo}' AS prazo, a.{coluna} AS data,
+               CAST(julianday(a.{coluna}) - julianday(:hoje) AS INTEGER) AS dias_restantes
+        FROM alunos a
+        WHERE a.{coluna} >= :inicio AND a.{coluna} < date(:fim, '+1 day'){filtros}
+    """ for coluna, rotulo in PRAZOS.items()]
+    df = database.query_frame(" UNION ALL ".join(consultas) + " ORDER BY data, nome", params)
+    df["data"] = df["data"].astype("string").str.slice(0, 10)
+    return df
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _prazos_em_cache(dias, incluir_vencidos, nivel, orientador_id, hoje, db_file, versao):
+    return _prazos(dias, incluir_vencidos, nivel, orientador_id, hoje)
+
+def prazos_proximos(dias, incluir_vencidos=True, nivel=None, orientador_id=None, hoje=None):
+    """Prazos de projeto e tese que vencem até hoje + dias (e, opcionalmente, os já vencidos).
+
+    Uma linha por prazo (um aluno pode aparecer duas vezes), em ordem de data, com
+    dias_restantes negativo para os vencidos. Filtra por nível e por orientador (ID da dimensão).
+    """
+    hoje = (hoje or datetime.date.today()).isoformat()
+    return _prazos_em_cache(dias, incluir_vencidos, nivel, orientador_id, hoje,
+                            database.DB_FILE, database.get_data_version())
+
+
+# --- Linha do Tempo ---
+
+# Granularidade -> (rótulo, expressão SQL do período a partir de uma coluna de data)
+GRANULARIDADES = {
+    "mes": ("Mês", "strftime('%Y-%m', {coluna})"),
+    "semestre": ("Semestre", "strftime('%Y', {coluna}) || '/' || ((CAST(strftime('%m', {coluna}) AS INTEGER) + 5) / 6)"),
+}
+
+# Divisão das barras -> (rótulo, expressão do grupo, JOIN necessário)
+DIVISOES = {
+    None: ("Nenhuma", "'Todos'", ""),
+    "nivel": ("Nível", "COALESCE(NULLIF(TRIM(a.nivel), ''), 'Não informado')", ""),
+    "linha_pesquisa": ("Linha de Pesquisa", "COALESCE(l.nome, 'Não informado')",
+                       "LEFT JOIN linhas_pesquisa l ON l.id = a.linha_pesquisa_id"),
+}
+
+def _tabela_alunos(incluir_arquivados):
+    """Alunos ativos ou, para relatórios históricos, a view com ativos e arquivados."""
+    return VIEWS_HISTORICO["alunos"] if incluir_arquivados else "alunos"
+
+def _linha_do_tempo(coluna, granularidade, divisao, incluir_arquivados):
+    periodo = GRANULARIDADES[granularidade][1].format(coluna=f"a.{coluna}")
+    _, grupo, juncao = DIVISOES[divisao]
+    return database.query_frame(f"""
+        SELECT {periodo} AS periodo, {grupo} AS grupo, COUNT(*) AS quantidade
+        FROM {_tabela_alunos(incluir_arquivados)} a
+        {juncao}
+        WHERE {periodo} IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _linha_do_tempo_em_cache(coluna, granularidade, divisao, incluir_arquivados, db_file, versao):
+    return _linha_do_tempo(coluna, granularidade, divisao, incluir_arquivados)
+
+def linha_do_tempo(coluna, granularidade="mes", divisao=None, incluir_arquivados=False):
+    """Quantidade de alunos por período ("2025-03" ou "2025/1") da data em coluna e por grupo da divisão.
+
+    Com incluir_arquivados, conta também os alunos arquivados (ver arquivo.py).
+    """
+    return _linha_do_tempo_em_cache(coluna, granularidade, divisao, incluir_arquivados,
+                                    database.DB_FILE, database.get_data_version())
+
+def intervalo_periodo(periodo):
+    """Converte um período da linha do tempo no intervalo de datas [início, fim)."""
+    if "/" in periodo: # Semestre: "2025/1" ou "2025/2"
+        ano, semestre = (int(parte) for parte in periodo.split("/"))
+        inicio = datetime.date(ano, 1 if semestre == 1 else 7, 1)
+        fim = datetime.date(ano, 7, 1) if semestre == 1 else datetime.date(ano + 1, 1, 1)
+    else: # Mês: "2025-03"
+        ano, mes = (int(parte) for parte in periodo.split("-"))
+        inicio = datetime.date(ano, mes, 1)
+        fim = datetime.date(ano + mes // 12, mes % 12 + 1, 1)
+    return inicio.isoformat(), fim.isoformat()
+
+def alunos_no_periodo(coluna, periodo, divisao=None, grupo=None, incluir_arquivados=False):
+    """Alunos de uma barra da linha do tempo (busca por intervalo no índice da coluna de data)."""
+    inicio, fim = intervalo_periodo(periodo)
+    _, expressao_grupo, juncao = DIVISOES[divisao]
+    filtro_grupo = f"AND {expressao_grupo} = :grupo" if divisao is not None and grupo is not None else ""
+    return database.query_frame(f"""
+        SELECT a.id, a.nome, a.nivel, a.orientador, a.linha_pesquisa, a.{coluna} AS data
+               {", a.arquivado" if incluir_arquivados else ""}
+        FROM {_tabela_alunos(incluir_arquivados)} a
+        {juncao}
+        WHERE a.{coluna} >= :inicio AND a.{coluna} < :fim {filtro_grupo}
+        ORDER BY a.{coluna}, a.nome
+    """, {"inicio": inicio, "fim": fim, "grupo": grupo})
+
+
+# --- Regras de Prazos ---
+# prazo = data_ingresso + meses + dias da regra do nível + prorrogações do aluno.
+# Ex.: ingresso em 2024-10-24, projeto em 24 meses menos 1 dia -> 2026-10-23.
+
+REGRAS_PADRAO = [ # (nível, prazo, meses, dias), conforme os dados do programa
+    ("Mestrado", "prazo_defesa_projeto", 24, -1),
+    ("Mestrado", "prazo_defesa_tese", 48, -1),
+    ("Doutorado", "prazo_defesa_projeto", 24, -1),
+    ("Doutorado", "prazo_defesa_tese", 48, -1),
+]
+
+def criar_tabelas_regras(cursor):
+    """Cria as tabelas de regras de prazo e de prorrogações.
+
+    As regras padrão são gravadas só na criação da tabela: uma regra excluída no
+    editor não volta no próximo init_db.
+    """
+    existia = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'regras_prazos'"
+    ).fetchone()
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS regras_prazos (
+        nivel TEXT NOT NULL,
+        prazo TEXT NOT NULL CHECK (prazo IN ({", ".join(f"'{coluna}'" for coluna in PRAZOS)})),
+        meses INTEGER NOT NULL,
+        dias INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (nivel, prazo)
+    )
+    """)
+    if not existia:
+        cursor.executemany("INSERT INTO regras_prazos (nivel, prazo, meses, dias) VALUES (?, ?, ?, ?)", REGRAS_PADRAO)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS prorrogacoes_prazo (
+        id INTEGER PRIMARY KEY,
+        aluno_id INTEGER NOT NULL REFERENCES alunos (id) ON DELETE CASCADE,
+        prazo TEXT NOT NULL CHECK (prazo IN ({", ".join(f"'{coluna}'" for coluna in PRAZOS)})),
+        meses INTEGER NOT NULL DEFAULT 0,
+        dias INTEGER NOT NULL DEFAULT 0,
+        motivo TEXT,
+        data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_prorrogacoes_aluno ON prorrogacoes_prazo (aluno_id)")
+
+def somar_meses(datas, meses):
+    """Soma meses (Series de inteiros) a datas (Series datetime64), vetorizado.
+
+    Como em DateOffset, o dia é limitado ao último dia do mês de destino (31/01 + 1 mês = 28/02).
+    """
+    indice_mes = datas.dt.year * 12 + (datas.dt.month - 1) + meses
+    ano, mes = indice_mes // 12, indice_mes % 12 + 1
+    inicio_mes = pd.to_datetime(pd.DataFrame({"year": ano, "month": mes, "day": 1}), errors="coerce")
+    ultimo_dia = (inicio_mes + pd.offsets.MonthEnd(0)).dt.day
+    return inicio_mes + pd.to_timedelta(datas.dt.day.where(datas.dt.day < ultimo_dia, ultimo_dia) - 1, unit="D")
+
+def calcular_prazos(alunos, regras, prorrogacoes=None):
+    """Calcula os prazos de todos os alunos de uma vez.
+
+    alunos: DataFrame com id, nivel e data_ingresso; regras: nivel, prazo, meses, dias;
+    prorrogacoes (opcional): aluno_id, prazo, meses, dias (somadas por aluno e prazo).
+    Retorna um DataFrame (id, prazo, calculado "AAAA-MM-DD"); alunos sem ingresso
+    válido ou sem regra para o nível ficam de fora.
+    """
+    base = alunos[["id", "nivel", "data_ingresso"]].assign(
+        data_ingresso=pd.to_datetime(alunos["data_ingresso"], errors="coerce")
+    ).dropna(subset=["data_ingresso"])
+    df = base.merge(regras[["nivel", "prazo", "meses", "dias"]], on="nivel")
+    if prorrogacoes is not None and not prorrogacoes.empty:
+        extras = prorrogacoes.groupby(["aluno_id", "prazo"], as_index=False)[["meses", "dias"]].sum()
+        df = df.merge(extras.rename(columns={"aluno_id": "id"}), on=["id", "prazo"], how="left", suffixes=("", "_extra"))
+        df["meses"] += df["meses_extra"].fillna(0).astype("int64")
+        df["dias"] += df["dias_extra"].fillna(0).astype("int64")
+    calculado = somar_meses(df["data_ingresso"], df["meses"].astype("int64")) + pd.to_timedelta(df["dias"], unit="D")
+    return pd.DataFrame({
+        "id": df["id"].to_numpy(), "prazo": df["prazo"].to_numpy(), "calculado": calculado.dt.strftime("%Y-%m-%d").to_numpy()
+    })
+
+def carregar_regras():
+    """Regras de prazo configuradas (nivel, prazo, meses, dias)."""
+    return database.query_frame("SELECT nivel, prazo, meses, dias FROM regras_prazos ORDER BY nivel, prazo")
+
+def validar_prazos():
+    """Compara os prazos gravados com os calculados pelas regras.
+
+    Retorna as divergências (id, nome, nivel, prazo, atual, calculado, situacao), com
+    situacao "Ausente" (sem prazo gravado) ou "Divergente".
+    """
+    alunos = database.query_frame(f"""
+        SELECT id, nome, nivel, data_ingresso, {", ".join(PRAZOS)} FROM alunos
+    """)
+    prorrogacoes = database.query_frame("SELECT aluno_id, prazo, meses, dias FROM prorrogacoes_prazo")
+    calculados = calcular_prazos(alunos, carregar_regras(), prorrogacoes)
+
+    atuais = alunos.melt(id_vars=["id", "nome", "nivel"], value_vars=list(PRAZOS), var_name="prazo", value_name="atual")
+    df = calculados.merge(atuais, on=["id", "prazo"])
+    df["atual"] = df["atual"].astype("string").str.slice(0, 10).replace("", pd.NA)
+    df = df[df["atual"].isna() | (df["atual"] != df["calculado"])].copy()
+    df["situacao"] = df["atual"].isna().map({True: "Ausente", False: "Divergente"})
+    return df[["id", "nome", "nivel", "prazo", "atual", "calculado", "situacao"]].sort_values(["nome", "prazo"])
+
+def _corrigir_prazos(conn, correcoes):
+    """Operação de escrita: grava os prazos calculados numa única transação.
+
+    Cada correção só é aplicada se o prazo ainda for o que foi validado
+    (quem editou o aluno nesse meio tempo prevalece). Retorna quantas foram gravadas.
+    """
+    gravadas = 0
+    for aluno_id, prazo, atual, calculado in correcoes:
+        gravadas += conn.execute(f"""
+            UPDATE alunos SET {prazo} = ?, version = version + 1, data_atualizacao = CURRENT_TIMESTAMP
+            WHERE id = ? AND COALESCE(substr({prazo}, 1, 10), '') = COALESCE(?, '')
+        """, (calculado, aluno_id, atual)).rowcount
+    return gravadas
+
+def corrigir_prazos(divergencias):
+    """Grava os prazos calculados das divergências retornadas por validar_prazos."""
+    correcoes = [
+        (int(linha.id), linha.prazo, None if pd.isna(linha.atual) else linha.atual, linha.calculado)
+        for linha in divergencias.itertuples()
+        if linha.prazo in PRAZOS
+    ]
+    return executar_escrita(_corrigir_prazos, correcoes)
+
+def _salvar_regras(conn, regras):
+    conn.execute("DELETE FROM regras_prazos")
+    conn.executemany("INSERT INTO regras_prazos (nivel, prazo, meses, dias) VALUES (?, ?, ?, ?)", regras)
+
+def salvar_regras(regras):
+    """Substitui as regras de prazo por regras ([(nivel, prazo, meses, dias)])."""
+    executar_escrita(_salvar_regras, [(nivel, prazo, int(meses), int(dias)) for nivel, prazo, meses, dias in regras])
+
+def _registrar_prorrogacao(conn, aluno_id, prazo, meses, dias, motivo):
+    conn.execute("INSERT INTO prorrogacoes_prazo (aluno_id, prazo, meses, dias, motivo) VALUES (?, ?, ?, ?, ?)",
+                 (aluno_id, prazo, meses, dias, motivo))
+
+def registrar_prorrogacao(aluno_id, prazo, meses=0, dias=0, motivo=None):
+    """Registra uma prorrogação; o novo prazo é aplicado por validar_prazos/corrigir_prazos."""
+    executar_escrita(_registrar_prorrogacao, aluno_id, prazo, int(meses), int(dias), motivo)
+
+def preencher_prazos_ausentes(alunos_data):
+    """Completa, pelas regras, os prazos vazios de uma lista de dicts de alunos (ex.: importação)."""
+    if not alunos_data:
+        return
+    alunos = pd.DataFrame({
+        "id": range(len(alunos_data)),
+        "nivel": [dados.get("nivel") for dados in alunos_data],
+        "data_ingresso": [dados.get("data_ingresso") for dados in alunos_data],
+    })
+    for linha in calcular_prazos(alunos, carregar_regras()).itertuples():
+        dados = alunos_data[linha.id]
+        if not dados.get(linha.prazo):
+            dados[linha.prazo] = linha.calculado
@@ -0,0 +1,62 @@
+"""Camada de apresentação da listagem de aproveitamentos, compartilhada por streamlit_app.py e app.py.
+
+Todas as transformações são vetorizadas (Series.map, np.where, categorias). A
+tabela formatada é mantida no snapshot compartilhado (ver snapshots.py).
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Tabelas de rótulos (nível de módulo, montadas uma única vez)
+TIPO_ROTULOS = {
+    "disciplina": "Disciplina",
+    "idioma": "Idioma",
+}
+
+STATUS_ROTULOS = {
+    "solicitado": "Solicitado",
+    "aprovado_coordenacao": "Aprovado (Coord.)",
+    "aprovado_colegiado": "Aprovado (Coleg.)",
+    "deferido": "Deferido",
+    "indeferido": "Indeferido",
+}
+
+TIPO_DTYPE = pd.CategoricalDtype(list(TIPO_ROTULOS.values()))
+STATUS_DTYPE = pd.CategoricalDtype(list(STATUS_ROTULOS.values()), ordered=True) # Ordem do fluxo de aprovação
+
+COLUNAS_DATA = ["data_solicitacao", "data_aprovacao_coordenacao", "data_aprovacao_colegiado", "data_deferimento"]
+
+# As datas seguem como datetime64 e são formatadas pelo próprio st.dataframe
+COLUMN_CONFIG_DATAS = {
+    coluna: st.column_config.DatetimeColumn(format="DD/MM/YYYY") for coluna in COLUNAS_DATA
+}
+
+def _categoria(serie, rotulos, dtype):
+    """Converte códigos em rótulos categóricos; códigos desconhecidos viram categorias próprias."""
+    rotulada = serie.map(rotulos).fillna(serie)
+    desconhecidos = rotulada[~rotulada.isin(dtype.categories)].dropna().unique().tolist()
+    if desconhecidos:
+        dtype = pd.CategoricalDtype(list(dtype.categories) + desconhecidos, ordered=dtype.ordered)
+    return rotulada.astype(dtype)
+
+def formatar_aproveitamentos(df):
+    """Acrescenta as colunas de exibição a um DataFrame de aproveitamentos.
+
+    Colunas criadas: tipo_formatado e status_formatado (categóricas),
+    disciplina_idioma e, se houver aluno_nome, rotulo ("Aluno - Disciplina/Idioma").
+    As colunas de data são convertidas para datetime64.
+    """
+    df = df.copy()
+    df["tipo_formatado"] = _categoria(df["tipo"], TIPO_ROTULOS, TIPO_DTYPE)
+    df["status_formatado"] = _categoria(df["status"], STATUS_ROTULOS, STATUS_DTYPE)
+    df["disciplina_idioma"] = np.where(
+        df["tipo"] == "disciplina",
+        df["nome_disciplina"],
+        df["idioma"].astype("string").fillna("") + " (Nota: " + df["nota"].astype("string").fillna("") + ")"
+    )
+    if "aluno_nome" in df.columns:
+        df["rotulo"] = df["aluno_nome"].astype("string") + " - " + df["disciplina_idioma"].astype("string")
+    for coluna in COLUNAS_DATA:
+        if coluna in df.columns:
+            df[coluna] = pd.to_datetime(df[coluna], format="ISO8601", errors="coerce")
+    return df
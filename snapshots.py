@@ -0,0 +1,110 @@
+"""Snapshots somente leitura dos dados, compartilhados por todas as sessões do Streamlit.
+
+Cada snapshot reúne os DataFrames de alunos e aproveitamentos e os mapas de
+consulta usados pelos selectboxes. Ele é montado uma vez por versão dos dados
+do banco (PRAGMA data_version) e publicado trocando uma única referência, de
+modo que a memória não cresce com o número de sessões abertas.
+
+Depois de cada commit, o escritor único apenas descarta o snapshot atual (ver
+db_writer.ao_confirmar): montá-lo na thread do escritor atrasaria as escritas
+seguintes pelo tempo de uma leitura completa das tabelas. O snapshot novo é
+montado pela próxima leitura, em obter(), que também percebe alterações feitas
+por outro caminho (outro processo, init_db) pela versão dos dados.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import pandas as pd
+import streamlit as st
+
+import database
+from db_writer import ao_confirmar
+from presentation import formatar_aproveitamentos
+
+# Apenas colunas presentes nos esquemas de streamlit_app.py e de app.py
+COLUNAS_ALUNOS = """
+    id, matricula, nome, email, orientador, linha_pesquisa,
+    data_ingresso, prazo_defesa_projeto, prazo_defesa_tese
+"""
+
+COLUNAS_APROVEITAMENTOS = """
+    a.id, a.aluno_id, b.nome AS aluno_nome, a.tipo, a.nome_disciplina, a.codigo_disciplina,
+    a.creditos, a.idioma, a.nota, a.instituicao, a.numero_processo, a.status, a.data_solicitacao
+"""
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Dados de uma versão do banco. Não deve ser alterado por quem o recebe."""
+    versao: tuple
+    alunos: pd.DataFrame
+    aproveitamentos: pd.DataFrame
+    nomes_alunos: MappingProxyType # {id: nome}, na ordem por nome
+    rotulos_aproveitamentos: MappingProxyType # {id: "Aluno - Disciplina/Idioma"}, mais recentes primeiro
+
+def construir_snapshot(versao):
+    """Lê o banco e monta um novo snapshot."""
+    alunos = database.query_frame(f"SELECT {COLUNAS_ALUNOS} FROM alunos ORDER BY nome, id")
+    aproveitamentos = formatar_aproveitamentos(database.query_frame(f"""
+        SELECT {COLUNAS_APROVEITAMENTOS}
+        FROM aproveitamentos a
+        JOIN alunos b ON a.aluno_id = b.id
+        ORDER BY a.data_solicitacao DESC
+    """))
+    return Snapshot(
+        versao=versao,
+        alunos=alunos,
+        aproveitamentos=aproveitamentos,
+        nomes_alunos=MappingProxyType(dict(zip(alunos["id"].tolist(), alunos["nome"].tolist()))),
+        rotulos_aproveitamentos=MappingProxyType(
+            dict(zip(aproveitamentos["id"].tolist(), aproveitamentos["rotulo"].tolist()))
+        ),
+    )
+
+class SnapshotStore:
+    """Guarda o snapshot atual e o refaz quando a versão dos dados muda."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._atual = None
+
+    def obter(self):
+        """Retorna o snapshot da versão atual dos dados, montando-o se necessário."""
+        versao = database.get_data_version()
+        atual = self._atual
+        if atual is not None and atual.versao == versao:
+            return atual
+        return self.publicar(versao)
+
+    def publicar(self, versao=None):
+        """Monta e publica o snapshot da versão atual dos dados, se ainda não foi publicado."""
+        # Só uma thread monta o snapshot; as demais esperam e reaproveitam o resultado
+        with self._lock:
+            versao = versao if versao is not None else database.get_data_version()
+            if self._atual is None or self._atual.versao != versao:
+                self._atual = construir_snapshot(versao) # Troca atômica da referência
+            return self._atual
+
+    def invalidar_apos_commit(self, db_file):
+        """Chamado pelo escritor único depois de um commit com alterações: descarta o snapshot."""
+        if db_file == os.path.abspath(database.DB_FILE): # Escritas em outro banco não mudam este snapshot
+            self._atual = None
+
+@st.cache_resource
+def get_snapshot_store():
+    """Retorna o SnapshotStore único do processo, invalidado pelo escritor a cada commit."""
+    store = SnapshotStore()
+    ao_confirmar(store.invalidar_apos_commit)
+    return store
+
+def get_snapshot():
+    """Retorna o snapshot compartilhado da versão atual dos dados."""
+    return get_snapshot_store().obter()
+
+def get_tabela_aproveitamentos(aluno_id=None):
+    """Retorna a tabela de aproveitamentos formatada, opcionalmente filtrada por aluno."""
+    df = get_snapshot().aproveitamentos
+    if aluno_id is not None:
+        df = df[df["aluno_id"] == aluno_id]
+    return df
@@ -10,8 +10,32 @@ import sqlite3
 import datetime
 import hashlib
 import os
+import time
+import contextlib
+import altair as alt
+import itertools
 from enum import Enum
 from PIL import Image
+from arquivo import alunos_arquivados, alunos_para_arquivar, arquivar_alunos, proximo_id, restaurar_alunos
+from backups import criar_backup, iniciar_backup_periodico, listar_backups, pasta_backups
+from busca import LIMITE_RESULTADOS, buscar_alunos, buscar_aproveitamentos
+from coortes import AGRUPAMENTOS, alunos_da_coorte, indicadores_por_coorte
+from database import DB_FILE, ConflitoVersao, atualizar_versionado, campos_alterados, conectar, diferencas_conflito, query_arrow, query_frame
+from db_writer import enviar_escrita, executar_escrita
+from dimensoes import DIMENSOES, chave_dimensao, opcoes_dimensao, resolver_dimensoes, vincular_dimensoes
+from duplicados import possiveis_duplicados
+from equivalencias import (FILTROS_SITUACAO, HORAS_APROVEITAMENTO_SQL, HORAS_POR_CREDITO_PADRAO, INDICADORES,
+                           carregar_regras_creditos, salvar_regras_creditos, situacao_aluno, situacao_creditos)
+from esquema import criar_esquema
+from manutencao import (executar_otimizacao, iniciar_otimizacao_periodica, iniciar_varredura_periodica,
+                        ultimas_execucoes, varrer_orfaos, verificar_chaves_estrangeiras)
+from prazos import (DATAS_LINHA_DO_TEMPO, DIVISOES, GRANULARIDADES, PRAZOS, alunos_no_periodo, carregar_regras,
+                    corrigir_prazos, linha_do_tempo, prazos_proximos, preencher_prazos_ausentes, registrar_prorrogacao,
+                    salvar_regras, validar_prazos)
+from presentation import COLUMN_CONFIG_DATAS, STATUS_ROTULOS
+from snapshots import get_snapshot, get_tabela_aproveitamentos
+from workflow import (COLUNA_DATA_STATUS, ORIGENS_PERMITIDAS, alocar_numero_processo, atribuicoes_status,
+                      duracao_etapas, fila_por_etapa, transicionar_status)
 
 # Configuração da página
 st.set_page_config(
@@ -22,9 +46,9 @@ st.set_page_config(
 )
 
 # --- Configurações e Constantes ---
-DB_FILE = "ppgop.db"
 HEADER_IMAGE_PATH = "assets/header.jpg"
 FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf" # Caminho para fonte TTF que suporte caracteres especiais
+MAX_GRUPOS_GRAFICO = 30 # Grupos exibidos nos gráficos de indicadores (os maiores)
 
 # Enums para tipos e status
 class TipoAproveitamento(str, Enum):
@@ -40,27 +64,24 @@ class StatusAproveitamento(str, Enum):
 
 # --- Funções de Banco de Dados ---
 
-def check_and_add_column(cursor, table_name, column_name, column_type):
-    """Verifica se uma coluna existe e a adiciona se não existir."""
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [info[1] for info in cursor.fetchall()]
-    if column_name not in columns:
-        try:
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
-            print(f"Coluna 	'{column_name}'	 adicionada à tabela 	'{table_name}'.")
-        except sqlite3.Error as e:
-            print(f"Erro ao adicionar coluna 	'{column_name}'	 à tabela 	'{table_name}': {e}")
-            # Não relançar o erro aqui, pode ser que a coluna já exista de alguma forma
-            # mas não foi detectada pelo PRAGMA (improvável, mas seguro)
-
 def init_db(force_recreate=False):
     """Inicializa o banco de dados, criando tabelas e garantindo colunas essenciais.
 
     Args:
         force_recreate (bool): Se True, apaga o banco de dados existente antes de criar.
-                               Usar com CUIDADO, pois apaga todos os dados.
+                               Usar com CUIDADO, pois apaga todos os dados (um backup é
+                               feito antes; ver backups.py).
+
+    Returns:
+        bool: False se force_recreate não pôde apagar o banco (nada foi alterado).
     """
     if force_recreate and os.path.exists(DB_FILE):
+        try:
+            criar_backup("antes-recriar")
+        except Exception as e:
+            print(f"Erro no backup antes de recriar o banco: {e}")
+            st.error(f"O banco não foi apagado: não foi possível fazer o backup antes. Detalhes: {e}")
+            return False
         try:
             os.remove(DB_FILE)
             print(f"Banco de dados antigo 	'{DB_FILE}'	 removido (force_recreate=True).")
@@ -68,12 +89,16 @@ def init_db(force_recreate=False):
             print(f"Erro ao remover o banco de dados antigo: {e}")
             st.error(f"Erro ao tentar remover o banco de dados antigo. Verifique as permissões. Detalhes: {e}")
             # Não continuar se não puder remover o DB antigo quando forçado
-            return
+            return False
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = conectar()
     c = conn.cursor()
 
     try:
+        # Só vale para um banco novo (antes da primeira tabela); bancos antigos são
+        # convertidos pela otimização agendada (ver manutencao.vacuum_incremental)
+        c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
         # Tabela de usuários
         c.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -83,61 +108,12 @@ def init_db(force_recreate=False):
         )
         """)
 
-        # Tabela de alunos (estrutura base)
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS alunos (
-            id INTEGER PRIMARY KEY,
-            matricula TEXT UNIQUE,
-            -- nivel TEXT, -- Será adicionado/verificado abaixo
-            nome TEXT NOT NULL,
-            email TEXT NOT NULL UNIQUE, -- Email deve ser único
-            orientador TEXT,
-            linha_pesquisa TEXT,
-            data_ingresso DATE, -- Data de Ingresso
-            turma TEXT, -- Turma (pode ser ano ou outra identificação)
-            prazo_defesa_projeto DATE,
-            prazo_defesa_tese DATE,
-            data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+        # Alunos, aproveitamentos e as tabelas de cada módulo (ver esquema.py)
+        criar_esquema(c)
 
-        # GARANTIR que a coluna 'nivel' existe na tabela 'alunos'
-        check_and_add_column(c, "alunos", "nivel", "TEXT")
-
-        # Tabela de aproveitamentos
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS aproveitamentos (
-            id INTEGER PRIMARY KEY,
-            aluno_id INTEGER NOT NULL,
-            tipo TEXT NOT NULL, -- 'disciplina' ou 'idioma'
-            nome_disciplina TEXT,
-            codigo_disciplina TEXT,
-            creditos INTEGER,
-            idioma TEXT,
-            nota REAL,
-            instituicao TEXT,
-            observacoes TEXT,
-            link_documentos TEXT,
-            numero_processo TEXT,
-            status TEXT DEFAULT 'solicitado', -- Usar StatusAproveitamento
-            data_solicitacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            data_aprovacao_coordenacao TIMESTAMP,
-            data_aprovacao_colegiado TIMESTAMP,
-            data_deferimento TIMESTAMP,
-            FOREIGN KEY (aluno_id) REFERENCES alunos (id) ON DELETE CASCADE
-        )
-        """)
-
-        # Trigger para atualizar data_atualizacao na tabela alunos
-        c.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_alunos_timestamp
-        AFTER UPDATE ON alunos
-        FOR EACH ROW
-        BEGIN
-            UPDATE alunos SET data_atualizacao = CURRENT_TIMESTAMP WHERE id = OLD.id;
-        END;
-        """)
+        # data_atualizacao é definida pelo próprio UPDATE de save_aluno; o antigo trigger
+        # fazia um segundo UPDATE na mesma linha a cada edição
+        c.execute("DROP TRIGGER IF EXISTS update_alunos_timestamp")
 
         # Inserir usuários padrão se não existirem
         users_to_insert = [
@@ -161,7 +137,7 @@ def init_db(force_recreate=False):
 
 def get_db_connection():
     """Retorna uma conexão com o banco de dados."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = conectar()
     conn.row_factory = sqlite3.Row # Retorna dicionários em vez de tuplas
     return conn
 
@@ -174,6 +150,48 @@ def get_all_alunos():
     conn.close()
     return alunos
 
+ALUNOS_POR_PAGINA_OPCOES = [25, 50, 100]
+
+def buscar_alunos_paginado(filtros, pagina=1, por_pagina=ALUNOS_POR_PAGINA_OPCOES[0]):
+    """Retorna uma página de alunos filtrada e paginada no banco.
+
+    Args:
+        filtros (dict): Valores de "nome", "email", "turma" e "orientador" (busca parcial)
+                        e "nivel" (valor exato). Filtros vazios são ignorados.
+        pagina (int): Página desejada, começando em 1.
+        por_pagina (int): Quantidade de alunos por página.
+
+    Returns:
+        tuple: (DataFrame com os alunos da página, total de alunos que atendem aos filtros)
+    """
+    condicoes = []
+    params = []
+    for campo in ["nome", "email", "turma", "orientador"]:
+        valor = (filtros.get(campo) or "").strip()
+        if valor:
+            condicoes.append(f"{campo} LIKE ?")
+            params.append(f"%{valor}%")
+    if filtros.get("nivel"):
+        condicoes.append("nivel = ?")
+        params.append(filtros["nivel"])
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+    conn = get_db_connection()
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM alunos {where}", params).fetchone()[0]
+    finally:
+        conn.close()
+    df = query_frame(
+        f"""
+        SELECT id, nome, email, nivel, turma, orientador
+        FROM alunos {where}
+        ORDER BY nome, id
+        LIMIT ? OFFSET ?
+        """,
+        params + [por_pagina, (max(pagina, 1) - 1) * por_pagina]
+    )
+    return df, total
+
 def get_aluno(aluno_id):
     """Retorna os dados de um aluno específico."""
     conn = get_db_connection()
@@ -183,71 +201,80 @@ def get_aluno(aluno_id):
     conn.close()
     return dict(aluno) if aluno else None
 
-def save_aluno(aluno_data, aluno_id=None):
-    """Salva (insere ou atualiza) os dados de um aluno."""
-    conn = get_db_connection()
-    c = conn.cursor()
-    try:
-        # Garantir que as datas sejam None se vazias
-        for key in ["data_ingresso", "prazo_defesa_projeto", "prazo_defesa_tese"]:
-            if key in aluno_data and not aluno_data[key]:
-                aluno_data[key] = None
-
-        if aluno_id:  # Atualizar
-            c.execute("""
-            UPDATE alunos SET
-                matricula = ?,
-                nivel = ?,
-                nome = ?,
-                email = ?,
-                orientador = ?,
-                linha_pesquisa = ?,
-                data_ingresso = ?,
-                turma = ?,
-                prazo_defesa_projeto = ?,
-                prazo_defesa_tese = ?
-                -- data_atualizacao é atualizada pelo trigger
-            WHERE id = ?
-            """, (
-                aluno_data.get("matricula"),
-                aluno_data.get("nivel"),
-                aluno_data.get("nome"),
-                aluno_data.get("email"),
-                aluno_data.get("orientador"),
-                aluno_data.get("linha_pesquisa"),
-                aluno_data.get("data_ingresso"),
-                aluno_data.get("turma"),
-                aluno_data.get("prazo_defesa_projeto"),
-                aluno_data.get("prazo_defesa_tese"),
-                aluno_id
-            ))
-            print(f"Aluno ID {aluno_id} atualizado.")
-        else:  # Inserir
-            c.execute("""
-            INSERT INTO alunos (
-                matricula, nivel, nome, email, orientador, linha_pesquisa,
-                data_ingresso, turma, prazo_defesa_projeto, prazo_defesa_tese
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                aluno_data.get("matricula"),
-                aluno_data.get("nivel"),
-                aluno_data.get("nome"),
-                aluno_data.get("email"),
-                aluno_data.get("orientador"),
-                aluno_data.get("linha_pesquisa"),
-                aluno_data.get("data_ingresso"),
-                aluno_data.get("turma"),
-                aluno_data.get("prazo_defesa_projeto"),
-                aluno_data.get("prazo_defesa_tese")
-            ))
-            aluno_id = c.lastrowid # Pega o ID do aluno inserido
-            print(f"Novo aluno inserido com ID {aluno_id}.")
+def _gravar_aluno(conn, aluno_data, aluno_id=None, versao=None):
+    """Operação de escrita: insere um aluno ou atualiza as colunas em aluno_data; retorna o ID.
 
-        conn.commit()
+    Na atualização, se versao for informada e o aluno tiver sido alterado por
+    outra sessão desde então, levanta ConflitoVersao sem gravar nada.
+    """
+    aluno_data = vincular_dimensoes(conn, aluno_data) # IDs de orientador/linha dos textos informados
+    if aluno_id:  # Atualizar, com data_atualizacao no mesmo UPDATE
+        atualizar_versionado(conn, "alunos", aluno_id, aluno_data, versao,
+                             atribuicoes=["data_atualizacao = CURRENT_TIMESTAMP"])
+        return aluno_id
+    # Inserir
+    c = conn.execute("""
+    INSERT INTO alunos (
+        id, matricula, nivel, nome, email, orientador, orientador_id, linha_pesquisa, linha_pesquisa_id,
+        data_ingresso, turma, prazo_defesa_projeto, prazo_defesa_tese
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        proximo_id(conn, "alunos"), # Não reaproveita IDs de alunos arquivados
+        aluno_data.get("matricula"),
+        aluno_data.get("nivel"),
+        aluno_data.get("nome"),
+        aluno_data.get("email"),
+        aluno_data.get("orientador"),
+        aluno_data.get("orientador_id"),
+        aluno_data.get("linha_pesquisa"),
+        aluno_data.get("linha_pesquisa_id"),
+        aluno_data.get("data_ingresso"),
+        aluno_data.get("turma"),
+        aluno_data.get("prazo_defesa_projeto"),
+        aluno_data.get("prazo_defesa_tese")
+    ))
+    return c.lastrowid # Pega o ID do aluno inserido
+
+def save_aluno(aluno_data, aluno_id=None, original=None):
+    """Salva (insere ou atualiza) os dados de um aluno.
+
+    Na atualização, apenas as colunas que diferem de original são gravadas; se
+    nenhuma mudou, nada é escrito.
+
+    Args:
+        aluno_data (dict): Dados do aluno.
+        aluno_id (int, optional): ID do aluno a atualizar; None para inserir.
+        original (dict, optional): Linha do aluno como foi carregada para edição
+                                   (inclui a versão usada para detectar conflitos).
+
+    Raises:
+        ConflitoVersao: Se o aluno foi alterado por outra sessão depois de carregado.
+    """
+    # Garantir que as datas sejam None se vazias
+    for key in ["data_ingresso", "prazo_defesa_projeto", "prazo_defesa_tese"]:
+        if key in aluno_data and not aluno_data[key]:
+            aluno_data[key] = None
+
+    valores, versao = aluno_data, None
+    if aluno_id:
+        valores = {campo: aluno_data[campo] for campo in CAMPOS_FORM_ALUNO if campo in aluno_data}
+        if original is not None:
+            valores = campos_alterados(original, valores)
+            versao = original.get("version")
+            if not valores:
+                print(f"Aluno ID {aluno_id} sem alterações; nada foi gravado.")
+                return aluno_id
+
+    try:
+        novo = not aluno_id
+        aluno_id = executar_escrita(_gravar_aluno, valores, aluno_id, versao)
+        print(f"Novo aluno inserido com ID {aluno_id}." if novo else f"Aluno ID {aluno_id} atualizado.")
         return aluno_id # Retorna o ID do aluno salvo/atualizado
 
+    except ConflitoVersao:
+        raise # Tratado pela interface, que mostra as diferenças
     except sqlite3.IntegrityError as e:
-        conn.rollback() # Desfaz a transação em caso de erro
+        # A transação da operação já foi desfeita pelo escritor
         print(f"Erro de integridade ao salvar aluno: {e}")
         if "UNIQUE constraint failed: alunos.email" in str(e):
             st.error(f"Erro: Já existe um aluno cadastrado com o e-mail '{aluno_data.get('email')}'.")
@@ -257,101 +284,107 @@ def save_aluno(aluno_data, aluno_id=None):
             st.error(f"Erro ao salvar aluno: {e}")
         return None
     except Exception as e:
-        conn.rollback()
         print(f"Erro inesperado ao salvar aluno: {e}")
         st.error(f"Ocorreu um erro inesperado ao salvar o aluno: {e}")
         return None
-    finally:
-        conn.close()
+
+def _excluir_alunos(conn, aluno_ids):
+    """Operação de escrita: exclui alunos (ON DELETE CASCADE cuida dos aproveitamentos)."""
+    placeholders = ", ".join("?" * len(aluno_ids))
+    conn.execute(f"DELETE FROM alunos WHERE id IN ({placeholders})", aluno_ids)
 
 def delete_aluno(aluno_id):
     """Exclui um aluno e seus aproveitamentos associados."""
-    conn = get_db_connection()
-    c = conn.cursor()
     try:
-        # Excluir o aluno (ON DELETE CASCADE cuidará dos aproveitamentos)
-        c.execute("DELETE FROM alunos WHERE id = ?", (aluno_id,))
-        conn.commit()
+        executar_escrita(_excluir_alunos, [aluno_id])
         print(f"Aluno ID {aluno_id} excluído.")
         return True
     except Exception as e:
-        conn.rollback()
         print(f"Erro ao excluir aluno ID {aluno_id}: {e}")
         st.error(f"Erro ao excluir aluno: {e}")
         return False
-    finally:
-        conn.close()
 
-def save_aproveitamento(aproveitamento_data, aproveitamento_id=None):
-    """Salva (insere ou atualiza) um aproveitamento."""
-    conn = get_db_connection()
-    c = conn.cursor()
+def delete_alunos(aluno_ids):
+    """Exclui vários alunos (e seus aproveitamentos) em uma única transação."""
+    aluno_ids = list(aluno_ids)
+    if not aluno_ids:
+        return True
     try:
-        if aproveitamento_id:  # Atualizar
-            c.execute("""
-            UPDATE aproveitamentos SET
-                aluno_id = ?,
-                tipo = ?,
-                nome_disciplina = ?,
-                codigo_disciplina = ?,
-                creditos = ?,
-                idioma = ?,
-                nota = ?,
-                instituicao = ?,
-                observacoes = ?,
-                link_documentos = ?,
-                numero_processo = ?,
-                status = ?
-                -- Datas são atualizadas conforme o fluxo
-            WHERE id = ?
-            """, (
-                aproveitamento_data["aluno_id"],
-                aproveitamento_data["tipo"],
-                aproveitamento_data.get("nome_disciplina"),
-                aproveitamento_data.get("codigo_disciplina"),
-                aproveitamento_data.get("creditos"),
-                aproveitamento_data.get("idioma"),
-                aproveitamento_data.get("nota"),
-                aproveitamento_data.get("instituicao"),
-                aproveitamento_data.get("observacoes"),
-                aproveitamento_data.get("link_documentos"),
-                aproveitamento_data.get("numero_processo"),
-                aproveitamento_data.get("status", StatusAproveitamento.SOLICITADO.value),
-                aproveitamento_id
-            ))
-            print(f"Aproveitamento ID {aproveitamento_id} atualizado.")
-        else:  # Inserir
-            c.execute("""
-            INSERT INTO aproveitamentos (
-                aluno_id, tipo, nome_disciplina, codigo_disciplina, creditos,
-                idioma, nota, instituicao, observacoes, link_documentos, numero_processo, status
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                aproveitamento_data["aluno_id"],
-                aproveitamento_data["tipo"],
-                aproveitamento_data.get("nome_disciplina"),
-                aproveitamento_data.get("codigo_disciplina"),
-                aproveitamento_data.get("creditos"),
-                aproveitamento_data.get("idioma"),
-                aproveitamento_data.get("nota"),
-                aproveitamento_data.get("instituicao"),
-                aproveitamento_data.get("observacoes"),
-                aproveitamento_data.get("link_documentos"),
-                aproveitamento_data.get("numero_processo"),
-                aproveitamento_data.get("status", StatusAproveitamento.SOLICITADO.value)
-            ))
-            aproveitamento_id = c.lastrowid
-            print(f"Novo aproveitamento inserido com ID {aproveitamento_id}.")
+        executar_escrita(_excluir_alunos, aluno_ids)
+        print(f"Alunos IDs {aluno_ids} excluídos.")
+        return True
+    except Exception as e:
+        print(f"Erro ao excluir alunos IDs {aluno_ids}: {e}")
+        st.error(f"Erro ao excluir alunos: {e}")
+        return False
 
-        conn.commit()
+def _gravar_aproveitamento(conn, aproveitamento_data, aproveitamento_id=None, versao=None):
+    """Operação de escrita: insere ou atualiza um aproveitamento e retorna o ID.
+
+    Na atualização, levanta ConflitoVersao se versao for informada e não for mais a atual.
+    """
+    if aproveitamento_id:  # Atualizar (mudança de status segue o fluxo e registra a data da etapa)
+        valores = {
+            "aluno_id": aproveitamento_data["aluno_id"],
+            "tipo": aproveitamento_data["tipo"],
+            "nome_disciplina": aproveitamento_data.get("nome_disciplina"),
+            "codigo_disciplina": aproveitamento_data.get("codigo_disciplina"),
+            "creditos": aproveitamento_data.get("creditos"),
+            "idioma": aproveitamento_data.get("idioma"),
+            "nota": aproveitamento_data.get("nota"),
+            "instituicao": aproveitamento_data.get("instituicao"),
+            "observacoes": aproveitamento_data.get("observacoes"),
+            "link_documentos": aproveitamento_data.get("link_documentos"),
+            "numero_processo": aproveitamento_data.get("numero_processo") or None,
+        }
+        atribuicoes = []
+        if aproveitamento_data.get("status"): # Sem status informado, mantém o atual
+            valores["status"] = aproveitamento_data["status"]
+            atribuicoes = atribuicoes_status(conn, aproveitamento_id, valores["status"])
+        atualizar_versionado(conn, "aproveitamentos", aproveitamento_id, valores, versao, atribuicoes)
+        return aproveitamento_id
+    # Inserir (sem número informado, usa o próximo do contador anual)
+    numero_processo = aproveitamento_data.get("numero_processo") or alocar_numero_processo(conn)
+    c = conn.execute("""
+    INSERT INTO aproveitamentos (
+        id, aluno_id, tipo, nome_disciplina, codigo_disciplina, creditos,
+        idioma, nota, instituicao, observacoes, link_documentos, numero_processo, status
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        proximo_id(conn, "aproveitamentos"),
+        aproveitamento_data["aluno_id"],
+        aproveitamento_data["tipo"],
+        aproveitamento_data.get("nome_disciplina"),
+        aproveitamento_data.get("codigo_disciplina"),
+        aproveitamento_data.get("creditos"),
+        aproveitamento_data.get("idioma"),
+        aproveitamento_data.get("nota"),
+        aproveitamento_data.get("instituicao"),
+        aproveitamento_data.get("observacoes"),
+        aproveitamento_data.get("link_documentos"),
+        numero_processo,
+        aproveitamento_data.get("status", StatusAproveitamento.SOLICITADO.value)
+    ))
+    return c.lastrowid
+
+def save_aproveitamento(aproveitamento_data, aproveitamento_id=None, versao=None):
+    """Salva (insere ou atualiza) um aproveitamento.
+
+    Raises:
+        ConflitoVersao: Se o aproveitamento foi alterado por outra sessão depois de carregado.
+    """
+    try:
+        novo = not aproveitamento_id
+        aproveitamento_id = executar_escrita(_gravar_aproveitamento, aproveitamento_data, aproveitamento_id, versao)
+        print(f"Novo aproveitamento inserido com ID {aproveitamento_id}." if novo
+              else f"Aproveitamento ID {aproveitamento_id} atualizado.")
         return aproveitamento_id
+    except ConflitoVersao:
+        raise
     except Exception as e:
-        conn.rollback()
         print(f"Erro ao salvar aproveitamento: {e}")
         st.error(f"Erro ao salvar aproveitamento: {e}")
         return None
-    finally:
-        conn.close()
 
 def get_aproveitamentos(aluno_id):
     """Retorna todos os aproveitamentos de um aluno."""
@@ -362,41 +395,75 @@ def get_aproveitamentos(aluno_id):
     conn.close()
     return aproveitamentos
 
+# Colunas exibidas nas tabelas de detalhes do dashboard, por tipo de aproveitamento
+COLUNAS_DETALHES = {
+    TipoAproveitamento.DISCIPLINA.value: f"""
+        nome_disciplina AS "Nome", codigo_disciplina AS "Código", creditos AS "Créditos",
+        {HORAS_APROVEITAMENTO_SQL} AS "Horas", instituicao AS "Instituição", status AS "Status",
+        numero_processo AS "Processo"
+    """,
+    TipoAproveitamento.IDIOMA.value: """
+        idioma AS "Idioma", nota AS "Nota", instituicao AS "Instituição", status AS "Status",
+        numero_processo AS "Processo"
+    """,
+}
+
+def get_detalhes_aproveitamentos(aluno_id, tipo, status=None):
+    """Retorna, como pyarrow.Table, os aproveitamentos de um tipo para as tabelas do dashboard.
+
+    Args:
+        aluno_id (int): Aluno.
+        tipo (str): Valor de TipoAproveitamento.
+        status (list): Se informado, apenas aproveitamentos com esses status.
+    """
+    filtro_status = ""
+    params = [aluno_id, tipo]
+    if status:
+        filtro_status = f"AND status IN ({', '.join('?' * len(status))})"
+        params.extend(status)
+    return query_arrow(f"""
+        SELECT {COLUNAS_DETALHES[tipo]}
+        FROM aproveitamentos
+        WHERE aluno_id = ? AND tipo = ? {filtro_status}
+        ORDER BY data_solicitacao DESC
+    """, params)
+
 def get_resumo_aproveitamentos(aluno_id):
-    """Calcula e retorna um resumo dos aproveitamentos de um aluno."""
-    aproveitamentos = get_aproveitamentos(aluno_id)
+    """Calcula e retorna um resumo dos aproveitamentos de um aluno.
+
+    Os totais e requisitos vêm da avaliação do programa inteiro no SQLite, pelas
+    regras de créditos do nível (ver equivalencias.situacao_creditos); aqui só
+    se montam as listas de detalhes.
+    """
+    situacao = situacao_aluno(aluno_id) or {}
+    horas_por_credito = situacao.get("horas_por_credito", HORAS_POR_CREDITO_PADRAO)
     resumo = {
-        "disciplinas": {"total": 0, "creditos": 0, "horas": 0, "deferidos": 0, "pendentes": 0},
-        "idiomas": {"total": 0, "aprovados": 0, "pendentes": 0},
-        "detalhes": {"disciplinas": [], "idiomas": []}
+        "disciplinas": {
+            "total": situacao.get("disciplinas", 0), "creditos": situacao.get("creditos_deferidos", 0),
+            "horas": situacao.get("horas_deferidas", 0), "deferidos": situacao.get("disciplinas_deferidas", 0),
+            "pendentes": situacao.get("disciplinas", 0) - situacao.get("disciplinas_deferidas", 0),
+        },
+        "idiomas": {
+            "total": situacao.get("idiomas", 0), "aprovados": situacao.get("idiomas_aprovados", 0),
+            "pendentes": situacao.get("idiomas", 0) - situacao.get("idiomas_aprovados", 0),
+        },
+        "detalhes": {"disciplinas": [], "idiomas": []},
+        "requisitos": situacao,
     }
 
-    for aprov in aproveitamentos:
+    for aprov in get_aproveitamentos(aluno_id):
         if aprov["tipo"] == TipoAproveitamento.DISCIPLINA.value:
             creditos = aprov["creditos"] or 0
-            horas = creditos * 15
             resumo["detalhes"]["disciplinas"].append({
                 "id": aprov["id"], "nome": aprov["nome_disciplina"], "codigo": aprov["codigo_disciplina"],
-                "creditos": creditos, "horas": horas, "instituicao": aprov["instituicao"],
+                "creditos": creditos, "horas": creditos * horas_por_credito, "instituicao": aprov["instituicao"],
                 "status": aprov["status"], "processo": aprov["numero_processo"]
             })
-            resumo["disciplinas"]["total"] += 1
-            if aprov["status"] == StatusAproveitamento.DEFERIDO.value:
-                resumo["disciplinas"]["deferidos"] += 1
-                resumo["disciplinas"]["creditos"] += creditos
-                resumo["disciplinas"]["horas"] += horas
-            else:
-                resumo["disciplinas"]["pendentes"] += 1
         elif aprov["tipo"] == TipoAproveitamento.IDIOMA.value:
             resumo["detalhes"]["idiomas"].append({
                 "id": aprov["id"], "idioma": aprov["idioma"], "nota": aprov["nota"],
                 "instituicao": aprov["instituicao"], "status": aprov["status"], "processo": aprov["numero_processo"]
             })
-            resumo["idiomas"]["total"] += 1
-            if aprov["status"] == StatusAproveitamento.DEFERIDO.value:
-                resumo["idiomas"]["aprovados"] += 1
-            else:
-                resumo["idiomas"]["pendentes"] += 1
     return resumo
 
 # --- Funções de Importação ---
@@ -415,8 +482,30 @@ def normalize_column_name(name):
         name = name.replace(old, new)
     return name
 
-def import_alunos_from_excel(uploaded_file):
-    """Importa alunos do arquivo Excel, tratando nomes de colunas e dados."""
+def _importar_aluno(conn, aluno_data):
+    """Operação de escrita da importação: insere o aluno ou retorna o motivo de ignorá-lo."""
+    # Verificar duplicidade por e-mail e por matrícula (se houver), também entre os arquivados:
+    # reimportar a planilha do programa não pode recriar como novo um aluno arquivado
+    for coluna, rotulo in (("email", "E-mail"), ("matricula", "Matrícula")):
+        valor = aluno_data.get(coluna)
+        if not valor:
+            continue
+        existente = conn.execute(f"SELECT id, arquivado FROM alunos_historico WHERE {coluna} = ?", (valor,)).fetchone()
+        if existente and existente["arquivado"]:
+            return (f"{rotulo} de aluno arquivado (ID {existente['id']}): {valor} (Aluno: {aluno_data['nome']}). "
+                    "Restaure-o na página Arquivo de Alunos.")
+        if existente:
+            return f"{rotulo} já cadastrad{'o' if coluna == 'email' else 'a'}: {valor} (Aluno: {aluno_data['nome']})"
+
+    _gravar_aluno(conn, aluno_data)
+    return None
+
+def import_alunos_from_excel(uploaded_file, ignorar_duplicados=False):
+    """Importa alunos do arquivo Excel, tratando nomes de colunas e dados.
+
+    stats["possiveis_duplicados"] lista as linhas cujo nome se parece com o de um aluno
+    cadastrado ou de uma linha anterior; com ignorar_duplicados, essas linhas não são importadas.
+    """
     try:
         # Ler o arquivo Excel (seja path ou objeto BytesIO)
         if isinstance(uploaded_file, str):
@@ -425,7 +514,7 @@ def import_alunos_from_excel(uploaded_file):
             df = pd.read_excel(uploaded_file)
     except Exception as e:
         st.error(f"Erro ao ler o arquivo Excel: {e}")
-        return {"total": 0, "importados": 0, "ignorados": 0, "erros": [f"Falha na leitura do Excel: {e}"]}
+        return {"total": 0, "importados": 0, "ignorados": 0, "erros": [f"Falha na leitura do Excel: {e}"], "possiveis_duplicados": []}
 
     # Normalizar nomes das colunas do DataFrame
     df.columns = [normalize_column_name(col) for col in df.columns]
@@ -450,12 +539,11 @@ def import_alunos_from_excel(uploaded_file):
     missing_cols = [col for col in required_cols_normalized if col not in df.columns]
     if missing_cols:
         st.error(f"Erro: Colunas obrigatórias não encontradas no Excel (após normalização): {', '.join(missing_cols)}. Colunas encontradas: {', '.join(df.columns)}")
-        return {"total": 0, "importados": 0, "ignorados": 0, "erros": [f"Colunas faltando: {', '.join(missing_cols)}"]}
+        return {"total": 0, "importados": 0, "ignorados": 0, "erros": [f"Colunas faltando: {', '.join(missing_cols)}"], "possiveis_duplicados": []}
 
     df = df[df["nome"].notna()] # Remover linhas sem nome
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    stats = {"total": len(df), "importados": 0, "ignorados": 0, "erros": []}
+    stats = {"total": len(df), "importados": 0, "ignorados": 0, "erros": [], "possiveis_duplicados": []}
+    validos = [] # (linha na planilha, aluno_data)
 
     for index, row in df.iterrows():
         aluno_data = {}
@@ -505,39 +593,45 @@ def import_alunos_from_excel(uploaded_file):
             stats["erros"].append(f"Erro na linha {index+2} ({aluno_data.get('nome', 'Nome não encontrado')}): {'; '.join(error_details)}")
             continue
 
-        # Tentar inserir no banco
+        validos.append((index + 2, aluno_data))
+
+    # Nomes parecidos com os já cadastrados ou com linhas anteriores (índice de blocos, quase linear)
+    existentes = query_frame("SELECT id, nome, arquivado FROM alunos_historico")
+    stats["possiveis_duplicados"] = possiveis_duplicados(
+        [(linha, aluno_data["nome"]) for linha, aluno_data in validos],
+        zip(existentes["id"].tolist(), existentes["nome"].tolist()),
+        arquivados=existentes.loc[existentes["arquivado"] == 1, "id"].tolist(),
+    )
+    linhas_duplicadas = {item["linha"] for item in stats["possiveis_duplicados"]} if ignorar_duplicados else set()
+
+    # Prazos vazios calculados pelas regras (ingresso + meses do nível), de uma vez para a planilha
+    preencher_prazos_ausentes([aluno_data for _, aluno_data in validos])
+
+    # Orientadores e linhas de pesquisa: uma única escrita para todos os nomes, depois um mapa em memória
+    if validos:
+        mapas = executar_escrita(resolver_dimensoes, {
+            coluna: [aluno_data[coluna] for _, aluno_data in validos if aluno_data.get(coluna)] for coluna in DIMENSOES
+        })
+        for _, aluno_data in validos:
+            for coluna, (_, coluna_id) in DIMENSOES.items():
+                aluno_data[coluna_id] = mapas[coluna].get(chave_dimensao(aluno_data.get(coluna)))
+
+    envios = [] # (aluno_data, Future) das linhas válidas, gravadas pelo escritor único em lotes
+    for linha, aluno_data in validos:
+        if linha in linhas_duplicadas:
+            stats["ignorados"] += 1
+            stats["erros"].append(f"Possível duplicado na linha {linha}: {aluno_data['nome']}")
+            continue
+        envios.append((aluno_data, enviar_escrita(_importar_aluno, aluno_data)))
+
+    for aluno_data, futuro in envios:
         try:
-            # Verificar duplicidade por e-mail antes de inserir
-            cursor.execute("SELECT id FROM alunos WHERE email = ?", (aluno_data["email"],))
-            if cursor.fetchone():
+            erro = futuro.result()
+            if erro:
                 stats["ignorados"] += 1
-                stats["erros"].append(f"E-mail já cadastrado: {aluno_data['email']} (Aluno: {aluno_data['nome']})")
-                continue
-
-            # Verificar duplicidade por matrícula (se houver)
-            if aluno_data.get("matricula"):
-                 cursor.execute("SELECT id FROM alunos WHERE matricula = ?", (aluno_data["matricula"],))
-                 if cursor.fetchone():
-                    stats["ignorados"] += 1
-                    stats["erros"].append(f"Matrícula já cadastrada: {aluno_data['matricula']} (Aluno: {aluno_data['nome']})")
-                    continue
-
-            # Preparar tupla de valores na ordem da tabela
-            values = (
-                aluno_data.get("matricula"), aluno_data.get("nivel"), aluno_data.get("nome"),
-                aluno_data.get("email"), aluno_data.get("orientador"), aluno_data.get("linha_pesquisa"),
-                aluno_data.get("data_ingresso"), aluno_data.get("turma"),
-                aluno_data.get("prazo_defesa_projeto"), aluno_data.get("prazo_defesa_tese")
-            )
-
-            cursor.execute("""
-            INSERT INTO alunos (
-                matricula, nivel, nome, email, orientador, linha_pesquisa,
-                data_ingresso, turma, prazo_defesa_projeto, prazo_defesa_tese
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, values)
-            stats["importados"] += 1
-
+                stats["erros"].append(erro)
+            else:
+                stats["importados"] += 1
         except sqlite3.IntegrityError as e:
             stats["ignorados"] += 1
             stats["erros"].append(f"Erro de integridade (provável duplicidade) para {aluno_data['nome']}: {e}")
@@ -545,8 +639,6 @@ def import_alunos_from_excel(uploaded_file):
             stats["ignorados"] += 1
             stats["erros"].append(f"Erro inesperado ao importar {aluno_data['nome']}: {e}")
 
-    conn.commit()
-    conn.close()
     return stats
 
 # --- Funções de Geração de PDF ---
@@ -607,6 +699,7 @@ class PDF(fpdf.FPDF):
             self.cell(40, 6, label, 0, 0, "L")
             self.set_font("DejaVu", "", 10)
             self.multi_cell(0, 6, val_str, 0, "L") # MultiCell para quebrar linha se necessário
+            self.set_x(self.l_margin) # No fpdf2 o cursor fica à direita da célula após multi_cell
         self.ln()
 
     def add_table(self, title, headers, data):
@@ -712,6 +805,15 @@ def gerar_pdf_dashboard(aluno, resumo):
         "Idiomas - Aprovados": resumo["idiomas"]["aprovados"],
         "Idiomas - Pendentes": resumo["idiomas"]["pendentes"],
     }
+    requisitos = resumo.get("requisitos")
+    if requisitos and not pd.isna(requisitos["creditos_exigidos"]):
+        resumo_pdf.update({
+            "Créditos Aproveitados (até o limite)": requisitos["creditos_aproveitados"],
+            "Créditos Exigidos": requisitos["creditos_exigidos"],
+            "Créditos Restantes": requisitos["creditos_restantes"],
+            "Idiomas Exigidos": requisitos["idiomas_exigidos"],
+            "Idiomas Restantes": requisitos["idiomas_restantes"],
+        })
     pdf.chapter_body(resumo_pdf)
 
     # Tabela de Disciplinas
@@ -736,6 +838,39 @@ def gerar_pdf_dashboard(aluno, resumo):
     pdf_output.seek(0)
     return pdf_output
 
+# --- Medição de Tempo de Execução ---
+
+MAX_TEMPOS_REGISTRADOS = 30
+
+@contextlib.contextmanager
+def medir_tempo(secao):
+    """Mede o tempo de execução de uma seção e registra no estado da sessão.
+
+    Permite comparar o custo de uma execução completa do script com o de
+    uma reexecução parcial (fragmento) após cada interação.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        tempos = st.session_state.setdefault("tempos_execucao", [])
+        tempos.append({
+            "Horário": datetime.datetime.now().strftime("%H:%M:%S"),
+            "Seção": secao,
+            "Tempo (ms)": round(duracao_ms, 1),
+        })
+        del tempos[:-MAX_TEMPOS_REGISTRADOS]
+        print(f"[tempo] {secao}: {duracao_ms:.1f} ms")
+
+def display_tempos_execucao():
+    """Exibe na barra lateral os tempos das últimas execuções."""
+    tempos = st.session_state.get("tempos_execucao")
+    if not tempos:
+        return
+    with st.sidebar.expander("⏱️ Tempos de execução"):
+        st.dataframe(pd.DataFrame(tempos[::-1]), hide_index=True, use_container_width=True)
+
 # --- Funções da Interface Streamlit ---
 
 def display_header():
@@ -758,72 +893,399 @@ def display_header():
         else:
             st.warning(f"Arquivo de cabeçalho não encontrado em {HEADER_IMAGE_PATH} ou {alt_path}")
 
+def seletor_aluno(rotulo, key, rotulo_vazio=None):
+    """Busca de alunos (índice FTS5) com um selectbox apenas dos encontrados, no lugar da lista completa.
+
+    Sem texto de busca, oferece os primeiros alunos por nome e o já selecionado.
+    Com rotulo_vazio, a opção None (ex.: "Novo Aluno") vem primeiro. O ID escolhido
+    fica em st.session_state[key]; retorna None se nenhum aluno for encontrado.
+    """
+    nomes = get_snapshot().nomes_alunos
+    col_busca, col_lista = st.columns([1, 2])
+    texto = col_busca.text_input("Buscar aluno", key=f"{key}_busca", on_change=buscar_aluno_callback, args=(key,),
+                                 placeholder="Nome, e-mail, matrícula, orientador ou linha")
+    selecionado = st.session_state.get(key)
+    if texto.strip():
+        resultados = [aluno_id for aluno_id in buscar_alunos(texto) if aluno_id in nomes]
+    else:
+        resultados = list(itertools.islice(nomes, LIMITE_RESULTADOS))
+        if selecionado in nomes and selecionado not in resultados:
+            resultados.insert(0, selecionado)
+
+    opcoes = ([None] if rotulo_vazio else []) + resultados
+    if not opcoes:
+        col_lista.info("Nenhum aluno encontrado.")
+        return None
+    if selecionado not in opcoes:
+        st.session_state[key] = opcoes[0]
+    return col_lista.selectbox(
+        rotulo, opcoes, key=key,
+        format_func=lambda aluno_id: rotulo_vazio if aluno_id is None else nomes[aluno_id]
+    )
+
+# --- Mensagens e Callbacks ---
+# As ações que alteram o estado (login, navegação, salvar, excluir) são tratadas
+# em callbacks (on_click/on_change). O Streamlit executa o callback antes do
+# script, então cada interação custa uma única execução, sem st.rerun().
+
+def definir_mensagem(tipo, texto):
+    """Agenda uma mensagem (success, error, warning, info) para a próxima renderização."""
+    st.session_state.setdefault("mensagens", []).append((tipo, texto))
+
+def exibir_mensagens():
+    """Exibe e descarta as mensagens agendadas pelos callbacks."""
+    for tipo, texto in st.session_state.pop("mensagens", []):
+        getattr(st, tipo)(texto)
+
+def autenticar_callback():
+    """Valida usuário e senha informados na página de login."""
+    username = st.session_state.get("login_usuario", "")
+    password = st.session_state.get("login_senha", "")
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
+    result = c.fetchone()
+    conn.close()
+
+    if result:
+        stored_password_hash = result["password_hash"]
+        input_password_hash = hashlib.sha256(password.encode()).hexdigest()
+        if input_password_hash == stored_password_hash:
+            st.session_state["logged_in"] = True
+            st.session_state["username"] = username
+            definir_mensagem("success", f"Bem-vindo, {username}!")
+        else:
+            definir_mensagem("error", "Senha incorreta.")
+    else:
+        definir_mensagem("error", "Usuário não encontrado.")
+
+def logout_callback():
+    """Limpa todo o estado da sessão ao fazer logout."""
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    st.session_state["logged_in"] = False
+
+def mudar_pagina_callback():
+    """Limpa o estado de edição ao trocar de página pelo menu."""
+    st.session_state.pop("cadastro_aluno_id", None)
+
+def buscar_aluno_callback(key):
+    """Ao mudar o texto de busca, pré-seleciona o aluno mais relevante."""
+    resultados = buscar_alunos(st.session_state[f"{key}_busca"], limite=1)
+    if resultados:
+        st.session_state[key] = resultados[0]
+
+def editar_aluno_callback(aluno_id):
+    """Navega para a página de cadastro com o aluno pré-selecionado."""
+    st.session_state["selected_page"] = "Cadastro de Alunos"
+    st.session_state["cadastro_aluno_id"] = aluno_id
+    st.session_state.pop("cadastro_aluno_id_busca", None) # O aluno deve aparecer entre as opções
+
+# Campos do formulário de aluno e seus rótulos (usados também na tela de conflito)
+CAMPOS_FORM_ALUNO = {
+    "matricula": "Matrícula",
+    "nivel": "Nível",
+    "nome": "Nome Completo",
+    "email": "E-mail",
+    "orientador": "Orientador(a)",
+    "linha_pesquisa": "Linha de Pesquisa",
+    "turma": "Turma",
+    "data_ingresso": "Data de Ingresso",
+    "prazo_defesa_projeto": "Prazo Defesa do Projeto",
+    "prazo_defesa_tese": "Prazo Defesa da Tese",
+}
+
+def salvar_aluno_callback(aluno_id):
+    """Valida e salva o formulário de aluno (novo ou em edição)."""
+    sufixo = aluno_id or "novo"
+    valores = {campo: st.session_state.get(f"aluno_{campo}_{sufixo}") for campo in CAMPOS_FORM_ALUNO}
+
+    # Validações básicas
+    if not valores["nome"] or not valores["email"] or not valores["nivel"] or not valores["data_ingresso"]:
+        definir_mensagem("error", "Por favor, preencha todos os campos obrigatórios (*).")
+        return
+
+    # Preparar dados para salvar (converter datas de volta para string YYYY-MM-DD)
+    data_to_save = {campo: (valores[campo] or None) for campo in CAMPOS_FORM_ALUNO}
+    for key in ["data_ingresso", "prazo_defesa_projeto", "prazo_defesa_tese"]:
+        if data_to_save[key]:
+            data_to_save[key] = data_to_save[key].strftime("%Y-%m-%d")
+
+    original = st.session_state.get(f"aluno_original_{sufixo}") or {}
+    try:
+        saved_id = save_aluno(data_to_save, aluno_id=aluno_id, original=original or None)
+    except ConflitoVersao as conflito:
+        if conflito.atual is None:
+            definir_mensagem("error", "Este aluno foi excluído por outra pessoa enquanto você editava.")
+            descartar_edicao_aluno_callback(aluno_id)
+        else:
+            st.session_state[f"aluno_conflito_{sufixo}"] = {
+                "atual": conflito.atual,
+                "diferencas": diferencas_conflito(original, data_to_save, conflito.atual, CAMPOS_FORM_ALUNO),
+            }
+        return
+
+    if saved_id:
+        definir_mensagem("success", f"Aluno '{valores['nome']}' salvo com sucesso!")
+        st.session_state.pop(f"aluno_conflito_{sufixo}", None)
+        if aluno_id:
+            # A partir de agora, a edição parte da versão recém-gravada
+            st.session_state[f"aluno_original_{sufixo}"] = get_aluno(aluno_id)
+        else:
+            # Limpar o formulário de novo aluno
+            for campo in CAMPOS_FORM_ALUNO:
+                st.session_state.pop(f"aluno_{campo}_novo", None)
+    # Mensagem de erro já é exibida por save_aluno
+
+def sobrescrever_aluno_callback(aluno_id):
+    """Grava os valores do usuário sobre a versão atual, após ele revisar o conflito."""
+    conflito = st.session_state.pop(f"aluno_conflito_{aluno_id}", None)
+    original = st.session_state.get(f"aluno_original_{aluno_id}")
+    if conflito and original:
+        st.session_state[f"aluno_original_{aluno_id}"] = {**original, "version": conflito["atual"]["version"]}
+    salvar_aluno_callback(aluno_id)
+
+def descartar_edicao_aluno_callback(aluno_id):
+    """Descarta as alterações do usuário; o formulário é recarregado do banco."""
+    sufixo = aluno_id or "novo"
+    for campo in CAMPOS_FORM_ALUNO:
+        st.session_state.pop(f"aluno_{campo}_{sufixo}", None)
+    st.session_state.pop(f"aluno_original_{sufixo}", None)
+    st.session_state.pop(f"aluno_conflito_{sufixo}", None)
+
+def limpar_selecao_alunos_callback():
+    """Descarta a seleção da tabela de alunos (filtros ou página mudaram)."""
+    st.session_state.pop("tabela_alunos", None)
+    st.session_state.pop("confirm_delete", None)
+
+def filtrar_alunos_callback():
+    """Volta para a primeira página quando um filtro muda."""
+    st.session_state["pagina_alunos"] = 1
+    limpar_selecao_alunos_callback()
+
+def pedir_exclusao_alunos_callback(alunos):
+    """Marca os alunos selecionados ({id: nome}) para confirmação de exclusão."""
+    st.session_state["confirm_delete"] = alunos
+
+def cancelar_exclusao_alunos_callback():
+    """Cancela a confirmação de exclusão."""
+    st.session_state.pop("confirm_delete", None)
+
+def excluir_alunos_callback():
+    """Exclui os alunos confirmados."""
+    alunos = st.session_state.get("confirm_delete") or {}
+    if delete_alunos(alunos.keys()):
+        definir_mensagem("success", f"{len(alunos)} aluno(s) excluído(s) com sucesso: {', '.join(alunos.values())}.")
+        if st.session_state.get("cadastro_aluno_id") in alunos:
+            st.session_state["cadastro_aluno_id"] = None
+        limpar_selecao_alunos_callback()
+    else:
+        definir_mensagem("error", "Erro ao excluir os alunos.")
+
+CAMPOS_FORM_APROVEITAMENTO = [
+    "tipo", "instituicao", "numero_processo", "link_documentos", "observacoes",
+    "nome_disciplina", "codigo_disciplina", "creditos", "idioma", "nota"
+]
+
+def registrar_aproveitamento_callback(aluno_id):
+    """Valida e registra um novo aproveitamento para o aluno selecionado."""
+    valores = {campo: st.session_state.get(f"aprov_{campo}") for campo in CAMPOS_FORM_APROVEITAMENTO}
+    tipo_db = TipoAproveitamento.DISCIPLINA.value if valores["tipo"] == "Disciplina" else TipoAproveitamento.IDIOMA.value
+
+    # Validação básica
+    if tipo_db == TipoAproveitamento.DISCIPLINA.value and not valores["nome_disciplina"]:
+        definir_mensagem("error", "O nome da disciplina é obrigatório.")
+        return
+    if tipo_db == TipoAproveitamento.IDIOMA.value and not valores["idioma"]:
+        definir_mensagem("error", "O idioma é obrigatório.")
+        return
+
+    disciplina = tipo_db == TipoAproveitamento.DISCIPLINA.value
+    data_to_save = {
+        "aluno_id": aluno_id,
+        "tipo": tipo_db,
+        "nome_disciplina": valores["nome_disciplina"] if disciplina else None,
+        "codigo_disciplina": valores["codigo_disciplina"] if disciplina else None,
+        "creditos": valores["creditos"] if disciplina else None,
+        "idioma": None if disciplina else valores["idioma"],
+        "nota": None if disciplina else valores["nota"],
+        "instituicao": valores["instituicao"],
+        "observacoes": valores["observacoes"],
+        "link_documentos": valores["link_documentos"],
+        "numero_processo": valores["numero_processo"],
+        "status": StatusAproveitamento.SOLICITADO.value # Status inicial
+    }
+    if save_aproveitamento(data_to_save):
+        definir_mensagem("success", "Aproveitamento registrado com sucesso!")
+        # Limpar o formulário, mantendo o tipo escolhido
+        for campo in CAMPOS_FORM_APROVEITAMENTO:
+            if campo != "tipo":
+                st.session_state.pop(f"aprov_{campo}", None)
+    # Erro já tratado em save_aproveitamento
+
+def limpar_selecao_aprovacoes_callback():
+    """Descarta a seleção da tabela de aprovações (o filtro mudou)."""
+    st.session_state.pop("tabela_aprovacoes", None)
+
+def aplicar_transicao_callback(aproveitamento_ids):
+    """Aplica o status escolhido a todos os aproveitamentos selecionados."""
+    destino = st.session_state.get("novo_status_aprovacoes")
+    try:
+        resultado = transicionar_status(aproveitamento_ids, destino)
+    except Exception as e:
+        print(f"Erro na transição em lote para {destino}: {e}")
+        definir_mensagem("error", f"Erro ao atualizar os aproveitamentos: {e}")
+        return
+
+    if resultado["atualizados"]:
+        definir_mensagem("success", f"{resultado['atualizados']} aproveitamento(s) passaram para "
+                                    f"'{STATUS_ROTULOS[destino]}'.")
+    if resultado["rejeitados"]:
+        detalhes = ", ".join(
+            f"#{r['id']} ({STATUS_ROTULOS.get(r['status'], r['status']) if r['status'] else 'excluído'})"
+            for r in resultado["rejeitados"]
+        )
+        definir_mensagem("warning", f"{len(resultado['rejeitados'])} aproveitamento(s) não permitem a "
+                                    f"transição para '{STATUS_ROTULOS[destino]}': {detalhes}.")
+    limpar_selecao_aprovacoes_callback()
+
+def limpar_selecao_coortes_callback():
+    """Descarta o grupo selecionado ao trocar o agrupamento (as linhas da tabela mudam)."""
+    st.session_state.pop("tabela_coortes", None)
+
+def salvar_regras_creditos_callback(regras):
+    """Grava as regras de créditos editadas na tabela."""
+    regras = regras.dropna(subset=["nivel", "creditos_exigidos"])
+    limites = [None if pd.isna(limite) else limite for limite in regras["limite_aproveitamento"]]
+    try:
+        salvar_regras_creditos(zip(regras["nivel"], regras["horas_por_credito"].fillna(HORAS_POR_CREDITO_PADRAO), regras["creditos_exigidos"],
+                                   limites, regras["idiomas_exigidos"].fillna(0)))
+        definir_mensagem("success", f"{len(regras)} regra(s) de créditos salva(s).")
+    except sqlite3.IntegrityError as e:
+        definir_mensagem("error", f"Regras inválidas (nível repetido ou horas por crédito não positivas?): {e}")
+
+def salvar_regras_prazos_callback(regras):
+    """Grava as regras de prazo editadas na tabela."""
+    regras = regras.dropna(subset=["nivel", "prazo", "meses"])
+    try:
+        salvar_regras(zip(regras["nivel"], regras["prazo"], regras["meses"], regras["dias"].fillna(0)))
+        definir_mensagem("success", f"{len(regras)} regra(s) de prazo salva(s).")
+    except sqlite3.IntegrityError as e:
+        definir_mensagem("error", f"Regras inválidas (nível e prazo repetidos?): {e}")
+
+def validar_prazos_callback():
+    """Guarda na sessão as divergências entre os prazos gravados e os calculados."""
+    st.session_state["divergencias_prazos"] = validar_prazos()
+
+def corrigir_prazos_callback():
+    """Grava os prazos calculados de todas as divergências numa única transação."""
+    divergencias = st.session_state.pop("divergencias_prazos", None)
+    if divergencias is None or divergencias.empty:
+        return
+    gravadas = corrigir_prazos(divergencias)
+    definir_mensagem("success", f"{gravadas} prazo(s) corrigido(s).")
+    if gravadas < len(divergencias):
+        definir_mensagem("warning", f"{len(divergencias) - gravadas} prazo(s) alterado(s) por outra pessoa desde a validação não foram gravados.")
+
+def registrar_prorrogacao_callback(aluno_id):
+    """Registra a prorrogação informada no formulário."""
+    if aluno_id is None:
+        definir_mensagem("error", "Selecione o aluno da prorrogação.")
+        return
+    meses, dias = st.session_state["prorrogacao_meses"], st.session_state["prorrogacao_dias"]
+    if not meses and not dias:
+        definir_mensagem("error", "Informe os meses e/ou dias da prorrogação.")
+        return
+    registrar_prorrogacao(aluno_id, st.session_state["prorrogacao_prazo"], meses, dias,
+                          st.session_state["prorrogacao_motivo"] or None)
+    definir_mensagem("success", "Prorrogação registrada. Valide os prazos para aplicá-la.")
+
+def arquivar_alunos_callback(ids):
+    """Move os alunos selecionados (ou todos os filtrados) para o arquivo."""
+    if not ids:
+        definir_mensagem("error", "Nenhum aluno para arquivar.")
+        return
+    movidos = arquivar_alunos(ids, st.session_state.get("arquivo_motivo") or None)
+    st.session_state.pop("tabela_arquivar", None) # As linhas da tabela mudam
+    definir_mensagem("success", f"{movidos} aluno(s) arquivado(s) com seus aproveitamentos.")
+
+def restaurar_alunos_callback(ids):
+    """Devolve os alunos arquivados selecionados às tabelas ativas."""
+    if not ids:
+        definir_mensagem("error", "Selecione os alunos a restaurar.")
+        return
+    try:
+        restaurados = restaurar_alunos(ids)
+    except sqlite3.IntegrityError as e:
+        definir_mensagem("error", f"Nada foi restaurado: ID, e-mail, matrícula ou processo já em uso por um registro ativo ({e}).")
+        return
+    st.session_state.pop("tabela_arquivados", None)
+    definir_mensagem("success", f"{restaurados} aluno(s) restaurado(s).")
+
+def backup_manual_callback():
+    """Faz um backup verificado do banco."""
+    try:
+        caminho = criar_backup("manual")
+    except Exception as e:
+        definir_mensagem("error", f"Erro ao fazer o backup: {e}")
+        return
+    definir_mensagem("success", f"Backup salvo em {caminho}.")
+
+def otimizar_banco_callback():
+    """Executa agora as tarefas de otimização do banco."""
+    execucoes = executar_otimizacao()
+    erros = [f"{execucao['tarefa']}: {execucao['detalhes']}" for execucao in execucoes
+             if execucao["detalhes"].startswith("erro")]
+    if erros:
+        definir_mensagem("error", "Falha na otimização do banco. " + "; ".join(erros))
+        return
+    definir_mensagem("success", "Banco otimizado: " + "; ".join(
+        f"{execucao['tarefa']} em {execucao['duracao_ms']:.0f} ms" for execucao in execucoes))
+
+def recriar_banco_callback():
+    """Apaga e recria o banco de dados (confirmado na página de importação)."""
+    st.session_state["confirmar_apagar_banco"] = False
+    if init_db(force_recreate=True) is False:
+        return
+    definir_mensagem("success", "Banco de dados apagado e recriado. Agora você pode importar o arquivo. "
+                                f"Uma cópia do banco anterior foi salva em {pasta_backups()}.")
+
+# --- Páginas ---
+
 def login_page():
     """Exibe a página de login e processa a autenticação."""
     st.header("Login - Sistema de Gestão PPGOP")
-    username = st.text_input("Usuário")
-    password = st.text_input("Senha", type="password")
-
-    if st.button("Entrar"):
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
-        result = c.fetchone()
-        conn.close()
-
-        if result:
-            stored_password_hash = result["password_hash"]
-            input_password_hash = hashlib.sha256(password.encode()).hexdigest()
-            if input_password_hash == stored_password_hash:
-                st.session_state["logged_in"] = True
-                st.session_state["username"] = username
-                st.success(f"Bem-vindo, {username}!")
-                st.experimental_rerun() # Recarrega a página para mostrar o menu principal
-            else:
-                st.error("Senha incorreta.")
-        else:
-            st.error("Usuário não encontrado.")
+    exibir_mensagens()
+    st.text_input("Usuário", key="login_usuario")
+    st.text_input("Senha", type="password", key="login_senha")
+    st.button("Entrar", on_click=autenticar_callback)
 
 def cadastro_alunos_page():
     """Página para cadastrar ou editar alunos."""
     st.header("Cadastro e Edição de Alunos")
+    exibir_mensagens()
 
-    alunos_list = get_all_alunos()
-    alunos_dict = {aluno["nome"]: aluno["id"] for aluno in alunos_list}
-    alunos_nomes = ["Novo Aluno"] + list(alunos_dict.keys())
-
-    # Selecionar modo: Novo ou Editar
-    # Usar o nome do aluno vindo do dashboard para pré-selecionar
-    pre_selected_index = 0
-    if 'edit_aluno_nome' in st.session_state and st.session_state['edit_aluno_nome'] in alunos_nomes:
-        pre_selected_index = alunos_nomes.index(st.session_state['edit_aluno_nome'])
-        # Limpar o estado após usar para não pré-selecionar sempre
-        # del st.session_state['edit_aluno_nome'] # Remover depois de usar? Ou manter até sair da pág?
-
-    selected_aluno_nome = st.selectbox(
-        "Selecione um aluno para editar ou escolha 'Novo Aluno'",
-        alunos_nomes,
-        index=pre_selected_index
-    )
+    alunos_nomes = get_snapshot().nomes_alunos
+
+    # Selecionar modo: Novo (None) ou Editar (id do aluno).
+    # O dashboard pré-seleciona o aluno escrevendo em "cadastro_aluno_id".
+    if st.session_state.get("cadastro_aluno_id") not in alunos_nomes:
+        st.session_state["cadastro_aluno_id"] = None
+
+    aluno_id_to_edit = seletor_aluno("Selecione um aluno para editar ou escolha 'Novo Aluno'",
+                                     "cadastro_aluno_id", rotulo_vazio="Novo Aluno")
 
     aluno_data = {}
-    aluno_id_to_edit = None
 
-    if selected_aluno_nome == "Novo Aluno":
+    if aluno_id_to_edit is None:
         st.subheader("Cadastrar Novo Aluno")
-        aluno_id_to_edit = None
         default_date = None # Ou datetime.date.today()
         default_nivel = "Doutorado" # Padrão para novo aluno
     else:
-        st.subheader(f"Editando: {selected_aluno_nome}")
-        aluno_id_to_edit = alunos_dict[selected_aluno_nome]
+        st.subheader(f"Editando: {alunos_nomes[aluno_id_to_edit]}")
         aluno_data_raw = get_aluno(aluno_id_to_edit)
         if not aluno_data_raw:
             st.error("Erro ao carregar dados do aluno selecionado.")
-            # Limpar seleção se der erro
-            if 'edit_aluno_nome' in st.session_state: del st.session_state['edit_aluno_nome']
-            st.session_state['selected_page'] = 'Cadastro de Alunos' # Forçar recarregar a própria página
-            st.experimental_rerun()
             return
 
         aluno_data = dict(aluno_data_raw) # Converter de sqlite3.Row para dict
@@ -839,203 +1301,555 @@ def cadastro_alunos_page():
                  aluno_data[key] = None
         default_nivel = aluno_data.get("nivel")
 
+    # As chaves dos campos incluem o aluno em edição, para que cada aluno tenha seu próprio estado
+    sufixo = aluno_id_to_edit or "novo"
+
+    # Guardar a linha (e sua versão) no momento em que o formulário é aberto; é com
+    # ela que o salvamento detecta alterações feitas por outras sessões
+    if aluno_id_to_edit is not None and f"aluno_nome_{sufixo}" not in st.session_state:
+        st.session_state[f"aluno_original_{sufixo}"] = aluno_data_raw
+        st.session_state.pop(f"aluno_conflito_{sufixo}", None)
+
+    conflito = st.session_state.get(f"aluno_conflito_{sufixo}")
+    if conflito:
+        st.warning("Este aluno foi alterado por outra pessoa enquanto você editava. "
+                   "Revise as diferenças antes de salvar.")
+        st.dataframe(conflito["diferencas"], hide_index=True, use_container_width=True)
+        col_sobrescrever, col_descartar = st.columns(2)
+        col_sobrescrever.button("Salvar meus valores mesmo assim", on_click=sobrescrever_aluno_callback,
+                                args=(aluno_id_to_edit,), use_container_width=True)
+        col_descartar.button("Descartar minhas alterações", on_click=descartar_edicao_aluno_callback,
+                             args=(aluno_id_to_edit,), use_container_width=True)
+
     # Formulário de Cadastro/Edição
     with st.form(key="aluno_form"):
         # Usar colunas para melhor layout
         col1, col2 = st.columns(2)
 
         with col1:
-            matricula = st.text_input("Matrícula", value=aluno_data.get("matricula", ""))
+            st.text_input("Matrícula", value=aluno_data.get("matricula") or "", key=f"aluno_matricula_{sufixo}")
             # --- NÍVEL COMO SEGUNDO CAMPO --- 
             nivel_options = ["Mestrado", "Doutorado"]
             try:
                 nivel_index = nivel_options.index(default_nivel) if default_nivel in nivel_options else 0
             except ValueError:
                 nivel_index = 0 # Padrão se valor não estiver na lista
-            nivel = st.selectbox("Nível*", nivel_options, index=nivel_index)
+            st.selectbox("Nível*", nivel_options, index=nivel_index, key=f"aluno_nivel_{sufixo}")
             # --- FIM NÍVEL ---
-            nome = st.text_input("Nome Completo*", value=aluno_data.get("nome", ""))
-            email = st.text_input("E-mail*", value=aluno_data.get("email", ""))
-            orientador = st.text_input("Orientador(a)", value=aluno_data.get("orientador", ""))
+            st.text_input("Nome Completo*", value=aluno_data.get("nome") or "", key=f"aluno_nome_{sufixo}")
+            st.text_input("E-mail*", value=aluno_data.get("email") or "", key=f"aluno_email_{sufixo}")
+            st.text_input("Orientador(a)", value=aluno_data.get("orientador") or "", key=f"aluno_orientador_{sufixo}")
 
         with col2:
-            linha_pesquisa = st.text_input("Linha de Pesquisa", value=aluno_data.get("linha_pesquisa", ""))
-            turma = st.text_input("Turma", value=aluno_data.get("turma", ""))
-            data_ingresso = st.date_input("Data de Ingresso*", value=aluno_data.get("data_ingresso", default_date))
-            prazo_defesa_projeto = st.date_input("Prazo Defesa do Projeto", value=aluno_data.get("prazo_defesa_projeto", default_date))
-            prazo_defesa_tese = st.date_input("Prazo Defesa da Tese", value=aluno_data.get("prazo_defesa_tese", default_date))
-
-        submitted = st.form_submit_button("Salvar Aluno")
-
-        if submitted:
-            # Validações básicas
-            if not nome or not email or not nivel or not data_ingresso:
-                st.error("Por favor, preencha todos os campos obrigatórios (*).")
-            else:
-                # Preparar dados para salvar (converter datas de volta para string YYYY-MM-DD)
-                data_to_save = {
-                    "matricula": matricula if matricula else None,
-                    "nivel": nivel, # Nível já está aqui
-                    "nome": nome,
-                    "email": email,
-                    "orientador": orientador if orientador else None,
-                    "linha_pesquisa": linha_pesquisa if linha_pesquisa else None,
-                    "turma": turma if turma else None,
-                    "data_ingresso": data_ingresso.strftime("%Y-%m-%d") if data_ingresso else None,
-                    "prazo_defesa_projeto": prazo_defesa_projeto.strftime("%Y-%m-%d") if prazo_defesa_projeto else None,
-                    "prazo_defesa_tese": prazo_defesa_tese.strftime("%Y-%m-%d") if prazo_defesa_tese else None
-                }
-
-                saved_id = save_aluno(data_to_save, aluno_id=aluno_id_to_edit)
-                if saved_id:
-                    st.success(f"Aluno '{nome}' salvo com sucesso!")
-                    # Limpar estado de edição após salvar
-                    if 'edit_aluno_nome' in st.session_state: del st.session_state['edit_aluno_nome']
-                    # Forçar recarregamento da página para atualizar a lista e limpar o form
-                    st.experimental_rerun()
-                # Mensagem de erro já é exibida por save_aluno
+            st.text_input("Linha de Pesquisa", value=aluno_data.get("linha_pesquisa") or "", key=f"aluno_linha_pesquisa_{sufixo}")
+            st.text_input("Turma", value=aluno_data.get("turma") or "", key=f"aluno_turma_{sufixo}")
+            st.date_input("Data de Ingresso*", value=aluno_data.get("data_ingresso", default_date), key=f"aluno_data_ingresso_{sufixo}")
+            st.date_input("Prazo Defesa do Projeto", value=aluno_data.get("prazo_defesa_projeto", default_date), key=f"aluno_prazo_defesa_projeto_{sufixo}")
+            st.date_input("Prazo Defesa da Tese", value=aluno_data.get("prazo_defesa_tese", default_date), key=f"aluno_prazo_defesa_tese_{sufixo}")
+
+        st.form_submit_button("Salvar Aluno", on_click=salvar_aluno_callback, args=(aluno_id_to_edit,))
 
     # --- Listagem e Exclusão de Alunos ---
     st.divider()
     st.subheader("Alunos Cadastrados")
-    alunos_list_full = get_all_alunos() # Recarrega a lista completa
+    alunos_cadastrados_lista()
+
+def alunos_cadastrados_lista():
+    """Lista de alunos filtrada e paginada no banco, com exclusão por seleção de linhas."""
+    col_nome, col_email, col_nivel, col_turma, col_orientador = st.columns(5)
+    filtros = {
+        "nome": col_nome.text_input("Nome", key="filtro_alunos_nome", on_change=filtrar_alunos_callback),
+        "email": col_email.text_input("E-mail", key="filtro_alunos_email", on_change=filtrar_alunos_callback),
+        "nivel": col_nivel.selectbox("Nível", [None, "Mestrado", "Doutorado"], format_func=lambda n: n or "Todos",
+                                     key="filtro_alunos_nivel", on_change=filtrar_alunos_callback),
+        "turma": col_turma.text_input("Turma", key="filtro_alunos_turma", on_change=filtrar_alunos_callback),
+        "orientador": col_orientador.text_input("Orientador(a)", key="filtro_alunos_orientador", on_change=filtrar_alunos_callback),
+    }
 
-    if not alunos_list_full:
-        st.info("Nenhum aluno cadastrado ainda.")
-    else:
-        # Usar colunas para Nome e Botão de Excluir
-        col_nome_h, col_acao_h = st.columns([4, 1])
-        with col_nome_h:
-            st.write("**Nome**")
-        with col_acao_h:
-            st.write("**Ação**")
-
-        for aluno in alunos_list_full:
-            col_nome, col_acao = st.columns([4, 1])
-            with col_nome:
-                 # Link para editar o aluno ao clicar no nome?
-                 # Ou manter o selectbox acima como principal forma de edição
-                 st.write(aluno["nome"])
-            with col_acao:
-                # Botão de exclusão único para cada aluno
-                if st.button("🗑️ Excluir", key=f"del_{aluno['id']}"):
-                    # Adicionar confirmação
-                    if "confirm_delete" not in st.session_state:
-                        st.session_state["confirm_delete"] = {}
-                    st.session_state["confirm_delete"][aluno["id"]] = True
-                    st.experimental_rerun() # Rerun para mostrar a confirmação
-
-            # Lógica de confirmação (exibida abaixo do botão)
-            if st.session_state.get("confirm_delete", {}).get(aluno["id"]):
-                st.warning(f"Tem certeza que deseja excluir {aluno['nome']}? Esta ação não pode ser desfeita.")
-                col_confirm, col_cancel = st.columns(2)
-                if col_confirm.button("Sim, excluir", key=f"confirm_del_{aluno['id']}"):
-                    if delete_aluno(aluno["id"]):
-                        st.success(f"Aluno {aluno['nome']} excluído com sucesso.")
-                        del st.session_state["confirm_delete"][aluno["id"]]
-                        st.experimental_rerun()
-                    else:
-                        st.error("Erro ao excluir o aluno.")
-                if col_cancel.button("Cancelar", key=f"cancel_del_{aluno['id']}"):
-                     del st.session_state["confirm_delete"][aluno["id"]]
-                     st.experimental_rerun()
+    por_pagina = st.session_state.get("por_pagina_alunos", ALUNOS_POR_PAGINA_OPCOES[0])
+    pagina = st.session_state.setdefault("pagina_alunos", 1)
+    df_alunos, total = buscar_alunos_paginado(filtros, pagina, por_pagina)
+    total_paginas = max(1, -(-total // por_pagina))
+    if pagina > total_paginas:
+        # A página atual deixou de existir (exclusões); mostrar a última
+        st.session_state["pagina_alunos"] = pagina = total_paginas
+        df_alunos, total = buscar_alunos_paginado(filtros, pagina, por_pagina)
+
+    if total == 0:
+        st.info("Nenhum aluno encontrado." if any(filtros.values()) else "Nenhum aluno cadastrado ainda.")
+        return
+
+    col_info, col_por_pagina, col_pagina = st.columns([3, 1, 1])
+    col_info.caption(f"{total} aluno(s) encontrado(s). Página {pagina} de {total_paginas}.")
+    col_por_pagina.selectbox("Por página", ALUNOS_POR_PAGINA_OPCOES, key="por_pagina_alunos", on_change=filtrar_alunos_callback)
+    col_pagina.number_input("Página", min_value=1, max_value=total_paginas, step=1,
+                            key="pagina_alunos", on_change=limpar_selecao_alunos_callback)
+
+    evento = st.dataframe(
+        df_alunos,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key="tabela_alunos",
+        column_config={
+            "id": None, "nome": "Nome", "email": "E-mail", "nivel": "Nível",
+            "turma": "Turma", "orientador": "Orientador(a)"
+        }
+    )
+
+    selecionados = df_alunos.iloc[evento.selection.rows]
+    alunos_confirmar = st.session_state.get("confirm_delete")
+    if alunos_confirmar:
+        st.warning(f"Tem certeza que deseja excluir {', '.join(alunos_confirmar.values())}? Esta ação não pode ser desfeita.")
+        col_confirm, col_cancel = st.columns(2)
+        col_confirm.button("Sim, excluir", key="confirm_del_alunos", on_click=excluir_alunos_callback)
+        col_cancel.button("Cancelar", key="cancel_del_alunos", on_click=cancelar_exclusao_alunos_callback)
+    elif not selecionados.empty:
+        st.button(
+            f"🗑️ Excluir {len(selecionados)} aluno(s) selecionado(s)",
+            key="del_alunos",
+            on_click=pedir_exclusao_alunos_callback,
+            args=(dict(zip(selecionados["id"].tolist(), selecionados["nome"])),)
+        )
 
 def aproveitamento_page():
     """Página para registrar e gerenciar aproveitamentos."""
     st.header("Registro de Aproveitamentos")
+    exibir_mensagens()
 
-    alunos_list = get_all_alunos()
-    if not alunos_list:
+    alunos_nomes = get_snapshot().nomes_alunos
+    if not alunos_nomes:
         st.warning("Nenhum aluno cadastrado. Cadastre um aluno primeiro.")
         return
 
-    alunos_dict = {aluno["nome"]: aluno["id"] for aluno in alunos_list}
-    selected_aluno_nome = st.selectbox("Selecione o Aluno", list(alunos_dict.keys()))
-    aluno_id = alunos_dict[selected_aluno_nome]
+    aluno_id = seletor_aluno("Selecione o Aluno", "aprov_aluno_id")
+    if aluno_id is None:
+        return
+    selected_aluno_nome = alunos_nomes[aluno_id]
 
     st.subheader(f"Registrar novo aproveitamento para: {selected_aluno_nome}")
 
     with st.form(key="aproveitamento_form"):
-        tipo = st.radio("Tipo de Aproveitamento", [t.value.capitalize() for t in TipoAproveitamento], horizontal=True)
+        tipo = st.radio("Tipo de Aproveitamento", [t.value.capitalize() for t in TipoAproveitamento], horizontal=True, key="aprov_tipo")
         tipo_db = TipoAproveitamento.DISCIPLINA.value if tipo == "Disciplina" else TipoAproveitamento.IDIOMA.value
 
         # Campos comuns
-        instituicao = st.text_input("Instituição de Origem")
-        numero_processo = st.text_input("Número do Processo SEI/Administrativo")
-        link_documentos = st.text_input("Link para Documentos (Google Drive, etc.)")
-        observacoes = st.text_area("Observações")
+        st.text_input("Instituição de Origem", key="aprov_instituicao")
+        st.text_input("Número do Processo SEI/Administrativo", key="aprov_numero_processo",
+                      help="Deixe em branco para gerar o próximo número do ano automaticamente.")
+        st.text_input("Link para Documentos (Google Drive, etc.)", key="aprov_link_documentos")
+        st.text_area("Observações", key="aprov_observacoes")
 
         # Campos específicos
         if tipo_db == TipoAproveitamento.DISCIPLINA.value:
-            nome_disciplina = st.text_input("Nome da Disciplina*")
-            codigo_disciplina = st.text_input("Código da Disciplina")
-            creditos = st.number_input("Créditos", min_value=0, step=1)
-            idioma = None
-            nota = None
+            st.text_input("Nome da Disciplina*", key="aprov_nome_disciplina")
+            st.text_input("Código da Disciplina", key="aprov_codigo_disciplina")
+            st.number_input("Créditos", min_value=0, step=1, key="aprov_creditos")
         else: # Idioma
-            idioma = st.text_input("Idioma*")
-            nota = st.number_input("Nota/Conceito", step=0.1, format="%.1f") # Formatar para 1 casa decimal
-            nome_disciplina = None
-            codigo_disciplina = None
-            creditos = None
-
-        submitted = st.form_submit_button("Registrar Aproveitamento")
-
-        if submitted:
-            # Validação básica
-            is_valid = True
-            if tipo_db == TipoAproveitamento.DISCIPLINA.value and not nome_disciplina:
-                st.error("O nome da disciplina é obrigatório.")
-                is_valid = False
-            if tipo_db == TipoAproveitamento.IDIOMA.value and not idioma:
-                st.error("O idioma é obrigatório.")
-                is_valid = False
-
-            if is_valid:
-                data_to_save = {
-                    "aluno_id": aluno_id,
-                    "tipo": tipo_db,
-                    "nome_disciplina": nome_disciplina,
-                    "codigo_disciplina": codigo_disciplina,
-                    "creditos": creditos,
-                    "idioma": idioma,
-                    "nota": nota,
-                    "instituicao": instituicao,
-                    "observacoes": observacoes,
-                    "link_documentos": link_documentos,
-                    "numero_processo": numero_processo,
-                    "status": StatusAproveitamento.SOLICITADO.value # Status inicial
-                }
-                if save_aproveitamento(data_to_save):
-                    st.success("Aproveitamento registrado com sucesso!")
-                    # Limpar form?
-                    st.experimental_rerun()
-                # Erro já tratado em save_aproveitamento
+            st.text_input("Idioma*", key="aprov_idioma")
+            st.number_input("Nota/Conceito", step=0.1, format="%.1f", key="aprov_nota") # Formatar para 1 casa decimal
+
+        st.form_submit_button("Registrar Aproveitamento", on_click=registrar_aproveitamento_callback, args=(aluno_id,))
 
     # --- Listagem de Aproveitamentos do Aluno Selecionado ---
     st.divider()
     st.subheader(f"Aproveitamentos Registrados para: {selected_aluno_nome}")
-    aproveitamentos = get_aproveitamentos(aluno_id)
+    # Tabela formatada compartilhada com app.py (vetorizada e em cache por versão dos dados)
+    df_aprov = get_tabela_aproveitamentos(aluno_id)
 
-    if not aproveitamentos:
+    if df_aprov.empty:
         st.info("Nenhum aproveitamento registrado para este aluno.")
     else:
-        df_aprov = pd.DataFrame(aproveitamentos)
         # Selecionar e renomear colunas para exibição
         df_display = df_aprov[[
-            "tipo", "nome_disciplina", "codigo_disciplina", "creditos", "idioma", "nota",
-            "instituicao", "numero_processo", "status", "data_solicitacao"
+            "tipo_formatado", "nome_disciplina", "codigo_disciplina", "creditos", "idioma", "nota",
+            "instituicao", "numero_processo", "status_formatado", "data_solicitacao"
         ]].rename(columns={
-            "tipo": "Tipo", "nome_disciplina": "Disciplina", "codigo_disciplina": "Código",
+            "tipo_formatado": "Tipo", "nome_disciplina": "Disciplina", "codigo_disciplina": "Código",
             "creditos": "Créditos", "idioma": "Idioma", "nota": "Nota",
-            "instituicao": "Instituição", "numero_processo": "Processo", "status": "Status",
+            "instituicao": "Instituição", "numero_processo": "Processo", "status_formatado": "Status",
             "data_solicitacao": "Data Solicitação"
         })
-        # Formatar data
-        df_display["Data Solicitação"] = pd.to_datetime(df_display["Data Solicitação"]).dt.strftime("%d/%m/%Y")
-        st.dataframe(df_display, use_container_width=True)
+        st.dataframe(df_display, use_container_width=True, hide_index=True,
+                     column_config={"Data Solicitação": COLUMN_CONFIG_DATAS["data_solicitacao"]})
         # Adicionar opção de editar/excluir aproveitamentos aqui se necessário
 
+def indicadores_fluxo():
+    """Fila atual por etapa e duração das etapas (percentis), calculadas em SQL sobre o histórico."""
+    hoje = datetime.date.today()
+    periodos = {
+        "Semestre atual": datetime.date(hoje.year, 1 if hoje.month <= 6 else 7, 1),
+        "Últimos 12 meses": hoje - datetime.timedelta(days=365),
+        "Todo o período": None,
+    }
+    rotulos_etapas = {**STATUS_ROTULOS, "total": "Total (solicitação → decisão)"}
+    config_dias = st.column_config.NumberColumn(format="%.1f")
+
+    col_fila, col_duracao = st.columns([2, 3])
+    with col_fila:
+        st.markdown("**Fila atual**")
+        fila = fila_por_etapa()
+        if fila.empty:
+            st.caption("Nenhum aproveitamento em aberto.")
+        else:
+            fila["status"] = fila["status"].map(STATUS_ROTULOS)
+            st.dataframe(fila, hide_index=True, use_container_width=True, column_config={
+                "status": "Etapa", "quantidade": "Aguardando",
+                "dias_medio": st.column_config.NumberColumn("Dias (média)", format="%.1f"),
+                "dias_maximo": st.column_config.NumberColumn("Dias (máx.)", format="%.1f"),
+            })
+    with col_duracao:
+        periodo = st.radio("Duração das etapas concluídas em", list(periodos), horizontal=True, key="periodo_indicadores")
+        inicio = periodos[periodo]
+        duracoes = duracao_etapas(inicio=inicio.isoformat() if inicio else None)
+        if duracoes.empty:
+            st.caption("Nenhuma etapa concluída no período.")
+        else:
+            duracoes["etapa"] = duracoes["etapa"].map(rotulos_etapas)
+            st.dataframe(duracoes, hide_index=True, use_container_width=True, column_config={
+                "etapa": "Etapa", "transicoes": "Concluídas", "media": config_dias,
+                "p50": st.column_config.NumberColumn("Mediana", format="%.1f"),
+                "p75": config_dias, "p90": config_dias, "maximo": config_dias,
+            })
+
+def aprovacoes_page():
+    """Página para mudar o status de vários aproveitamentos de uma vez (ex.: após a reunião do colegiado)."""
+    st.header("Fluxo de Aprovação")
+    exibir_mensagens()
+
+    with st.expander("Indicadores do fluxo (em dias)"):
+        indicadores_fluxo()
+
+    df = get_snapshot().aproveitamentos
+    col_filtro, col_busca = st.columns([1, 2])
+    status_filtro = col_filtro.selectbox("Status atual", [None] + list(STATUS_ROTULOS),
+                                         format_func=lambda s: "Todos" if s is None else STATUS_ROTULOS[s],
+                                         key="filtro_aprovacoes_status", on_change=limpar_selecao_aprovacoes_callback)
+    busca = col_busca.text_input("Buscar", key="busca_aprovacoes", on_change=limpar_selecao_aprovacoes_callback,
+                                 placeholder="Disciplina, código, idioma, instituição, processo ou observações")
+    if status_filtro:
+        df = df[df["status"] == status_filtro]
+    if busca.strip():
+        df = df[df["id"].isin(buscar_aproveitamentos(busca, limite=None))]
+    if df.empty:
+        st.info("Nenhum aproveitamento encontrado.")
+        return
+
+    evento = st.dataframe(
+        df[["id", "aluno_nome", "tipo_formatado", "disciplina_idioma", "numero_processo", "status_formatado", "data_solicitacao"]],
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key="tabela_aprovacoes",
+        column_config={
+            "id": None, "aluno_nome": "Aluno", "tipo_formatado": "Tipo", "disciplina_idioma": "Disciplina/Idioma",
+            "numero_processo": "Processo", "status_formatado": "Status",
+            "data_solicitacao": COLUMN_CONFIG_DATAS["data_solicitacao"],
+        }
+    )
+
+    selecionados = df.iloc[evento.selection.rows]
+    if selecionados.empty:
+        st.caption("Selecione as linhas dos aproveitamentos para mudar o status em lote.")
+        return
+
+    col_status, col_aplicar = st.columns([2, 1])
+    destino = col_status.selectbox("Novo status", list(COLUNA_DATA_STATUS), format_func=STATUS_ROTULOS.get,
+                                   key="novo_status_aprovacoes")
+    permitidos = int(selecionados["status"].isin(ORIGENS_PERMITIDAS[destino]).sum())
+    col_status.caption(f"{permitidos} de {len(selecionados)} selecionado(s) podem passar para '{STATUS_ROTULOS[destino]}'.")
+    col_aplicar.button(f"Aplicar a {len(selecionados)} selecionado(s)", key="aplicar_transicao",
+                       disabled=permitidos == 0, on_click=aplicar_transicao_callback,
+                       args=(selecionados["id"].tolist(),), use_container_width=True)
+
+def indicadores_programa_page():
+    """Página de indicadores do programa: coortes e situação de créditos e idiomas dos alunos."""
+    st.header("Indicadores do Programa")
+    exibir_mensagens()
+
+    aba_coortes, aba_creditos = st.tabs(["Coortes", "Créditos e requisitos"])
+    with aba_coortes:
+        indicadores_coortes()
+    with aba_creditos:
+        indicadores_creditos()
+
+def indicadores_coortes():
+    """Indicadores por coorte, com os alunos do grupo selecionado."""
+    agrupamento = st.radio("Agrupar por", list(AGRUPAMENTOS), format_func=lambda a: AGRUPAMENTOS[a][0],
+                           horizontal=True, key="agrupamento_coortes", on_change=limpar_selecao_coortes_callback)
+    rotulo = AGRUPAMENTOS[agrupamento][0]
+    # Agregado no SQLite e em cache por versão dos dados
+    df = indicadores_por_coorte(agrupamento)
+    if df.empty:
+        st.info("Nenhum aluno cadastrado.")
+        return
+
+    col_alunos, col_creditos, col_idiomas, col_pendentes = st.columns(4)
+    col_alunos.metric("Alunos", int(df["alunos"].sum()))
+    col_creditos.metric("Créditos deferidos", int(df["creditos_deferidos"].sum()))
+    col_idiomas.metric("Idiomas deferidos", int(df["idiomas_deferidos"].sum()))
+    col_pendentes.metric("Aproveitamentos pendentes", int(df["pendentes"].sum()))
+
+    grupos = df.head(MAX_GRUPOS_GRAFICO)
+    if len(df) > MAX_GRUPOS_GRAFICO:
+        st.caption(f"Gráficos com os {MAX_GRUPOS_GRAFICO} maiores grupos de {len(df)}; a tabela abaixo tem todos.")
+    base = alt.Chart(grupos[["grupo", "alunos", "creditos_deferidos", "pendentes"]]).encode(
+        y=alt.Y("grupo:N", sort="-x", title=rotulo),
+        tooltip=[alt.Tooltip("grupo:N", title=rotulo), alt.Tooltip("alunos:Q", title="Alunos"),
+                 alt.Tooltip("creditos_deferidos:Q", title="Créditos deferidos"),
+                 alt.Tooltip("pendentes:Q", title="Pendentes")],
+    ).properties(height=max(160, 24 * len(grupos)))
+    col_grafico_alunos, col_grafico_pendentes = st.columns(2)
+    col_grafico_alunos.altair_chart(base.mark_bar().encode(x=alt.X("alunos:Q", title="Alunos")),
+                                    use_container_width=True)
+    col_grafico_pendentes.altair_chart(
+        base.mark_bar(color="#e45756").encode(x=alt.X("pendentes:Q", title="Aproveitamentos pendentes")),
+        use_container_width=True
+    )
+
+    evento = st.dataframe(
+        df, hide_index=True, use_container_width=True, on_select="rerun", selection_mode="single-row",
+        key="tabela_coortes",
+        column_config={
+            "grupo": rotulo, "chave": None, "alunos": "Alunos", "creditos_deferidos": "Créditos deferidos",
+            "idiomas_deferidos": "Idiomas deferidos", "pendentes": "Pendentes",
+        }
+    )
+    if not evento.selection.rows:
+        st.caption("Selecione um grupo na tabela para ver seus alunos.")
+        return
+
+    grupo = df.iloc[evento.selection.rows[0]]
+    st.subheader(f"Alunos — {rotulo}: {grupo['grupo']}")
+    st.dataframe(alunos_da_coorte(agrupamento, grupo["chave"]), hide_index=True, use_container_width=True,
+                 column_config={
+                     "id": None, "nome": "Nome", "email": "E-mail", "nivel": "Nível", "turma": "Turma",
+                     "orientador": "Orientador(a)", "linha_pesquisa": "Linha de Pesquisa",
+                     "creditos_deferidos": "Créditos deferidos", "idiomas_deferidos": "Idiomas deferidos",
+                     "pendentes": "Pendentes",
+                 })
+
+def indicadores_creditos():
+    """Situação de créditos e idiomas de todos os alunos pelas regras do nível, com filtro por requisito."""
+    with st.expander("Regras de créditos por nível"):
+        st.caption("Horas = créditos × horas por crédito. Dos créditos deferidos, contam para os exigidos "
+                   "no máximo o limite de aproveitamento (vazio: sem limite). Nível sem regra cadastrada não "
+                   f"tem requisitos calculados e usa {HORAS_POR_CREDITO_PADRAO} horas por crédito.")
+        regras = st.data_editor(carregar_regras_creditos(), num_rows="dynamic", hide_index=True,
+                                key="editor_regras_creditos",
+                                column_config={
+                                    "nivel": st.column_config.TextColumn("Nível", required=True),
+                                    "horas_por_credito": st.column_config.NumberColumn("Horas por crédito", min_value=1, step=1, default=HORAS_POR_CREDITO_PADRAO),
+                                    "creditos_exigidos": st.column_config.NumberColumn("Créditos exigidos", min_value=0, step=1, required=True),
+                                    "limite_aproveitamento": st.column_config.NumberColumn("Limite de aproveitamento", min_value=0, step=1),
+                                    "idiomas_exigidos": st.column_config.NumberColumn("Idiomas exigidos", min_value=0, step=1, default=0),
+                                })
+        st.button("Salvar regras", key="salvar_regras_creditos", on_click=salvar_regras_creditos_callback, args=(regras,))
+
+    col_filtro, col_nivel = st.columns([3, 1])
+    filtro = col_filtro.radio("Alunos", list(FILTROS_SITUACAO), format_func=lambda f: FILTROS_SITUACAO[f][0],
+                              horizontal=True, key="filtro_situacao_creditos")
+    nivel = col_nivel.selectbox("Nível", [None, "Mestrado", "Doutorado"], format_func=lambda n: n or "Todos",
+                                key="nivel_situacao_creditos")
+    # Uma consulta para o programa inteiro, em cache por versão dos dados
+    df = situacao_creditos(filtro, nivel)
+    st.caption(f"{len(df)} aluno(s).")
+    if df.empty:
+        return
+    st.dataframe(df, hide_index=True, use_container_width=True, column_config={
+        "id": None, "nome": "Aluno", "nivel": "Nível", "horas_por_credito": None, "horas_deferidas": None,
+        "disciplinas": None, "disciplinas_deferidas": None, "idiomas": None, "idiomas_aprovados": None,
+        "creditos_deferidos": "Créditos deferidos", "creditos_em_analise": "Em análise",
+        "creditos_aproveitados": st.column_config.NumberColumn("Aproveitados", help="Deferidos, até o limite do nível"),
+        "creditos_excedentes": st.column_config.NumberColumn("Excedentes", help="Deferidos acima do limite"),
+        "horas_aproveitadas": "Horas aproveitadas", "creditos_exigidos": "Exigidos",
+        "limite_aproveitamento": "Limite", "idiomas_deferidos": "Idiomas", "idiomas_exigidos": "Idiomas exigidos",
+        "creditos_restantes": "Créditos restantes", "limite_disponivel": "Aproveitamento disponível",
+        "idiomas_restantes": "Idiomas restantes",
+        **{indicador: st.column_config.CheckboxColumn(rotulo) for indicador, rotulo in
+           zip(INDICADORES, ["Limite atingido", "Créditos cumpridos", "Idiomas cumpridos"])},
+    })
+
+def monitor_prazos_page():
+    """Página com os prazos de defesa vencidos e a vencer, com filtros por nível e orientador."""
+    st.header("Monitor de Prazos")
+    exibir_mensagens()
+
+    with st.expander("Regras de prazos e validação"):
+        regras_prazos()
+
+    col_dias, col_nivel, col_orientador = st.columns([1, 1, 2])
+    dias = col_dias.number_input("Vencendo nos próximos (dias)", min_value=0, max_value=3650, value=90, step=30,
+                                 key="prazos_dias")
+    nivel = col_nivel.selectbox("Nível", [None, "Mestrado", "Doutorado"], format_func=lambda n: n or "Todos",
+                                key="prazos_nivel")
+    orientadores = opcoes_dimensao("orientador")
+    orientador_id = col_orientador.selectbox("Orientador(a)", [None] + list(orientadores),
+                                             format_func=lambda o: "Todos" if o is None else orientadores[o],
+                                             key="prazos_orientador")
+    incluir_vencidos = st.checkbox("Incluir prazos vencidos", value=True, key="prazos_vencidos")
+
+    # Buscas por intervalo nos índices de prazo, em cache por dia e versão dos dados
+    df = prazos_proximos(int(dias), incluir_vencidos, nivel, orientador_id)
+    vencidos = int((df["dias_restantes"] < 0).sum())
+    col_vencidos, col_a_vencer, _ = st.columns([1, 1, 2])
+    col_vencidos.metric("Vencidos", vencidos)
+    col_a_vencer.metric(f"Vencem em até {int(dias)} dias", len(df) - vencidos)
+
+    if df.empty:
+        st.info("Nenhum prazo no período.")
+        return
+    df = df.assign(data=pd.to_datetime(df["data"], errors="coerce"))
+    st.dataframe(df, hide_index=True, use_container_width=True, column_config={
+        "id": None, "nome": "Aluno", "nivel": "Nível", "orientador": "Orientador(a)", "prazo": "Prazo",
+        "data": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
+        "dias_restantes": st.column_config.NumberColumn("Dias restantes", help="Negativo: vencido há N dias"),
+    })
+
+def regras_prazos():
+    """Regras de cálculo dos prazos, prorrogações e validação em lote dos prazos gravados."""
+    st.caption("Prazo = data de ingresso + meses e dias da regra do nível + prorrogações do aluno. "
+               "As regras também preenchem os prazos vazios na importação.")
+    regras = st.data_editor(carregar_regras(), num_rows="dynamic", hide_index=True, key="editor_regras_prazos",
+                            column_config={
+                                "nivel": st.column_config.SelectboxColumn("Nível", options=["Mestrado", "Doutorado"], required=True),
+                                "prazo": st.column_config.SelectboxColumn("Prazo", options=list(PRAZOS), required=True),
+                                "meses": st.column_config.NumberColumn("Meses", step=1, required=True),
+                                "dias": st.column_config.NumberColumn("Dias", step=1, default=0),
+                            })
+    st.button("Salvar regras", key="salvar_regras_prazos", on_click=salvar_regras_prazos_callback, args=(regras,))
+
+    st.markdown("**Prorrogação**")
+    aluno_id = seletor_aluno("Aluno", "prorrogacao_aluno_id")
+    col_prazo, col_meses, col_dias = st.columns([2, 1, 1])
+    col_prazo.selectbox("Prazo prorrogado", list(PRAZOS), format_func=PRAZOS.get, key="prorrogacao_prazo")
+    col_meses.number_input("Meses", min_value=0, step=1, key="prorrogacao_meses")
+    col_dias.number_input("Dias", min_value=0, step=1, key="prorrogacao_dias")
+    st.text_input("Motivo", key="prorrogacao_motivo")
+    st.button("Registrar prorrogação", on_click=registrar_prorrogacao_callback, args=(aluno_id,))
+
+    st.markdown("**Validação**")
+    st.button("Validar prazos de todos os alunos", on_click=validar_prazos_callback)
+    divergencias = st.session_state.get("divergencias_prazos")
+    if divergencias is None:
+        return
+    if divergencias.empty:
+        st.success("Todos os prazos conferem com as regras.")
+        return
+    st.warning(f"{len(divergencias)} prazo(s) diferente(s) do calculado pelas regras.")
+    st.dataframe(divergencias.assign(prazo=divergencias["prazo"].map(PRAZOS)), hide_index=True, use_container_width=True,
+                 column_config={"id": None, "nome": "Aluno", "nivel": "Nível", "prazo": "Prazo", "atual": "Gravado",
+                                "calculado": "Calculado", "situacao": "Situação"})
+    st.button(f"Corrigir {len(divergencias)} prazo(s)", on_click=corrigir_prazos_callback, type="primary")
+
+def linha_do_tempo_page():
+    """Página com a quantidade de prazos e ingressos por mês ou semestre; clicar numa barra lista os alunos."""
+    st.header("Linha do Tempo")
+
+    col_data, col_granularidade, col_divisao = st.columns([2, 1, 1])
+    coluna = col_data.radio("Data", list(DATAS_LINHA_DO_TEMPO), format_func=DATAS_LINHA_DO_TEMPO.get,
+                            horizontal=True, key="linha_tempo_data")
+    granularidade = col_granularidade.radio("Agrupar por", list(GRANULARIDADES),
+                                            format_func=lambda g: GRANULARIDADES[g][0],
+                                            horizontal=True, key="linha_tempo_granularidade")
+    divisao = col_divisao.selectbox("Dividir por", list(DIVISOES), format_func=lambda d: DIVISOES[d][0],
+                                    key="linha_tempo_divisao")
+    incluir_arquivados = st.checkbox("Incluir alunos arquivados", key="linha_tempo_arquivados")
+
+    # Contagens agrupadas no SQLite (strftime), em cache por versão dos dados
+    df = linha_do_tempo(coluna, granularidade, divisao, incluir_arquivados)
+    if df.empty:
+        st.info("Nenhum aluno com esta data preenchida.")
+        return
+
+    rotulo_periodo = GRANULARIDADES[granularidade][0]
+    selecao = alt.selection_point(name="barra", fields=["periodo", "grupo"])
+    grafico = alt.Chart(df).mark_bar().encode(
+        x=alt.X("periodo:O", title=rotulo_periodo),
+        y=alt.Y("quantidade:Q", title="Alunos"),
+        color=alt.Color("grupo:N", title=DIVISOES[divisao][0], legend=None if divisao is None else alt.Legend()),
+        opacity=alt.condition(selecao, alt.value(1.0), alt.value(0.4)),
+        tooltip=[alt.Tooltip("periodo:O", title=rotulo_periodo), alt.Tooltip("grupo:N", title=DIVISOES[divisao][0]),
+                 alt.Tooltip("quantidade:Q", title="Alunos")],
+    ).add_params(selecao)
+    evento = st.altair_chart(grafico, use_container_width=True, on_select="rerun",
+                             key=f"grafico_linha_tempo_{coluna}_{granularidade}_{divisao}_{incluir_arquivados}")
+
+    barras = evento.selection.get("barra") or []
+    if not barras:
+        st.caption("Clique em uma barra para ver os alunos do período.")
+        return
+
+    barra = barras[0]
+    alunos = alunos_no_periodo(coluna, barra["periodo"], divisao, barra.get("grupo"), incluir_arquivados)
+    titulo = f"{DATAS_LINHA_DO_TEMPO[coluna]} — {barra['periodo']}"
+    if divisao is not None:
+        titulo += f" — {barra.get('grupo')}"
+    st.subheader(titulo)
+    st.dataframe(alunos.assign(data=pd.to_datetime(alunos["data"], errors="coerce")), hide_index=True,
+                 use_container_width=True, column_config={
+                     "id": None, "nome": "Aluno", "nivel": "Nível", "orientador": "Orientador(a)",
+                     "linha_pesquisa": "Linha de Pesquisa", "data": st.column_config.DateColumn("Data", format="DD/MM/YYYY"),
+                     "arquivado": st.column_config.CheckboxColumn("Arquivado"),
+                 })
+
+def arquivo_alunos_page():
+    """Página para arquivar alunos egressos ou inativos (por critérios ou seleção) e restaurá-los."""
+    st.header("Arquivo de Alunos")
+    exibir_mensagens()
+    st.caption("Alunos arquivados saem das listas, buscas e indicadores, junto com seus aproveitamentos e "
+               "prorrogações. Relatórios históricos (ex.: Linha do Tempo) podem incluí-los.")
+
+    st.subheader("Arquivar")
+    col_nivel, col_turma, col_prazo = st.columns(3)
+    nivel = col_nivel.selectbox("Nível", [None, "Mestrado", "Doutorado"], format_func=lambda n: n or "Todos",
+                                key="arquivo_nivel")
+    turma = col_turma.text_input("Turma", key="arquivo_turma")
+    prazo = col_prazo.date_input("Prazo da tese antes de", value=None, format="DD/MM/YYYY", key="arquivo_prazo")
+    sem_pendencias = st.checkbox("Somente alunos sem aproveitamentos em análise", value=True, key="arquivo_sem_pendencias")
+    candidatos = alunos_para_arquivar(nivel, turma, prazo.isoformat() if prazo else None, sem_pendencias)
+    if candidatos.empty:
+        st.info("Nenhum aluno ativo atende aos critérios.")
+    else:
+        evento = st.dataframe(
+            candidatos.assign(prazo_defesa_tese=pd.to_datetime(candidatos["prazo_defesa_tese"], errors="coerce")),
+            hide_index=True, use_container_width=True, on_select="rerun", selection_mode="multi-row",
+            key="tabela_arquivar",
+            column_config={
+                "id": None, "nome": "Aluno", "nivel": "Nível", "turma": "Turma",
+                "prazo_defesa_tese": st.column_config.DateColumn("Prazo Tese", format="DD/MM/YYYY"),
+                "aproveitamentos": "Aproveitamentos",
+            }
+        )
+        selecionados = candidatos["id"].iloc[evento.selection.rows].tolist()
+        st.text_input("Motivo", placeholder="Ex.: titulado(a) em 2023", key="arquivo_motivo")
+        col_selecionados, col_todos = st.columns(2)
+        col_selecionados.button(f"Arquivar {len(selecionados)} selecionado(s)", disabled=not selecionados,
+                                on_click=arquivar_alunos_callback, args=(selecionados,))
+        col_todos.button(f"Arquivar todos os {len(candidatos)}", on_click=arquivar_alunos_callback,
+                         args=(candidatos["id"].tolist(),))
+
+    st.subheader("Arquivados")
+    arquivados = alunos_arquivados()
+    if arquivados.empty:
+        st.info("Nenhum aluno arquivado.")
+        return
+    evento = st.dataframe(
+        arquivados.assign(data_arquivamento=pd.to_datetime(arquivados["data_arquivamento"], errors="coerce")),
+        hide_index=True, use_container_width=True, on_select="rerun", selection_mode="multi-row",
+        key="tabela_arquivados",
+        column_config={
+            "id": None, "nome": "Aluno", "email": "E-mail", "nivel": "Nível", "turma": "Turma",
+            "data_arquivamento": st.column_config.DatetimeColumn("Arquivado em", format="DD/MM/YYYY"),
+            "motivo_arquivamento": "Motivo", "aproveitamentos": "Aproveitamentos",
+        }
+    )
+    selecionados = arquivados["id"].iloc[evento.selection.rows].tolist()
+    st.button(f"Restaurar {len(selecionados)} selecionado(s)", disabled=not selecionados,
+              on_click=restaurar_alunos_callback, args=(selecionados,))
+
 def import_page():
     """Página para importar alunos de arquivo Excel."""
     st.header("Importação de Alunos via Excel")
@@ -1050,95 +1864,105 @@ def import_page():
     - Alunos com e-mails ou matrículas já cadastrados serão ignorados.
     - Após o upload, será exibido um relatório com o resultado da importação.
     """)
+    exibir_mensagens()
 
     # Opção para recriar o banco antes de importar (USAR COM CUIDADO)
-    if st.checkbox("Apagar todos os dados existentes ANTES de importar? (Irreversível!)"):
-        if st.button("Confirmar e Apagar Banco de Dados"):
-            init_db(force_recreate=True)
-            st.success("Banco de dados apagado e recriado. Agora você pode importar o arquivo.")
-            st.experimental_rerun()
+    if st.checkbox("Apagar todos os dados existentes ANTES de importar? (Irreversível!)", key="confirmar_apagar_banco"):
+        st.button("Confirmar e Apagar Banco de Dados", on_click=recriar_banco_callback)
+
+    with st.expander("Manutenção do Banco de Dados"):
+        col_verificar, col_orfaos = st.columns(2)
+        if col_verificar.button("Verificar chaves estrangeiras", use_container_width=True):
+            violacoes = verificar_chaves_estrangeiras()
+            if violacoes.empty:
+                st.success("Nenhuma violação de chave estrangeira encontrada.")
+            else:
+                st.error(f"{len(violacoes)} violação(ões) de chave estrangeira encontrada(s).")
+                st.dataframe(violacoes, hide_index=True)
+        if col_orfaos.button("Remover aproveitamentos órfãos", use_container_width=True):
+            orfaos = varrer_orfaos()
+            if orfaos:
+                st.warning(f"{len(orfaos)} aproveitamento(s) órfão(s) removido(s).")
+                st.dataframe(pd.DataFrame(orfaos), hide_index=True)
+            else:
+                st.success("Nenhum aproveitamento órfão encontrado.")
+
+        st.markdown("**Backups**")
+        st.button("Fazer backup agora", on_click=backup_manual_callback)
+        recentes = listar_backups()
+        if recentes:
+            st.dataframe(pd.DataFrame(recentes).assign(tamanho=lambda df: df["tamanho"] / 2**20), hide_index=True,
+                         use_container_width=True, column_config={
+                             "caminho": "Arquivo", "motivo": "Motivo",
+                             "data": st.column_config.DatetimeColumn("Data", format="DD/MM/YYYY HH:mm:ss"),
+                             "tamanho": st.column_config.NumberColumn("Tamanho (MB)", format="%.1f"),
+                         })
+        st.caption("Para restaurar: python manutencao.py restaurar <arquivo> (o banco atual é salvo antes).")
+
+        st.markdown("**Otimização**")
+        st.caption("Executada automaticamente: ANALYZE depois de gravações grandes, vacuum incremental e "
+                   "checkpoint do WAL quando ninguém está gravando.")
+        st.button("Otimizar agora", on_click=otimizar_banco_callback)
+        st.dataframe(ultimas_execucoes(20), hide_index=True, use_container_width=True, column_config={
+            "inicio": "Início", "tarefa": "Tarefa",
+            "duracao_ms": st.column_config.NumberColumn("Duração (ms)", format="%.0f"), "detalhes": "Detalhes",
+        })
 
     uploaded_file = st.file_uploader("Selecione o arquivo Excel", type=["xlsx", "xls"])
+    ignorar_duplicados = st.checkbox("Não importar linhas com nome parecido com o de outro aluno (possíveis duplicados)",
+                                     key="ignorar_duplicados_importacao")
 
     if uploaded_file is not None:
         st.write(f"Arquivo selecionado: {uploaded_file.name}")
         if st.button("Iniciar Importação"):
             with st.spinner("Processando importação... Aguarde."):
-                # A inicialização normal (sem force_recreate) garante que a tabela e colunas existam
-                init_db() # Garante que a estrutura está ok
-                stats = import_alunos_from_excel(uploaded_file)
+                stats = import_alunos_from_excel(uploaded_file, ignorar_duplicados)
 
             st.success(f"Importação concluída! {stats['importados']} alunos importados, {stats['ignorados']} ignorados/erros.")
 
+            if stats["possiveis_duplicados"]:
+                st.subheader("Possíveis Duplicados")
+                st.caption("Nomes semelhantes a alunos cadastrados ou arquivados (ID) ou a linhas anteriores da planilha, do mais ao menos parecido.")
+                st.dataframe(pd.DataFrame(stats["possiveis_duplicados"]), hide_index=True, use_container_width=True, column_config={
+                    "linha": "Linha", "nome": "Nome na Planilha", "origem": "Encontrado em", "referencia": "ID/Linha",
+                    "semelhante_a": "Nome Semelhante",
+                    "similaridade": st.column_config.ProgressColumn("Similaridade", min_value=0, max_value=1, format="%.2f"),
+                })
+
             if stats["erros"]:
                 st.subheader("Detalhes dos Erros/Alertas da Importação")
                 # Usar expander para não poluir a tela
                 with st.expander("Clique para ver os detalhes"):
                     for erro in stats["erros"]:
                         st.warning(erro)
-            # Recarregar a lista de alunos em outras páginas se necessário
-            st.experimental_rerun()
 
 def dashboard_page():
     """Página do dashboard para visualização de dados do aluno."""
     st.header("Dashboard do Aluno")
 
-    alunos_list = get_all_alunos()
-    if not alunos_list:
+    alunos_nomes = get_snapshot().nomes_alunos
+    if not alunos_nomes:
         st.warning("Nenhum aluno cadastrado para exibir no dashboard.")
         return
 
-    alunos_dict = {aluno["nome"]: aluno["id"] for aluno in alunos_list}
-    # Manter o aluno selecionado no estado da sessão
-    if "selected_aluno_id_dashboard" not in st.session_state or st.session_state["selected_aluno_id_dashboard"] not in alunos_dict.values():
-        st.session_state["selected_aluno_id_dashboard"] = alunos_list[0]["id"] # Seleciona o primeiro por padrão ou se o anterior foi excluído
-
-    # Obter o nome do aluno correspondente ao ID selecionado
-    selected_aluno_nome = next((nome for nome, id_ in alunos_dict.items() if id_ == st.session_state["selected_aluno_id_dashboard"]), list(alunos_dict.keys())[0])
-
-    # Selectbox para escolher o aluno
-    aluno_selecionado_nome_atual = st.selectbox(
-        "Selecione o Aluno",
-        list(alunos_dict.keys()),
-        index=list(alunos_dict.keys()).index(selected_aluno_nome)
-    )
-
-    # Atualizar o ID selecionado no estado da sessão se o nome mudar
-    if aluno_selecionado_nome_atual != selected_aluno_nome:
-        st.session_state["selected_aluno_id_dashboard"] = alunos_dict[aluno_selecionado_nome_atual]
-        st.experimental_rerun() # Recarrega para atualizar os dados
-
-    aluno_id = st.session_state["selected_aluno_id_dashboard"]
+    # O aluno selecionado fica no estado da sessão pela chave do próprio selectbox
+    # (sem seleção válida, o seletor escolhe o primeiro da lista)
+    aluno_id = seletor_aluno("Selecione o Aluno", "selected_aluno_id_dashboard")
+    if aluno_id is None:
+        return
     aluno = get_aluno(aluno_id)
-    resumo = get_resumo_aproveitamentos(aluno_id)
 
     if not aluno:
         st.error("Erro ao carregar dados do aluno. Ele pode ter sido excluído.")
-        # Resetar seleção para o primeiro aluno
-        if alunos_list:
-            st.session_state["selected_aluno_id_dashboard"] = alunos_list[0]["id"]
-        else:
-             if "selected_aluno_id_dashboard" in st.session_state: del st.session_state["selected_aluno_id_dashboard"]
-        st.experimental_rerun()
         return
 
     # Botões de Ação: Editar e Exportar PDF
     col_btn1, col_btn2, _ = st.columns([1, 1, 5])
-    if col_btn1.button("✏️ Editar Dados do Aluno", key="edit_dash"):
-        # Navegar para a página de cadastro/edição com este aluno selecionado
-        st.session_state["selected_page"] = "Cadastro de Alunos"
-        # Passar o nome do aluno para pré-selecionar
-        st.session_state["edit_aluno_nome"] = aluno["nome"]
-        st.experimental_rerun()
-
-    pdf_bytes = gerar_pdf_dashboard(aluno, resumo)
-    col_btn2.download_button(
-        label="📄 Exportar PDF",
-        data=pdf_bytes,
-        file_name=f"dashboard_{aluno['nome'].replace(' ', '_')}.pdf",
-        mime="application/pdf",
-        key="pdf_dash"
-    )
+    # Navegar para a página de cadastro/edição com este aluno selecionado
+    col_btn1.button("✏️ Editar Dados do Aluno", key="edit_dash", on_click=editar_aluno_callback, args=(aluno_id,))
+
+    with col_btn2:
+        dashboard_exportar_pdf(aluno_id)
 
     st.divider()
 
@@ -1163,60 +1987,136 @@ def dashboard_page():
         st.markdown(f"**Prazo Tese:** {prazo_tese_str}")
 
     with col2:
+        dashboard_resumo(aluno_id)
+
+    st.divider()
+    dashboard_detalhes(aluno_id)
+
+# Cada seção do dashboard é um fragmento: uma interação dentro dela reexecuta
+# apenas o fragmento (suas consultas e sua renderização), e não o script todo.
+
+@st.fragment
+def dashboard_exportar_pdf(aluno_id):
+    """Fragmento do dashboard: geração sob demanda e download do PDF."""
+    with medir_tempo("Dashboard: PDF"):
+        if not st.button("📄 Gerar PDF", key="gerar_pdf_dash"):
+            return
+        aluno = get_aluno(aluno_id)
+        if not aluno:
+            st.error("Aluno não encontrado.")
+            return
+        resumo = get_resumo_aproveitamentos(aluno_id)
+        pdf_bytes = gerar_pdf_dashboard(aluno, resumo)
+        st.download_button(
+            label="⬇️ Baixar PDF",
+            data=pdf_bytes,
+            file_name=f"dashboard_{aluno['nome'].replace(' ', '_')}.pdf",
+            mime="application/pdf",
+            key="pdf_dash"
+        )
+
+@st.fragment
+def dashboard_resumo(aluno_id):
+    """Fragmento do dashboard: métricas e gráfico de status dos aproveitamentos."""
+    with medir_tempo("Dashboard: resumo"):
+        resumo = get_resumo_aproveitamentos(aluno_id)
+
         st.subheader("Resumo dos Aproveitamentos")
         st.metric("Disciplinas Aproveitadas (Créditos)", resumo["disciplinas"]["creditos"])
         st.metric("Disciplinas Aproveitadas (Horas)", resumo["disciplinas"]["horas"])
         st.metric("Idiomas Aprovados", resumo["idiomas"]["aprovados"])
 
-        # Gráfico de Pizza - Status Disciplinas
-        labels_disc = ["Deferidos", "Pendentes"]
-        sizes_disc = [resumo["disciplinas"]["deferidos"], resumo["disciplinas"]["pendentes"]]
-        colors_disc = ["#4CAF50", "#FFC107"] # Verde, Amarelo
+        requisitos = resumo["requisitos"]
+        if requisitos and not pd.isna(requisitos["creditos_exigidos"]):
+            st.markdown(f"**Requisitos do nível ({requisitos['nivel']})**")
+            col_creditos, col_limite, col_idiomas = st.columns(3)
+            col_creditos.metric("Créditos restantes", requisitos["creditos_restantes"],
+                                help=f"{requisitos['creditos_exigidos']} exigidos, descontados os aproveitados")
+            if pd.isna(requisitos["limite_aproveitamento"]):
+                col_limite.metric("Limite de aproveitamento", "Sem limite")
+            else:
+                col_limite.metric("Aproveitamento disponível", requisitos["limite_disponivel"],
+                                  help=f"Limite de {requisitos['limite_aproveitamento']} créditos; "
+                                       f"{requisitos['creditos_excedentes']} deferido(s) acima do limite")
+            col_idiomas.metric("Idiomas restantes", requisitos["idiomas_restantes"],
+                               help=f"{requisitos['idiomas_exigidos']} idioma(s) exigido(s)")
+
+        grafico = st.radio("Gráfico de status", ["Disciplinas", "Idiomas"], horizontal=True, key="grafico_dash")
+
+        # Gráfico de Pizza - Status
+        if grafico == "Disciplinas":
+            labels = ["Deferidos", "Pendentes"]
+            sizes = [resumo["disciplinas"]["deferidos"], resumo["disciplinas"]["pendentes"]]
+        else:
+            labels = ["Aprovados", "Pendentes"]
+            sizes = [resumo["idiomas"]["aprovados"], resumo["idiomas"]["pendentes"]]
+        colors = ["#4CAF50", "#FFC107"] # Verde, Amarelo
         # Remover categorias com valor zero para evitar erro no gráfico
-        valid_disc_indices = [i for i, size in enumerate(sizes_disc) if size > 0]
-        labels_disc_valid = [labels_disc[i] for i in valid_disc_indices]
-        sizes_disc_valid = [sizes_disc[i] for i in valid_disc_indices]
-        colors_disc_valid = [colors_disc[i] for i in valid_disc_indices]
+        valid_indices = [i for i, size in enumerate(sizes) if size > 0]
+        labels_valid = [labels[i] for i in valid_indices]
+        sizes_valid = [sizes[i] for i in valid_indices]
+        colors_valid = [colors[i] for i in valid_indices]
 
-        if sum(sizes_disc_valid) > 0:
+        if sum(sizes_valid) > 0:
             fig1, ax1 = plt.subplots()
-            ax1.pie(sizes_disc_valid, labels=labels_disc_valid, autopct="%1.1f%%", startangle=90, colors=colors_disc_valid)
+            ax1.pie(sizes_valid, labels=labels_valid, autopct="%1.1f%%", startangle=90, colors=colors_valid)
             ax1.axis("equal") # Equal aspect ratio ensures that pie is drawn as a circle.
             st.pyplot(fig1)
+            plt.close(fig1)
         else:
-            st.caption("Nenhuma disciplina registrada.")
-
-    st.divider()
-    st.subheader("Detalhes dos Aproveitamentos")
+            st.caption(f"Nenhum registro de {grafico.lower()}.")
+
+@st.fragment
+def dashboard_detalhes(aluno_id):
+    """Fragmento do dashboard: tabelas de disciplinas e idiomas, com filtro por status."""
+    with medir_tempo("Dashboard: detalhes"):
+        st.subheader("Detalhes dos Aproveitamentos")
+        status_filtro = st.multiselect(
+            "Filtrar por status",
+            [s.value for s in StatusAproveitamento],
+            key="status_filtro_dash"
+        )
+        disciplinas = get_detalhes_aproveitamentos(aluno_id, TipoAproveitamento.DISCIPLINA.value, status_filtro)
+        idiomas = get_detalhes_aproveitamentos(aluno_id, TipoAproveitamento.IDIOMA.value, status_filtro)
 
-    # Tabela de Disciplinas
-    st.markdown("**Disciplinas**")
-    if resumo["detalhes"]["disciplinas"]:
-        df_disciplinas = pd.DataFrame(resumo["detalhes"]["disciplinas"])
-        st.dataframe(df_disciplinas[["nome", "codigo", "creditos", "horas", "instituicao", "status", "processo"]], use_container_width=True)
-    else:
-        st.info("Nenhuma disciplina aproveitada registrada.")
+        # Tabela de Disciplinas
+        st.markdown("**Disciplinas**")
+        if disciplinas.num_rows:
+            st.dataframe(disciplinas, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhuma disciplina aproveitada registrada.")
 
-    # Tabela de Idiomas
-    st.markdown("**Idiomas**")
-    if resumo["detalhes"]["idiomas"]:
-        df_idiomas = pd.DataFrame(resumo["detalhes"]["idiomas"])
-        st.dataframe(df_idiomas[["idioma", "nota", "instituicao", "status", "processo"]], use_container_width=True)
-    else:
-        st.info("Nenhum idioma aproveitado registrado.")
+        # Tabela de Idiomas
+        st.markdown("**Idiomas**")
+        if idiomas.num_rows:
+            st.dataframe(idiomas, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhum idioma aproveitado registrado.")
 
 # --- Controle Principal da Aplicação ---
 
-# Inicializar o banco de dados na primeira execução ou se o arquivo não existir
-# A função init_db agora verifica e adiciona colunas se necessário
-if "db_initialized" not in st.session_state or not os.path.exists(DB_FILE):
-    print("Executando init_db() pela primeira vez ou porque o arquivo DB não existe...")
+@st.cache_resource(show_spinner=False)
+def _inicializar_banco(db_file, inode):
+    """Executa init_db uma vez por processo e arquivo de banco.
+
+    init_db grava por uma conexão própria, fora do escritor único; a cada rerun de
+    cada sessão, disputaria o lock com as escritas. Um banco apagado ou recriado
+    (force_recreate) tem outro inode e é inicializado de novo.
+    """
+    print(f"Executando init_db() para {db_file}...")
     init_db() # Não força recriação por padrão
-    st.session_state["db_initialized"] = True
-else:
-    # Em execuções subsequentes, apenas verifica a estrutura
-    # print("Verificando estrutura do DB...")
-    init_db() # Chama para garantir que colunas como 'nivel' existam
+    return True
+
+if not os.path.exists(DB_FILE):
+    conectar().close() # Cria o arquivo: o inode dele identifica o banco já na primeira execução
+_inicializar_banco(os.path.abspath(DB_FILE), os.stat(DB_FILE).st_ino)
+
+# Varredura de aproveitamentos órfãos: imediata na primeira execução do processo, depois periódica
+iniciar_varredura_periodica()
+# Backup periódico (com rotação), uma thread por processo
+iniciar_backup_periodico()
+# ANALYZE depois de gravações grandes, vacuum incremental e checkpoint do WAL em momentos sem escrita
+iniciar_otimizacao_periodica()
 
 # Verificar estado de login
 if "logged_in" not in st.session_state:
@@ -1236,38 +2136,26 @@ else:
         "Dashboard": dashboard_page,
         "Cadastro de Alunos": cadastro_alunos_page,
         "Aproveitamentos": aproveitamento_page,
+        "Fluxo de Aprovação": aprovacoes_page,
+        "Indicadores do Programa": indicadores_programa_page,
+        "Monitor de Prazos": monitor_prazos_page,
+        "Linha do Tempo": linha_do_tempo_page,
+        "Arquivo de Alunos": arquivo_alunos_page,
         "Importar Alunos": import_page
     }
 
-    # Manter a página selecionada no estado da sessão
-    if "selected_page" not in st.session_state:
+    # A página selecionada fica no estado da sessão pela chave do próprio radio
+    if st.session_state.get("selected_page") not in pages:
         st.session_state["selected_page"] = "Dashboard"
 
-    selected_page_label = st.sidebar.radio("Navegação", list(pages.keys()), index=list(pages.keys()).index(st.session_state["selected_page"]))
-
-    # Atualizar a página selecionada no estado da sessão
-    if selected_page_label != st.session_state["selected_page"]:
-        st.session_state["selected_page"] = selected_page_label
-        # Limpar estado de edição ao mudar de página
-        if "edit_aluno_nome" in st.session_state:
-            del st.session_state["edit_aluno_nome"]
-        st.experimental_rerun()
+    st.sidebar.radio("Navegação", list(pages.keys()), key="selected_page", on_change=mudar_pagina_callback)
 
     # Chamar a função da página selecionada
     page_function = pages[st.session_state["selected_page"]]
 
-    # Passar o nome do aluno para pré-selecionar na página de cadastro, se vindo do dashboard
-    # A lógica dentro de cadastro_alunos_page já usa st.selectbox com o nome
-
-    page_function()
+    with medir_tempo(f"Página completa: {st.session_state['selected_page']}"):
+        page_function()
+    display_tempos_execucao()
 
     # Botão de Logout
-    if st.sidebar.button("Logout"):
-        # Limpar todo o estado da sessão ao fazer logout
-        keys_to_keep = [] # Manter alguma chave se necessário?
-        for key in list(st.session_state.keys()):
-            if key not in keys_to_keep:
-                del st.session_state[key]
-        st.session_state["logged_in"] = False # Garantir que logged_in seja False
-        st.experimental_rerun()
-
+    st.sidebar.button("Logout", on_click=logout_callback)
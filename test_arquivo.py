@@ -0,0 +1,66 @@
+"""Testes do arquivo de alunos inativos (arquivo.py)."""
+import sqlite3
+
+import pytest
+
+from arquivo import alunos_arquivados, alunos_para_arquivar, arquivar_alunos, proximo_id, restaurar_alunos
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    INSERT INTO alunos (id, nome, email, nivel, turma, prazo_defesa_tese) VALUES
+        (1, 'Ana', 'ana@ufsm.br', 'Mestrado', '2019', '2023-03-01'),
+        (2, 'Bruno', 'bruno@ufsm.br', 'Mestrado', '2019', '2023-03-01'),
+        (3, 'Carla', 'carla@ufsm.br', 'Doutorado', '2024', '2028-03-01');
+    INSERT INTO aproveitamentos (id, aluno_id, tipo, status) VALUES
+        (1, 1, 'disciplina', 'deferido'), (2, 2, 'disciplina', 'solicitado'), (3, 3, 'idioma', 'deferido');
+    INSERT INTO prorrogacoes_prazo (id, aluno_id, prazo, meses) VALUES (1, 1, 'prazo_defesa_tese', 6);
+    """)
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_arquivar_e_restaurar_com_aproveitamentos(db_file):
+    # Bruno tem aproveitamento em análise; Carla não atende ao prazo
+    candidatos = alunos_para_arquivar(nivel="Mestrado", prazo_tese_antes_de="2024-01-01")
+    assert candidatos["nome"].tolist() == ["Ana"]
+    assert alunos_para_arquivar(turma="2019", sem_pendencias=False)["nome"].tolist() == ["Ana", "Bruno"]
+
+    assert arquivar_alunos([1, 3], motivo="Titulação") == 2
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT id FROM alunos").fetchall() == [(2,)]
+    assert conn.execute("SELECT aluno_id FROM aproveitamentos").fetchall() == [(2,)]
+    assert conn.execute("SELECT COUNT(*) FROM prorrogacoes_prazo").fetchone() == (0,)
+    assert conn.execute("SELECT id, arquivado FROM alunos_historico ORDER BY id").fetchall() == [(1, 1), (2, 0), (3, 1)]
+    assert conn.execute("SELECT COUNT(*) FROM aproveitamentos_historico").fetchone() == (3,)
+    # Um aluno novo não herda o ID do arquivado
+    assert proximo_id(conn, "alunos") == 4
+    arquivados = alunos_arquivados()
+    assert arquivados["motivo_arquivamento"].tolist() == ["Titulação", "Titulação"]
+    assert arquivados["aproveitamentos"].tolist() == [1, 1]
+
+    assert restaurar_alunos([1]) == 1
+    assert conn.execute("SELECT id FROM alunos ORDER BY id").fetchall() == [(1,), (2,)]
+    assert conn.execute("SELECT meses FROM prorrogacoes_prazo WHERE aluno_id = 1").fetchall() == [(6,)]
+    # O aproveitamento restaurado mantém o histórico, sem um novo status inicial
+    assert conn.execute("SELECT COUNT(*) FROM aproveitamento_events WHERE aproveitamento_id = 1").fetchone() == (1,)
+    # A verificação de duplicados da importação usa os índices, também no arquivo
+    plano = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM alunos_historico WHERE email = 'ana@ufsm.br'").fetchall()
+    assert not any("SCAN" in linha[-1] for linha in plano)
+    conn.close()
+
+
+def test_restauracao_com_conflito_nao_grava_nada(db_file):
+    arquivar_alunos([3])
+    conn = sqlite3.connect(db_file)
+    conn.execute("INSERT INTO alunos (id, nome, email) VALUES (4, 'Carla', 'carla@ufsm.br')") # Recadastrada
+    conn.commit()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        restaurar_alunos([3])
+    assert conn.execute("SELECT id FROM alunos_arquivo").fetchall() == [(3,)]
+    assert conn.execute("SELECT COUNT(*) FROM aproveitamentos WHERE aluno_id = 3").fetchone() == (0,)
+    conn.close()
@@ -0,0 +1,59 @@
+"""Testes da busca textual FTS5 (busca.py)."""
+import sqlite3
+
+import pytest
+
+from busca import buscar_alunos, buscar_aproveitamentos, consulta_fts, criar_indice_busca
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    -- Aluno cadastrado antes do índice de busca
+    DROP TRIGGER alunos_fts_insert; DROP TRIGGER alunos_fts_delete; DROP TRIGGER alunos_fts_update;
+    DROP TABLE alunos_fts;
+    INSERT INTO alunos (id, nome, email, matricula, orientador, linha_pesquisa) VALUES
+        (1, 'João Conceição', 'joao@ufsm.br', '2024001', 'Márcia Silva', 'Gestão Pública');
+    """)
+    criar_indice_busca(conn.cursor()) # Indexa o aluno já existente
+    conn.executescript("""
+    INSERT INTO alunos (id, nome, email, matricula, orientador, linha_pesquisa) VALUES
+        (2, 'Joana Prado', 'joana@ufsm.br', '2024002', 'João Batista', 'Finanças');
+    INSERT INTO aproveitamentos (id, aluno_id, tipo, nome_disciplina, codigo_disciplina, idioma, instituicao,
+                                 numero_processo, observacoes, status) VALUES
+        (1, 1, 'disciplina', 'Estatística Aplicada', 'ADM101', NULL, 'UFRGS', '23081.000001/2025-07', NULL, 'solicitado'),
+        (2, 2, 'idioma', NULL, NULL, 'Inglês', 'UFSM', '23081.000002/2025-77', 'Proficiência', 'solicitado');
+    """)
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_consulta_fts_trata_operadores_como_texto():
+    assert consulta_fts('joão "OR" ana*') == '"joão"* "OR"* "ana"*'
+    assert consulta_fts(" -- ") is None
+
+
+def test_busca_sem_acentos_por_prefixo_e_ranking(db_file):
+    # Nome pesa mais que orientador: o aluno João vem antes da orientanda de João Batista
+    assert buscar_alunos("joao") == [1, 2]
+    assert buscar_alunos("conc jo") == [1]
+    assert buscar_alunos("financas") == [2]
+    assert buscar_aproveitamentos("estatistica") == [1]
+    assert buscar_aproveitamentos("ingl ufsm") == [2]
+
+
+def test_indice_acompanha_alteracoes(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("UPDATE alunos SET nome = 'Joana Prado Lima' WHERE id = 2")
+    conn.execute("UPDATE aproveitamentos SET status = 'deferido' WHERE id = 2")
+    conn.execute("DELETE FROM alunos WHERE id = 1") # Remove também o aproveitamento 1 (cascata)
+    conn.commit()
+    conn.close()
+
+    assert buscar_alunos("lima") == [2]
+    assert buscar_alunos("conceicao") == []
+    assert buscar_aproveitamentos("estatistica") == []
+    assert buscar_aproveitamentos("ingles") == [2]
@@ -0,0 +1,49 @@
+"""Testes dos indicadores por coorte (coortes.py)."""
+import sqlite3
+
+import pytest
+
+from coortes import alunos_da_coorte, indicadores_por_coorte
+from dimensoes import criar_tabelas_dimensoes
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    INSERT INTO alunos (id, nome, email, nivel, turma, orientador) VALUES
+        (1, 'Ana', 'ana@ufsm.br', 'Mestrado', '2024', 'Márcia Silva'),
+        (2, 'Bruno', 'bruno@ufsm.br', 'Mestrado', '', 'MARCIA SILVA'),
+        (3, 'Carla', 'carla@ufsm.br', 'Doutorado', NULL, NULL);
+    INSERT INTO aproveitamentos (aluno_id, tipo, creditos, status) VALUES
+        (1, 'disciplina', 4, 'deferido'), (1, 'disciplina', 2, 'solicitado'),
+        (2, 'idioma', NULL, 'deferido'), (3, 'disciplina', 3, 'indeferido');
+    """)
+    criar_tabelas_dimensoes(conn.cursor()) # Vincula os orientadores digitados à dimensão
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_indicadores_agrupados_e_detalhamento(db_file):
+    por_orientador = indicadores_por_coorte("orientador")
+    assert len(por_orientador) == 2 # As duas grafias da orientadora formam um só grupo
+    marcia = por_orientador.iloc[0]
+    assert [marcia["alunos"], marcia["creditos_deferidos"], marcia["idiomas_deferidos"], marcia["pendentes"]] == [2, 4, 1, 1]
+    assert por_orientador.iloc[1]["grupo"] == "Não informado"
+
+    por_turma = indicadores_por_coorte("turma").set_index("grupo")
+    assert por_turma.loc["Não informado", "alunos"] == 2 # Vazio e NULL no mesmo grupo
+    chave = por_turma.loc["Não informado", "chave"]
+    assert alunos_da_coorte("turma", chave)["nome"].tolist() == ["Bruno", "Carla"]
+
+
+def test_cache_renovado_quando_os_dados_mudam(db_file):
+    assert indicadores_por_coorte("nivel").set_index("grupo").loc["Doutorado", "alunos"] == 1
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("INSERT INTO alunos (nome, email, nivel) VALUES ('Davi', 'davi@ufsm.br', 'Doutorado')")
+    conn.commit()
+    conn.close()
+
+    assert indicadores_por_coorte("nivel").set_index("grupo").loc["Doutorado", "alunos"] == 2
@@ -0,0 +1,80 @@
+"""Testes do escritor único (db_writer.py)."""
+import sqlite3
+import threading
+
+import pytest
+
+import db_writer
+from db_writer import DatabaseWriter, ao_confirmar
+
+@pytest.fixture
+def writer(tmp_path):
+    db_file = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE alunos (id INTEGER PRIMARY KEY, email TEXT UNIQUE)")
+    conn.close()
+    return DatabaseWriter(db_file)
+
+def _inserir(conn, email):
+    return conn.execute("INSERT INTO alunos (email) VALUES (?)", (email,)).lastrowid
+
+def _contar(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM alunos").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_escritas_concorrentes_sem_lock(writer):
+    erros = []
+
+    def sessao(n):
+        try:
+            for i in range(50):
+                writer.executar(_inserir, f"s{n}-{i}@x")
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=sessao, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert erros == []
+    assert _contar(writer.db_file) == 400
+
+def test_erro_de_uma_operacao_nao_desfaz_o_lote(writer):
+    futuros = [writer.submit(_inserir, email) for email in ["a@x", "a@x", "b@x"]]
+
+    assert futuros[0].result() is not None
+    with pytest.raises(sqlite3.IntegrityError):
+        futuros[1].result()
+    assert futuros[2].result() is not None
+    assert _contar(writer.db_file) == 2
+
+def _fechar_conexao(conn):
+    conn.close()
+    raise RuntimeError("falha no meio do lote")
+
+def test_falha_ao_desfazer_savepoint_nao_derruba_o_escritor(writer):
+    liberar = threading.Event()
+    writer.submit(lambda conn: liberar.wait(5)) # Segura o escritor para as três entrarem no mesmo lote
+    futuros = [writer.submit(_inserir, "a@x"), writer.submit(_fechar_conexao), writer.submit(_inserir, "b@x")]
+    liberar.set()
+
+    for futuro in futuros: # O lote inteiro falha (a transação foi perdida com a conexão)
+        with pytest.raises(Exception):
+            futuro.result(timeout=5)
+    assert writer.executar(_inserir, "c@x") is not None
+    assert _contar(writer.db_file) == 1
+
+def test_funcoes_chamadas_apos_commit_com_alteracoes(writer, monkeypatch):
+    monkeypatch.setattr(db_writer, "_apos_commit", [])
+    chamadas = []
+    ao_confirmar(lambda db_file: chamadas.append(_contar(db_file)))
+
+    writer.executar(lambda conn: conn.execute("SELECT 1").fetchone()) # Sem alterações: nada a publicar
+    writer.executar(_inserir, "a@x")
+    writer.executar(lambda conn: None) # As funções rodam na thread do escritor, antes do próximo lote
+    assert chamadas == [1] # Já enxerga o commit
@@ -0,0 +1,47 @@
+"""Testes das dimensões de orientadores e linhas de pesquisa (dimensoes.py)."""
+import sqlite3
+
+from dimensoes import criar_tabelas_dimensoes, resolver_dimensoes, vincular_dimensoes
+
+
+def _banco(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    INSERT INTO alunos (nome, email, orientador, linha_pesquisa) VALUES
+        ('A', 'a@ufsm.br', 'Márcia Silva', 'Gestão Pública'),
+        ('B', 'b@ufsm.br', 'Márcia Silva', 'Gestao publica'),
+        ('C', 'c@ufsm.br', 'MARCIA  SILVA', NULL),
+        ('D', 'd@ufsm.br', 'Paulo de Souza', ' ');
+    """)
+    criar_tabelas_dimensoes(conn.cursor()) # Migra os textos digitados antes das dimensões
+    return conn
+
+
+def test_migracao_unifica_grafias(db_file):
+    conn = _banco(db_file)
+
+    assert conn.execute("SELECT id, nome, chave FROM orientadores ORDER BY id").fetchall() == [
+        (1, "Márcia Silva", "marcia silva"), (2, "Paulo de Souza", "paulo souza")
+    ]
+    assert conn.execute("SELECT orientador_id, linha_pesquisa_id FROM alunos ORDER BY id").fetchall() == [
+        (1, 1), (1, 1), (1, None), (2, None)
+    ]
+    plano = " ".join(linha[3] for linha in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM alunos WHERE orientador_id = 1"))
+    assert "idx_alunos_orientador_id" in plano
+
+    criar_tabelas_dimensoes(conn.cursor()) # Idempotente
+    assert conn.execute("SELECT COUNT(*) FROM orientadores").fetchone()[0] == 2
+    conn.close()
+
+
+def test_vinculo_na_escrita_e_mapa_da_importacao(db_file):
+    conn = _banco(db_file)
+
+    dados = vincular_dimensoes(conn, {"nome": "E", "orientador": "marcia silva", "linha_pesquisa": "Finanças"})
+    assert (dados["orientador_id"], dados["linha_pesquisa_id"]) == (1, 2)
+    assert vincular_dimensoes(conn, {"nome": "F"}) == {"nome": "F"} # Campos ausentes não são tocados
+
+    mapas = resolver_dimensoes(conn, {"orientador": ["Márcia Silva", "Ana Prado", "Ana  Prado"]})
+    assert mapas == {"orientador": {"marcia silva": 1, "ana prado": 3}}
+    conn.close()
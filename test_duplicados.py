@@ -0,0 +1,32 @@
+"""Testes da detecção de possíveis duplicados por nome (duplicados.py)."""
+from duplicados import chaves_bloco, normalizar_nome, possiveis_duplicados
+
+
+def test_normalizacao_e_chaves():
+    assert normalizar_nome("Anderson Luís Raldi da Morrudo") == ["anderson", "luis", "raldi", "morrudo"]
+    assert "anderson morrudo" in chaves_bloco(normalizar_nome("ANDERSON L. RALDI MORRUDO"))
+
+
+def test_possiveis_duplicados_ranqueados():
+    existentes = [(1, "Anderson Luís Raldi Morrudo"), (2, "Maria da Silva"), (3, "Mariana Souza")]
+    novos = [
+        (2, "ANDERSON LUIS RALDI MORRUDO"),
+        (3, "Anderson L. Raldi Morrudo"),
+        (4, "Pedro Henrique Alves"),
+        (5, "Pedro Henrique Alves Neto"),
+    ]
+
+    relatorio = possiveis_duplicados(novos, existentes)
+    pares = [(item["linha"], item["origem"], item["referencia"]) for item in relatorio]
+
+    assert pares[0] == (2, "Cadastro", 1) and relatorio[0]["similaridade"] == 1.0
+    assert (3, "Cadastro", 1) in pares
+    assert (5, "Planilha", 4) in pares # Repetição dentro da própria planilha
+    assert all(item["referencia"] not in (2, 3) or item["origem"] == "Planilha" for item in relatorio)
+    assert [item["similaridade"] for item in relatorio] == sorted((item["similaridade"] for item in relatorio), reverse=True)
+
+
+def test_possiveis_duplicados_no_arquivo():
+    existentes = [(1, "Anderson Luís Raldi Morrudo"), (7, "Maria da Silva Pereira")]
+    relatorio = possiveis_duplicados([(2, "Maria Silva Pereira")], existentes, arquivados=[7])
+    assert [(item["origem"], item["referencia"]) for item in relatorio] == [("Arquivo", 7)]
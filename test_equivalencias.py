@@ -0,0 +1,82 @@
+"""Testes das regras de créditos e requisitos por nível (equivalencias.py)."""
+import sqlite3
+
+import pytest
+
+from equivalencias import (HORAS_APROVEITAMENTO_SQL, REGRAS_CREDITOS_EXEMPLO, criar_tabela_regras_creditos,
+                           salvar_regras_creditos, situacao_aluno, situacao_creditos)
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    INSERT INTO alunos (id, nome, email, nivel) VALUES
+        (1, 'Ana', 'ana@ufsm.br', 'Mestrado'), (2, 'Bruno', 'bruno@ufsm.br', 'Doutorado '),
+        (3, 'Carla', 'carla@ufsm.br', 'Especialização');
+    INSERT INTO aproveitamentos (aluno_id, tipo, creditos, idioma, status) VALUES
+        (1, 'disciplina', 8, NULL, 'deferido'), (1, 'disciplina', 6, NULL, 'deferido'),
+        (1, 'disciplina', 2, NULL, 'solicitado'), (1, 'idioma', NULL, 'Inglês', 'deferido'),
+        (2, 'idioma', NULL, 'Inglês', 'deferido'), (2, 'idioma', NULL, ' inglês', 'deferido'),
+        (3, 'disciplina', 4, NULL, 'deferido');
+    """)
+    conn.commit()
+    conn.close()
+    salvar_regras_creditos([("Mestrado", 15, 24, 12, 1), ("Doutorado", 15, 48, 24, 2)])
+    return db_file
+
+
+def test_totais_restantes_e_indicadores_de_todos_os_alunos(db_file):
+    df = situacao_creditos().set_index("nome")
+
+    ana = df.loc["Ana"]
+    # 14 deferidos, mas o limite do mestrado é 12: 2 excedentes e 12 para cumprir no curso
+    assert [ana["creditos_aproveitados"], ana["creditos_excedentes"], ana["creditos_em_analise"]] == [12, 2, 2]
+    assert [ana["horas_aproveitadas"], ana["creditos_restantes"], ana["idiomas_restantes"]] == [180, 12, 0]
+    assert [bool(ana["limite_atingido"]), bool(ana["creditos_ok"]), bool(ana["idiomas_ok"])] == [True, False, True]
+
+    # O mesmo idioma aprovado duas vezes conta uma; o doutorado exige dois
+    assert df.loc["Bruno", "idiomas_restantes"] == 1
+    # Nível sem regra: sem requisitos nem indicadores
+    assert df.loc["Carla", "creditos_aproveitados"] == 4
+    assert df.loc["Carla", ["creditos_restantes", "limite_atingido"]].isna().all()
+
+    assert situacao_creditos("limite_atingido")["nome"].tolist() == ["Ana"]
+    assert situacao_creditos("idiomas_pendentes")["nome"].tolist() == ["Bruno"]
+    assert situacao_creditos("sem_regra")["nome"].tolist() == ["Carla"]
+    assert situacao_aluno(2)["idiomas_deferidos"] == 1
+    assert [ana["disciplinas"], ana["disciplinas_deferidas"], ana["horas_deferidas"]] == [3, 2, 210]
+
+
+def test_regras_editadas_mudam_o_calculo(db_file):
+    salvar_regras_creditos([("Mestrado", 10, 24, None, 1), ("Especialização", 15, 4, 4, 0)])
+
+    ana = situacao_aluno(1)
+    assert [ana["creditos_aproveitados"], ana["horas_aproveitadas"], ana["creditos_restantes"]] == [14, 140, 10]
+    assert situacao_aluno(3)["creditos_ok"]
+
+    conn = sqlite3.connect(db_file)
+    horas = conn.execute(f"SELECT {HORAS_APROVEITAMENTO_SQL} FROM aproveitamentos WHERE aluno_id = 1 ORDER BY id").fetchall()
+    conn.close()
+    assert [h for (h,) in horas] == [80, 60, 20, 0]
+
+
+def test_tabela_nasce_sem_regras(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "regras.db"))
+    criar_tabela_regras_creditos(conn.cursor())
+    assert conn.execute("SELECT COUNT(*) FROM regras_creditos").fetchone() == (0,)
+    # Depois da criação, valores iguais aos de exemplo são do administrador e ficam
+    conn.executemany("INSERT INTO regras_creditos VALUES (?, ?, ?, ?, ?)", sorted(REGRAS_CREDITOS_EXEMPLO))
+    criar_tabela_regras_creditos(conn.cursor())
+    assert conn.execute("SELECT COUNT(*) FROM regras_creditos").fetchone() == (2,)
+    conn.close()
+
+
+def test_regras_de_exemplo_antigas_removidas_uma_vez(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "regras.db"))
+    criar_tabela_regras_creditos(conn.cursor())
+    conn.executemany("INSERT INTO regras_creditos VALUES (?, ?, ?, ?, ?)", sorted(REGRAS_CREDITOS_EXEMPLO))
+    conn.execute("DROP TABLE migracoes") # Banco de uma versão que semeava as regras de exemplo
+    criar_tabela_regras_creditos(conn.cursor())
+    assert conn.execute("SELECT COUNT(*) FROM regras_creditos").fetchone() == (0,)
+    conn.close()
@@ -0,0 +1,96 @@
+"""Testes das rotinas de manutenção (manutencao.py)."""
+import sqlite3
+
+import pytest
+
+import backups
+import database
+import manutencao
+from db_writer import executar_escrita
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file) # Sem foreign_keys = ON, como as conexões antigas
+    conn.executescript("""
+    INSERT INTO alunos (id, nome, email) VALUES (1, 'ANA', 'ana@ufsm.br'), (2, 'BRUNO', 'bruno@ufsm.br');
+    INSERT INTO aproveitamentos (id, aluno_id, tipo, numero_processo, status) VALUES
+        (1, 1, 'disciplina', 'P1', 'solicitado'), (2, 2, 'idioma', 'P2', 'solicitado');
+    -- Órfão deixado por uma exclusão feita sem foreign_keys = ON
+    INSERT INTO aproveitamentos (id, aluno_id, tipo, numero_processo, status) VALUES (3, 99, 'idioma', 'P3', 'deferido');
+    """)
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_varredura_remove_orfaos(db_file):
+    assert manutencao.verificar_chaves_estrangeiras()["rowid"].tolist() == [3]
+    assert [orfao["id"] for orfao in manutencao.varrer_orfaos()] == [3]
+    assert manutencao.verificar_chaves_estrangeiras().empty
+    assert manutencao.listar_orfaos().empty
+
+
+def test_exclusao_de_aluno_remove_aproveitamentos_em_cascata(db_file):
+    executar_escrita(lambda conn: conn.execute("DELETE FROM alunos WHERE id = 1"))
+    ids = database.query_frame("SELECT id FROM aproveitamentos ORDER BY id")["id"].tolist()
+    assert ids == [2, 3]
+
+
+def test_backup_verificado_rotacao_e_restauracao(db_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("PPGOP_BACKUP_DIR", str(tmp_path / "backups"))
+    monkeypatch.setitem(backups.RETENCAO, "manual", 2)
+    executar_escrita(lambda conn: conn.execute(
+        "INSERT INTO alunos (id, nome, email) VALUES (3, 'CARLA', 'carla@ufsm.br')")) # Banco em WAL
+    primeiro = backups.criar_backup()
+    assert backups.verificar_backup(primeiro) == []
+    backups.criar_backup()
+    backups.criar_backup()
+    assert len(backups.listar_backups(motivo="manual")) == 2 # O mais antigo foi rotacionado
+
+    executar_escrita(lambda conn: conn.execute("DELETE FROM alunos"))
+    assert manutencao.main(["backups"]) == 0
+    recente = backups.listar_backups(motivo="manual")[0]["caminho"]
+    assert manutencao.main(["restaurar", recente]) == 0
+    # O escritor continua usando o mesmo arquivo, agora com o conteúdo restaurado
+    executar_escrita(lambda conn: conn.execute(
+        "INSERT INTO alunos (id, nome, email) VALUES (4, 'DANIEL', 'daniel@ufsm.br')"))
+    assert database.query_frame("SELECT nome FROM alunos ORDER BY id")["nome"].tolist() == ["ANA", "BRUNO", "CARLA", "DANIEL"]
+    assert [backup["motivo"] for backup in backups.listar_backups()][0] == "antes-restaurar"
+
+
+def test_backup_corrompido_nao_e_restaurado(db_file, tmp_path):
+    corrompido = tmp_path / "corrompido.db"
+    with open(db_file, "rb") as origem:
+        corrompido.write_bytes(origem.read()[:4096] + b"x" * 100)
+
+    assert backups.verificar_backup(str(corrompido))
+    assert manutencao.main(["verificar-backup", str(corrompido)]) == 1
+    with pytest.raises(sqlite3.DatabaseError):
+        backups.restaurar_backup(str(corrompido))
+    assert database.query_frame("SELECT COUNT(*) AS n FROM alunos")["n"].tolist() == [2]
+
+
+def test_otimizacao_agendada_apos_gravacao_grande(db_file, monkeypatch):
+    monkeypatch.setattr(manutencao, "SILENCIO_CHECKPOINT_S", 0)
+    estado = {"linhas": 0, "escrita": None}
+    executar_escrita(lambda conn: conn.executemany(
+        "INSERT INTO alunos (nome, email) VALUES (?, ?)", [("X" * 2000, f"x{i}@ufsm.br") for i in range(2000)]))
+    executar_escrita(lambda conn: conn.execute("DELETE FROM alunos WHERE id > 2"))
+    pendentes = manutencao.otimizacoes_pendentes(db_file, estado)
+    assert pendentes == ["analyze", "incremental_vacuum", "wal_checkpoint"]
+
+    livres_antes, total_antes, _ = manutencao.paginas_livres(db_file)
+    execucoes = manutencao.executar_otimizacao(db_file, pendentes)
+    assert [execucao["tarefa"] for execucao in execucoes] == pendentes
+    assert not any(execucao["detalhes"].startswith("erro") for execucao in execucoes)
+    livres, total, modo = manutencao.paginas_livres(db_file)
+    assert modo == 2 # Convertido para auto_vacuum incremental
+    assert livres < livres_antes and total < total_antes
+    assert manutencao.ultimas_execucoes()["tarefa"].tolist() == list(reversed(pendentes))
+
+    # Nada a fazer enquanto não houver novas gravações
+    estado = {"linhas": manutencao.get_writer(db_file).linhas_alteradas,
+              "escrita": manutencao.get_writer(db_file).ultima_escrita}
+    assert manutencao.otimizacoes_pendentes(db_file, estado) == []
+    assert manutencao.main(["otimizar"]) == 0
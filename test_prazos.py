@@ -0,0 +1,116 @@
+"""Testes do monitor de prazos e da linha do tempo (prazos.py)."""
+import datetime
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from prazos import (REGRAS_PADRAO, alunos_no_periodo, calcular_prazos, corrigir_prazos, criar_tabelas_regras,
+                    linha_do_tempo, prazos_proximos, preencher_prazos_ausentes, registrar_prorrogacao, validar_prazos)
+
+HOJE = datetime.date(2025, 6, 1)
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    INSERT INTO orientadores (id, nome, chave) VALUES (1, 'Márcia Silva', 'MARCIA SILVA'), (2, 'João Batista', 'JOAO BATISTA');
+    INSERT INTO alunos (nome, email, nivel, orientador_id, prazo_defesa_projeto, prazo_defesa_tese) VALUES
+        ('Ana', 'ana@ufsm.br', 'Mestrado', 1, '2025-05-20', '2025-06-30 00:00:00'),
+        ('Bruno', 'bruno@ufsm.br', 'Doutorado', 2, '2025-06-01', '2027-01-01'),
+        ('Carla', 'carla@ufsm.br', 'Doutorado', 1, '', NULL);
+    """)
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_prazos_por_intervalo(db_file):
+    df = prazos_proximos(30, hoje=HOJE)
+    assert list(zip(df["nome"], df["prazo"], df["dias_restantes"])) == [
+        ("Ana", "Projeto", -12), ("Bruno", "Projeto", 0), ("Ana", "Tese", 29)
+    ]
+    assert df["data"].tolist() == ["2025-05-20", "2025-06-01", "2025-06-30"]
+
+    assert prazos_proximos(30, incluir_vencidos=False, hoje=HOJE)["nome"].tolist() == ["Bruno", "Ana"]
+    assert prazos_proximos(30, nivel="Doutorado", hoje=HOJE)["nome"].tolist() == ["Bruno"]
+    assert prazos_proximos(30, orientador_id=1, hoje=HOJE)["prazo"].tolist() == ["Projeto", "Tese"]
+
+
+def test_consulta_usa_os_indices(db_file):
+    conn = sqlite3.connect(db_file)
+    plano = " ".join(linha[3] for linha in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM alunos WHERE prazo_defesa_tese >= ? AND prazo_defesa_tese < ?",
+        ("2025-01-01", "2025-02-01")))
+    conn.close()
+    assert "idx_alunos_prazo_defesa_tese" in plano
+
+
+def test_linha_do_tempo_por_semestre_e_detalhamento(db_file):
+    semestres = linha_do_tempo("prazo_defesa_projeto", "semestre", "nivel")
+    assert list(zip(semestres["periodo"], semestres["grupo"], semestres["quantidade"])) == [
+        ("2025/1", "Doutorado", 1), ("2025/1", "Mestrado", 1)
+    ]
+    meses = linha_do_tempo("prazo_defesa_tese", "mes")
+    assert meses["periodo"].tolist() == ["2025-06", "2027-01"]
+
+    assert alunos_no_periodo("prazo_defesa_projeto", "2025/1")["nome"].tolist() == ["Ana", "Bruno"]
+    assert alunos_no_periodo("prazo_defesa_projeto", "2025/1", "nivel", "Mestrado")["nome"].tolist() == ["Ana"]
+    assert alunos_no_periodo("prazo_defesa_tese", "2025-06")["nome"].tolist() == ["Ana"]
+
+
+def test_calculo_vetorizado_com_prorrogacoes():
+    alunos = pd.DataFrame({
+        "id": [1, 2, 3], "nivel": ["Mestrado", "Doutorado", "Especialização"],
+        "data_ingresso": ["2024-10-24", "2023-01-31", "2024-01-01"],
+    })
+    regras = pd.DataFrame(REGRAS_PADRAO, columns=["nivel", "prazo", "meses", "dias"])
+    prorrogacoes = pd.DataFrame({"aluno_id": [2, 2], "prazo": ["prazo_defesa_tese"] * 2, "meses": [6, 0], "dias": [0, 10]})
+
+    df = calcular_prazos(alunos, regras, prorrogacoes)
+
+    assert list(zip(df["id"], df["prazo"], df["calculado"])) == [
+        (1, "prazo_defesa_projeto", "2026-10-23"), (1, "prazo_defesa_tese", "2028-10-23"),
+        (2, "prazo_defesa_projeto", "2025-01-30"), # 31/01 + 24 meses, menos 1 dia
+        (2, "prazo_defesa_tese", "2027-08-09"), # + 6 meses e 10 dias de prorrogação
+    ]
+
+
+def test_validar_e_corrigir_em_lote(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    DELETE FROM alunos;
+    INSERT INTO alunos (id, nome, email, nivel, data_ingresso, prazo_defesa_projeto, prazo_defesa_tese) VALUES
+        (1, 'Ana', 'ana@ufsm.br', 'Mestrado', '2024-10-24', '2026-10-23', '2028-10-23'),
+        (2, 'Bruno', 'bruno@ufsm.br', 'Doutorado', '2024-03-01', '2026-01-01', NULL);
+    """)
+    conn.commit()
+    conn.close()
+
+    divergencias = validar_prazos()
+    assert list(zip(divergencias["nome"], divergencias["situacao"])) == [("Bruno", "Divergente"), ("Bruno", "Ausente")]
+
+    registrar_prorrogacao(2, "prazo_defesa_tese", meses=6)
+    assert corrigir_prazos(validar_prazos()) == 2
+    assert validar_prazos().empty
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT prazo_defesa_projeto, prazo_defesa_tese, version FROM alunos WHERE id = 2").fetchone() == (
+        "2026-02-28", "2028-08-31", 2
+    )
+    conn.close()
+
+    alunos = [{"nivel": "Mestrado", "data_ingresso": "2025-03-10", "prazo_defesa_projeto": "2027-01-01"}]
+    preencher_prazos_ausentes(alunos)
+    assert alunos[0]["prazo_defesa_projeto"] == "2027-01-01" # Informado na planilha: mantido
+    assert alunos[0]["prazo_defesa_tese"] == "2029-03-09"
+
+
+def test_regra_padrao_excluida_nao_volta():
+    conn = sqlite3.connect(":memory:")
+    criar_tabelas_regras(conn.cursor())
+    conn.execute("DELETE FROM regras_prazos WHERE nivel = 'Mestrado' AND prazo = 'prazo_defesa_tese'")
+    criar_tabelas_regras(conn.cursor()) # Novo init_db
+    assert conn.execute("SELECT COUNT(*) FROM regras_prazos").fetchone() == (len(REGRAS_PADRAO) - 1,)
+    conn.close()
@@ -0,0 +1,158 @@
+"""Conta quantas execuções do script cada interação custa (streamlit.testing AppTest).
+
+Cada interação (login, navegação, troca de aluno, salvar, excluir, logout)
+deve custar exatamente uma execução de streamlit_app.py, sem reruns extras.
+"""
+import sqlite3
+from unittest import mock
+
+import pytest
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+import database
+
+
+class ContadorExecucoes:
+    """Conta as execuções do script pelas chamadas a st.set_page_config (uma por execução)."""
+
+    def __init__(self):
+        self.total = 0
+        self._original = streamlit.set_page_config
+
+    def __call__(self, *args, **kwargs):
+        self.total += 1
+        return self._original(*args, **kwargs)
+
+    def execucoes(self, acao):
+        """Executa a ação do AppTest e retorna quantas execuções do script ela causou."""
+        antes = self.total
+        acao()
+        return self.total - antes
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "ppgop.db")
+    monkeypatch.setattr(database, "DB_FILE", path)
+    return path
+
+
+@pytest.fixture
+def contador():
+    contador = ContadorExecucoes()
+    with mock.patch.object(streamlit, "set_page_config", contador):
+        yield contador
+
+
+def inserir_alunos(db_file, nomes):
+    conn = sqlite3.connect(db_file)
+    for i, nome in enumerate(nomes):
+        conn.execute(
+            "INSERT INTO alunos (nome, email, nivel, data_ingresso) VALUES (?, ?, 'Doutorado', '2024-10-24')",
+            (nome, f"aluno{i}@ufsm.br"),
+        )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def app(db_file, contador):
+    at = AppTest.from_file("streamlit_app.py", default_timeout=60)
+    assert contador.execucoes(at.run) == 1
+    inserir_alunos(db_file, ["ANA SOUZA", "BRUNO LIMA"])
+    at.text_input(key="login_usuario").input("Breno")
+    at.text_input(key="login_senha").input("adm123")
+    assert contador.execucoes(at.button[0].click().run) == 1
+    assert at.session_state["logged_in"]
+    assert not at.exception
+    return at
+
+
+def test_login_invalido_uma_execucao(db_file, contador):
+    at = AppTest.from_file("streamlit_app.py", default_timeout=60)
+    at.run()
+    at.text_input(key="login_usuario").input("Breno")
+    at.text_input(key="login_senha").input("errada")
+    assert contador.execucoes(at.button[0].click().run) == 1
+    assert not at.session_state["logged_in"]
+    assert at.error[0].value == "Senha incorreta."
+
+
+def test_navegacao_uma_execucao(app, contador):
+    assert contador.execucoes(app.sidebar.radio(key="selected_page").set_value("Aproveitamentos").run) == 1
+    assert app.header[0].value == "Registro de Aproveitamentos"
+    assert not app.exception
+
+
+def test_troca_de_aluno_no_dashboard_uma_execucao(app, contador):
+    assert app.selectbox(key="selected_aluno_id_dashboard").options == ["ANA SOUZA", "BRUNO LIMA"]
+    assert contador.execucoes(app.selectbox(key="selected_aluno_id_dashboard").select(2).run) == 1
+    assert app.session_state["selected_aluno_id_dashboard"] == 2
+    assert not app.exception
+
+
+def test_editar_a_partir_do_dashboard_uma_execucao(app, contador):
+    assert contador.execucoes(app.button(key="edit_dash").click().run) == 1
+    assert app.session_state["selected_page"] == "Cadastro de Alunos"
+    assert app.selectbox(key="cadastro_aluno_id").value == 1
+    assert not app.exception
+
+
+def test_salvar_novo_aluno_uma_execucao(app, contador, db_file):
+    app.sidebar.radio(key="selected_page").set_value("Cadastro de Alunos").run()
+    app.text_input(key="aluno_nome_novo").input("CARLA DIAS")
+    app.text_input(key="aluno_email_novo").input("carla@ufsm.br")
+    app.date_input(key="aluno_data_ingresso_novo").set_value("2025-03-01")
+    assert contador.execucoes(app.button[0].click().run) == 1
+    assert not app.exception
+    assert app.success[0].value == "Aluno 'CARLA DIAS' salvo com sucesso!"
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT COUNT(*) FROM alunos WHERE email = 'carla@ufsm.br'").fetchone()[0] == 1
+    conn.close()
+
+
+def test_logout_uma_execucao(app, contador):
+    assert contador.execucoes(app.sidebar.button[0].click().run) == 1
+    assert not app.session_state["logged_in"]
+    assert app.header[0].value == "Login - Sistema de Gestão PPGOP"
+
+
+def test_filtro_da_lista_de_alunos_uma_execucao(app, contador):
+    app.sidebar.radio(key="selected_page").set_value("Cadastro de Alunos").run()
+    assert len(app.dataframe[0].value) == 2
+    assert contador.execucoes(app.text_input(key="filtro_alunos_nome").input("bruno").run) == 1
+    assert app.dataframe[0].value["nome"].tolist() == ["BRUNO LIMA"]
+    assert not app.exception
+
+
+def test_conflito_de_edicao_mostra_diferencas(app, contador, db_file):
+    app.sidebar.radio(key="selected_page").set_value("Cadastro de Alunos").run()
+    app.selectbox(key="cadastro_aluno_id").select(1).run()
+    # Outra sessão grava o mesmo aluno enquanto o formulário está aberto
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE alunos SET orientador = 'PROF. X', version = version + 1 WHERE id = 1")
+    conn.commit()
+    app.text_input(key="aluno_turma_1").input("2024")
+    assert contador.execucoes(app.button[0].click().run) == 1
+    assert not app.exception
+    diferencas = app.dataframe[0].value
+    assert diferencas["Campo"].tolist() == ["Orientador(a)", "Turma"]
+    assert conn.execute("SELECT turma FROM alunos WHERE id = 1").fetchone()[0] is None
+
+    sobrescrever = next(b for b in app.button if b.label == "Salvar meus valores mesmo assim")
+    assert contador.execucoes(sobrescrever.click().run) == 1
+    assert app.success[0].value == "Aluno 'ANA SOUZA' salvo com sucesso!"
+    # Só a coluna alterada pelo usuário é gravada; a alteração da outra sessão é preservada
+    assert conn.execute("SELECT turma, orientador, version FROM alunos WHERE id = 1").fetchone() == ("2024", "PROF. X", 2)
+    conn.close()
+
+
+def test_salvar_sem_alteracoes_nao_grava(app, db_file):
+    app.sidebar.radio(key="selected_page").set_value("Cadastro de Alunos").run()
+    app.selectbox(key="cadastro_aluno_id").select(1).run()
+    app.button[0].click().run()
+    assert not app.exception
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT version, data_atualizacao = data_cadastro FROM alunos WHERE id = 1").fetchone() == (0, 1)
+    conn.close()
@@ -0,0 +1,149 @@
+"""Testes do fluxo de aprovação (workflow.py): transições, histórico e números de processo."""
+import sqlite3
+
+import pytest
+
+import database
+from arquivo import criar_tabelas_arquivo, proximo_id
+from db_writer import executar_escrita
+from workflow import (alocar_numero_processo, atribuicoes_status, criar_indice_processo, criar_tabela_eventos,
+                      criar_tabela_sequencias, duracao_etapas, fila_por_etapa, formatar_numero_processo, get_historico, transicionar_status)
+
+
+@pytest.fixture
+def db_file(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.executescript("""
+    INSERT INTO alunos (id, nome, email) VALUES (1, 'Ana', 'ana@ufsm.br');
+    INSERT INTO aproveitamentos (id, aluno_id, tipo, status, data_solicitacao, data_aprovacao_coordenacao,
+                                 data_aprovacao_colegiado) VALUES
+        (1, 1, 'disciplina', 'aprovado_colegiado', '2025-03-01 10:00:00', '2025-03-03 10:00:00', '2025-03-11 10:00:00'),
+        (2, 1, 'disciplina', 'aprovado_colegiado', '2025-03-01 10:00:00', '2025-03-05 10:00:00', '2025-03-21 10:00:00'),
+        (3, 1, 'disciplina', 'solicitado', '2025-03-01 10:00:00', NULL, NULL);
+    INSERT INTO aproveitamentos (id, aluno_id, tipo, status, data_deferimento) VALUES
+        (4, 1, 'idioma', 'deferido', '2025-02-01 10:00:00');
+    -- Banco de antes do histórico
+    DROP TABLE aproveitamento_events;
+    """)
+    criar_tabela_eventos(conn.cursor()) # Semeia o histórico a partir das datas existentes
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def test_transicao_em_lote_valida_no_sql(db_file):
+    resultado = transicionar_status([1, 2, 3, 4, 99], "deferido")
+
+    assert resultado["atualizados"] == 2
+    assert resultado["rejeitados"] == [
+        {"id": 3, "status": "solicitado"}, {"id": 4, "status": "deferido"}, {"id": 99, "status": None}
+    ]
+    linhas = database.query_frame(
+        "SELECT id, status, version, data_deferimento IS NOT NULL AS datado FROM aproveitamentos ORDER BY id"
+    )
+    assert linhas["status"].tolist() == ["deferido", "deferido", "solicitado", "deferido"]
+    assert linhas["version"].tolist() == [1, 1, 0, 0]
+    assert linhas["datado"].tolist() == [1, 1, 0, 1]
+
+
+def test_destino_invalido(db_file):
+    with pytest.raises(ValueError):
+        transicionar_status([3], "solicitado")
+
+
+def test_edicao_individual_segue_o_fluxo(db_file):
+    def editar(conn, aproveitamento_id, status):
+        database.atualizar_versionado(conn, "aproveitamentos", aproveitamento_id, {"status": status}, None,
+                                      atribuicoes_status(conn, aproveitamento_id, status))
+
+    with pytest.raises(ValueError):
+        executar_escrita(editar, 3, "deferido") # Pularia coordenação e colegiado
+    with pytest.raises(ValueError):
+        executar_escrita(editar, 4, "solicitado") # Etapa final não é reaberta
+    executar_escrita(editar, 3, "solicitado") # Sem mudança de status
+    executar_escrita(editar, 3, "aprovado_coordenacao")
+
+    linhas = database.query_frame(
+        "SELECT status, data_aprovacao_coordenacao IS NOT NULL AS datado FROM aproveitamentos WHERE id IN (3, 4) ORDER BY id"
+    )
+    assert linhas["status"].tolist() == ["aprovado_coordenacao", "deferido"]
+    assert linhas["datado"].tolist() == [1, 0]
+    assert get_historico(3)["status"].tolist() == ["solicitado", "aprovado_coordenacao"]
+
+
+def test_historico_e_indicadores(db_file):
+    transicionar_status([1, 3], "indeferido")
+
+    historico = get_historico(1)
+    assert historico["status"].tolist() == ["solicitado", "aprovado_coordenacao", "aprovado_colegiado", "indeferido"]
+
+    duracoes = duracao_etapas(fim="2025-12-31").set_index("etapa")
+    assert duracoes.loc["solicitado", "transicoes"] == 2
+    assert duracoes.loc["solicitado", "p50"] == 2.0 # Posto mais próximo entre 2 e 4 dias
+    assert duracoes.loc["aprovado_coordenacao", "maximo"] == 16.0
+
+    fila = fila_por_etapa().set_index("status")
+    assert fila.loc["aprovado_colegiado", "quantidade"] == 1
+
+    conn = sqlite3.connect(db_file)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("DELETE FROM aproveitamento_events")
+    conn.close()
+
+
+def test_id_de_aproveitamento_excluido_nao_e_reaproveitado(db_file):
+    executar_escrita(lambda conn: conn.execute("DELETE FROM aproveitamentos WHERE id = 4")) # O de maior ID
+
+    def _inserir(conn):
+        novo_id = proximo_id(conn, "aproveitamentos")
+        conn.execute("INSERT INTO aproveitamentos (id, aluno_id, tipo, status) VALUES (?, 1, 'idioma', 'solicitado')",
+                     (novo_id,))
+        return novo_id
+
+    novo_id = executar_escrita(_inserir)
+    assert novo_id == 5
+    assert get_historico(novo_id)["status"].tolist() == ["solicitado"]
+
+
+def test_numeros_de_processo_sequenciais_por_ano(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute("DROP INDEX idx_aproveitamentos_processo") # Banco de antes do contador
+    # Número antigo (aleatório) que coincide com o próximo do contador e números em branco
+    conn.execute("""INSERT INTO aproveitamentos (id, aluno_id, tipo, numero_processo) VALUES
+                    (11, 1, 'idioma', ?), (12, 1, 'idioma', ''), (13, 1, 'idioma', '')""", (formatar_numero_processo(2, 2025),))
+    assert criar_indice_processo(conn.cursor()) == []
+    # Número de um aproveitamento arquivado também não pode ser reaproveitado
+    conn.execute("INSERT INTO aproveitamentos_arquivo (id, numero_processo) VALUES (90, ?)",
+                 (formatar_numero_processo(4, 2025),))
+
+    numeros = [alocar_numero_processo(conn, 2025) for _ in range(3)] + [alocar_numero_processo(conn, 2026)]
+
+    assert numeros[0] == formatar_numero_processo(1, 2025)
+    assert numeros[1:3] == [formatar_numero_processo(3, 2025), formatar_numero_processo(5, 2025)]
+    plano = conn.execute("EXPLAIN QUERY PLAN SELECT 1 FROM aproveitamentos_historico WHERE numero_processo = ?",
+                         (numeros[0],)).fetchall()
+    assert not any("SCAN" in linha[-1] for linha in plano) # Busca pelos índices, também no arquivo
+    assert numeros[3] == formatar_numero_processo(1, 2026)
+    assert conn.execute("SELECT COUNT(*) FROM aproveitamentos WHERE id IN (12, 13) AND numero_processo IS NULL"
+                        ).fetchone()[0] == 2
+    conn.execute("INSERT INTO aproveitamentos (aluno_id, tipo, numero_processo) VALUES (1, 'idioma', ?)", (numeros[0],))
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO aproveitamentos (aluno_id, tipo, numero_processo) VALUES (1, 'idioma', ?)",
+                     (numeros[0],))
+    conn.close()
+
+
+def test_duplicados_de_processo_verificados_uma_vez(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute("DROP INDEX idx_aproveitamentos_processo") # Banco de antes do contador
+    conn.execute("""INSERT INTO aproveitamentos (id, aluno_id, tipo, numero_processo) VALUES
+                    (11, 1, 'idioma', 'P1'), (12, 1, 'idioma', 'P1'), (13, 1, 'idioma', 'P2')""")
+
+    assert criar_tabela_sequencias(conn.cursor()) == ["P1"]
+    assert criar_tabela_sequencias(conn.cursor()) == [] # Não refaz a varredura a cada init_db
+
+    conn.execute("UPDATE aproveitamentos SET numero_processo = 'P3' WHERE id = 12")
+    assert criar_indice_processo(conn.cursor()) == []
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO aproveitamentos (aluno_id, tipo, numero_processo) VALUES (1, 'idioma', 'P2')")
+    conn.close()
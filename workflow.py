@@ -0,0 +1,360 @@
+"""Fluxo de aprovação dos aproveitamentos, compartilhado por streamlit_app.py e app.py.
+
+solicitado → aprovado_coordenacao → aprovado_colegiado → deferido, e qualquer
+etapa em aberto pode ir para indeferido. A transição em lote é um único UPDATE
+por conjunto: as transições permitidas entram no SQL como uma tabela (CTE), de
+modo que só as linhas cujo status atual permite o destino são alteradas, e a
+data da etapa é registrada na mesma instrução. As edições de um único
+aproveitamento (formulários) passam pelas mesmas regras em atribuicoes_status.
+
+Toda mudança de status também é registrada em aproveitamento_events (histórico
+somente de inclusão), base dos indicadores de duração das etapas e de fila.
+Os números de processo vêm de um contador por ano, incrementado na mesma
+transação que insere o aproveitamento.
+"""
+import datetime
+import json
+
+import database
+from db_writer import executar_escrita
+
+# Destinos permitidos a partir de cada status
+TRANSICOES_PERMITIDAS = {
+    "solicitado": ["aprovado_coordenacao", "indeferido"],
+    "aprovado_coordenacao": ["aprovado_colegiado", "indeferido"],
+    "aprovado_colegiado": ["deferido", "indeferido"],
+    "deferido": [],
+    "indeferido": [],
+}
+
+# Coluna de data registrada ao chegar em cada status
+COLUNA_DATA_STATUS = {
+    "aprovado_coordenacao": "data_aprovacao_coordenacao",
+    "aprovado_colegiado": "data_aprovacao_colegiado",
+    "deferido": "data_deferimento",
+    "indeferido": "data_deferimento",
+}
+
+# Status a partir dos quais se pode chegar a cada destino
+ORIGENS_PERMITIDAS = {
+    destino: [origem for origem, destinos in TRANSICOES_PERMITIDAS.items() if destino in destinos]
+    for destino in COLUNA_DATA_STATUS
+}
+
+_PARES_TRANSICAO = [(origem, destino) for origem, destinos in TRANSICOES_PERMITIDAS.items() for destino in destinos]
+_CTE_TRANSICOES = f"transicoes(origem, destino) AS (VALUES {', '.join(['(?, ?)'] * len(_PARES_TRANSICAO))})"
+_PARAMS_TRANSICOES = [valor for par in _PARES_TRANSICAO for valor in par]
+
+def _transicionar(conn, aproveitamento_ids, destino):
+    """Operação de escrita: aplica a transição aos aproveitamentos que a permitem."""
+    ids_json = json.dumps(aproveitamento_ids)
+    cte = f"WITH {_CTE_TRANSICOES}, selecionados(id) AS (SELECT value FROM json_each(?))"
+    permitida = """EXISTS (
+        SELECT 1 FROM transicoes t WHERE t.origem = aproveitamentos.status AND t.destino = ?
+    )"""
+
+    rejeitados = [dict(linha) for linha in conn.execute(f"""
+        {cte}
+        SELECT s.id, aproveitamentos.status
+        FROM selecionados s
+        LEFT JOIN aproveitamentos ON aproveitamentos.id = s.id
+        WHERE aproveitamentos.id IS NULL OR NOT {permitida}
+        ORDER BY s.id
+    """, [*_PARAMS_TRANSICOES, ids_json, destino])]
+
+    conn.execute(f"""
+        {cte}
+        UPDATE aproveitamentos
+        SET status = ?, {COLUNA_DATA_STATUS[destino]} = CURRENT_TIMESTAMP, version = version + 1
+        WHERE id IN (SELECT id FROM selecionados) AND {permitida}
+    """, [*_PARAMS_TRANSICOES, ids_json, destino, destino])
+    # cursor.rowcount não é preenchido para instruções que começam com WITH
+    atualizados = conn.execute("SELECT changes()").fetchone()[0]
+    return {"atualizados": atualizados, "rejeitados": rejeitados}
+
+def atribuicoes_status(conn, aproveitamento_id, destino):
+    """Valida a mudança de status de um único aproveitamento (edição pelo formulário).
+
+    Chamado dentro da operação de escrita que grava a edição, antes de atualizar_versionado.
+
+    Returns:
+        list: Atribuição da data da etapa (vazia se o status não muda ou o
+              aproveitamento não existe mais; nesse caso o UPDATE levanta ConflitoVersao).
+
+    Raises:
+        ValueError: Se o status atual não permite o destino.
+    """
+    linha = conn.execute("SELECT status FROM aproveitamentos WHERE id = ?", (aproveitamento_id,)).fetchone()
+    if linha is None or linha[0] == destino:
+        return []
+    if linha[0] not in ORIGENS_PERMITIDAS.get(destino, []):
+        raise ValueError(f"Mudança de status não permitida: {linha[0]} → {destino}")
+    return [f"{COLUNA_DATA_STATUS[destino]} = CURRENT_TIMESTAMP"]
+
+def transicionar_status(aproveitamento_ids, destino):
+    """Leva vários aproveitamentos ao status destino em uma única transação.
+
+    Args:
+        aproveitamento_ids (iterable): IDs dos aproveitamentos.
+        destino (str): Status de destino (aprovado_coordenacao, aprovado_colegiado,
+                       deferido ou indeferido).
+
+    Returns:
+        dict: {"atualizados": int, "rejeitados": [{"id", "status"}]}, em que
+              rejeitados são os que não existem (status None) ou cujo status
+              atual não permite o destino.
+
+    Raises:
+        ValueError: Se destino não for um status de destino válido.
+    """
+    if destino not in COLUNA_DATA_STATUS:
+        raise ValueError(f"Status de destino inválido: {destino}")
+    aproveitamento_ids = [int(i) for i in aproveitamento_ids]
+    if not aproveitamento_ids:
+        return {"atualizados": 0, "rejeitados": []}
+    return executar_escrita(_transicionar, aproveitamento_ids, destino)
+
+# --- Histórico de Status ---
+# As colunas data_* do aproveitamento guardam só a última passagem por cada etapa.
+# Os eventos são gravados por triggers, na mesma transação de qualquer INSERT ou
+# mudança de status (de qualquer caminho: formulários, lote, app.py), e não podem
+# ser alterados nem excluídos. Não há FOREIGN KEY: o histórico sobrevive à
+# exclusão do aproveitamento, e os IDs já registrados aqui não são reaproveitados
+# (ver arquivo.proximo_id).
+
+def criar_tabela_eventos(cursor):
+    """Cria a tabela de eventos, seus índices e triggers (chamado pelos init_db).
+
+    Na criação, o histórico é semeado a partir das datas já gravadas nos aproveitamentos.
+    """
+    existia = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aproveitamento_events'"
+    ).fetchone()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS aproveitamento_events (
+        id INTEGER PRIMARY KEY,
+        aproveitamento_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        status_anterior TEXT,
+        ts TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_aproveitamento ON aproveitamento_events (aproveitamento_id, ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_status ON aproveitamento_events (status, ts)")
+
+    # Um aproveitamento restaurado do arquivo (ver arquivo.py) já tem seu histórico: a inclusão
+    # não registra um novo status inicial. IDs novos nunca têm eventos (ver arquivo.proximo_id).
+    trigger = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'aproveitamento_events_insert'"
+    ).fetchone()
+    if trigger and "FROM aproveitamento_events WHERE" not in trigger[0]: # Criado por versões anteriores
+        cursor.execute("DROP TRIGGER aproveitamento_events_insert")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS aproveitamento_events_insert
+    AFTER INSERT ON aproveitamentos
+    WHEN NOT EXISTS (SELECT 1 FROM aproveitamento_events WHERE aproveitamento_id = NEW.id)
+    BEGIN
+        INSERT INTO aproveitamento_events (aproveitamento_id, status) VALUES (NEW.id, NEW.status);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS aproveitamento_events_status
+    AFTER UPDATE OF status ON aproveitamentos
+    WHEN NEW.status IS NOT OLD.status
+    BEGIN
+        INSERT INTO aproveitamento_events (aproveitamento_id, status, status_anterior)
+        VALUES (NEW.id, NEW.status, OLD.status);
+    END
+    """)
+    # Somente inclusão
+    for operacao in ("UPDATE", "DELETE"):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS aproveitamento_events_sem_{operacao.lower()}
+        BEFORE {operacao} ON aproveitamento_events
+        BEGIN
+            SELECT RAISE(ABORT, 'aproveitamento_events é somente de inclusão');
+        END
+        """)
+
+    if not existia:
+        # Semear com as datas já conhecidas de cada etapa
+        cursor.execute("""
+        INSERT INTO aproveitamento_events (aproveitamento_id, status, status_anterior, ts)
+        SELECT id, status, anterior, ts FROM (
+            SELECT id, 'solicitado' AS status, NULL AS anterior, data_solicitacao AS ts, 1 AS ordem
+            FROM aproveitamentos WHERE data_solicitacao IS NOT NULL
+            UNION ALL
+            SELECT id, 'aprovado_coordenacao', 'solicitado', data_aprovacao_coordenacao, 2
+            FROM aproveitamentos WHERE data_aprovacao_coordenacao IS NOT NULL
+            UNION ALL
+            SELECT id, 'aprovado_colegiado', 'aprovado_coordenacao', data_aprovacao_colegiado, 3
+            FROM aproveitamentos WHERE data_aprovacao_colegiado IS NOT NULL
+            UNION ALL
+            SELECT id, status, NULL, data_deferimento, 4
+            FROM aproveitamentos WHERE data_deferimento IS NOT NULL AND status IN ('deferido', 'indeferido')
+        )
+        ORDER BY ts, id, ordem
+        """)
+
+def get_historico(aproveitamento_id):
+    """Retorna os eventos de status de um aproveitamento, em ordem cronológica."""
+    return database.query_frame("""
+        SELECT status_anterior, status, ts
+        FROM aproveitamento_events
+        WHERE aproveitamento_id = ?
+        ORDER BY ts, id
+    """, (aproveitamento_id,))
+
+# --- Indicadores do Fluxo ---
+
+PERCENTIS = (0.5, 0.75, 0.9)
+STATUS_EM_ABERTO = [status for status, destinos in TRANSICOES_PERMITIDAS.items() if destinos]
+
+def duracao_etapas(inicio=None, fim=None, percentis=PERCENTIS):
+    """Calcula, em SQL, a duração (em dias) de cada etapa do fluxo.
+
+    A duração de uma etapa vai do evento que a iniciou até o evento seguinte do
+    mesmo aproveitamento; é contada no período em que a etapa terminou. A etapa
+    "total" vai da solicitação até o deferimento/indeferimento.
+
+    Args:
+        inicio, fim (str, optional): Período "YYYY-MM-DD" (fim exclusivo) de término das etapas.
+        percentis (iterable): Percentis a calcular (método do posto mais próximo).
+
+    Returns:
+        pd.DataFrame: etapa, transicoes, media, p50/p75/..., maximo.
+    """
+    colunas_percentis = ",\n".join(
+        f"MIN(CASE WHEN posicao >= {float(p)} * n THEN dias END) AS p{int(round(p * 100))}" for p in percentis
+    )
+    return database.query_frame(f"""
+        WITH sequencia AS (
+            SELECT aproveitamento_id, status, ts,
+                   LEAD(ts) OVER (PARTITION BY aproveitamento_id ORDER BY ts, id) AS ts_fim
+            FROM aproveitamento_events
+        ),
+        duracoes AS (
+            SELECT status AS etapa, julianday(ts_fim) - julianday(ts) AS dias, ts_fim
+            FROM sequencia
+            WHERE ts_fim IS NOT NULL
+            UNION ALL
+            SELECT 'total', julianday(fim.ts) - julianday(MIN(ini.ts)), fim.ts
+            FROM aproveitamento_events fim
+            JOIN aproveitamento_events ini
+              ON ini.aproveitamento_id = fim.aproveitamento_id AND ini.status = 'solicitado' AND ini.ts <= fim.ts
+            WHERE fim.status IN ('deferido', 'indeferido')
+            GROUP BY fim.id
+        ),
+        no_periodo AS (
+            SELECT etapa, dias,
+                   ROW_NUMBER() OVER (PARTITION BY etapa ORDER BY dias) AS posicao,
+                   COUNT(*) OVER (PARTITION BY etapa) AS n
+            FROM duracoes
+            WHERE (:inicio IS NULL OR ts_fim >= :inicio) AND (:fim IS NULL OR ts_fim < :fim)
+        )
+        SELECT etapa, COUNT(*) AS transicoes, AVG(dias) AS media,
+               {colunas_percentis},
+               MAX(dias) AS maximo
+        FROM no_periodo
+        GROUP BY etapa
+        ORDER BY CASE etapa
+            WHEN 'solicitado' THEN 1 WHEN 'aprovado_coordenacao' THEN 2
+            WHEN 'aprovado_colegiado' THEN 3 ELSE 4 END
+    """, {"inicio": inicio, "fim": fim})
+
+def fila_por_etapa():
+    """Retorna, para cada status em aberto, quantos aproveitamentos aguardam e há quantos dias.
+
+    Returns:
+        pd.DataFrame: status, quantidade, dias_medio, dias_maximo (desde a entrada na etapa).
+    """
+    em_aberto = ", ".join("?" * len(STATUS_EM_ABERTO))
+    return database.query_frame(f"""
+        SELECT a.status, COUNT(*) AS quantidade,
+               AVG(julianday('now') - julianday(COALESCE(e.ts, a.data_solicitacao))) AS dias_medio,
+               MAX(julianday('now') - julianday(COALESCE(e.ts, a.data_solicitacao))) AS dias_maximo
+        FROM aproveitamentos a
+        LEFT JOIN (
+            SELECT aproveitamento_id, MAX(ts) AS ts
+            FROM aproveitamento_events
+            GROUP BY aproveitamento_id
+        ) e ON e.aproveitamento_id = a.id
+        WHERE a.status IN ({em_aberto})
+        GROUP BY a.status
+    """, STATUS_EM_ABERTO)
+
+# --- Números de Processo ---
+# Formato 23081.NNNNNN/ANO-DD: NNNNNN é o contador do ano (tabela
+# sequencias_processo) e DD são dígitos de controle (módulo 97). Como o contador
+# é incrementado dentro da transação de escrita, duas sessões nunca recebem o
+# mesmo número; o índice UNIQUE em numero_processo garante o restante.
+
+PREFIXO_PROCESSO = "23081"
+
+def criar_tabela_sequencias(cursor):
+    """Cria o contador de processos por ano e o índice de numero_processo (chamado pelos init_db).
+
+    Returns:
+        list: Números de processo duplicados que impediram o índice UNIQUE (vazia se
+              criado agora ou antes). Só na primeira vez: depois o índice sem UNIQUE
+              fica no lugar e a verificação é refeita apenas por criar_indice_processo.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sequencias_processo (
+        ano INTEGER PRIMARY KEY,
+        ultimo INTEGER NOT NULL
+    )
+    """)
+    if cursor.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'index'
+        AND name IN ('idx_aproveitamentos_processo', 'idx_aproveitamentos_processo_dup')
+    """).fetchone():
+        return []
+    return criar_indice_processo(cursor)
+
+def criar_indice_processo(cursor):
+    """Cria o índice UNIQUE em numero_processo ou, havendo duplicados, um índice comum.
+
+    Também chamado pela linha de comando (python manutencao.py indice-processo)
+    depois que os duplicados forem corrigidos. Retorna os números duplicados.
+    """
+    # Números em branco não identificam processo algum
+    cursor.execute("UPDATE aproveitamentos SET numero_processo = NULL WHERE TRIM(numero_processo) = ''")
+    duplicados = [linha[0] for linha in cursor.execute("""
+        SELECT numero_processo FROM aproveitamentos
+        WHERE numero_processo IS NOT NULL
+        GROUP BY numero_processo HAVING COUNT(*) > 1
+    """).fetchall()]
+    if duplicados:
+        # Não alterar dados do usuário: indexar sem unicidade até que sejam corrigidos (registrado
+        # em log_manutencao por quem chamou)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_aproveitamentos_processo_dup ON aproveitamentos (numero_processo)")
+    else:
+        cursor.execute("DROP INDEX IF EXISTS idx_aproveitamentos_processo_dup")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_aproveitamentos_processo ON aproveitamentos (numero_processo)")
+    return duplicados
+
+def formatar_numero_processo(sequencial, ano):
+    """Monta o número de processo "23081.NNNNNN/ANO-DD"."""
+    base = f"{PREFIXO_PROCESSO}{sequencial:06d}{ano}"
+    controle = 98 - (int(base) * 100) % 97
+    return f"{PREFIXO_PROCESSO}.{sequencial:06d}/{ano}-{controle:02d}"
+
+def alocar_numero_processo(conn, ano=None):
+    """Incrementa o contador do ano e retorna o próximo número de processo livre.
+
+    Deve ser chamado dentro da transação que insere o aproveitamento (operação
+    do escritor único). Números já usados (ex.: gerados antes do contador), também
+    por aproveitamentos arquivados, são pulados.
+    """
+    ano = ano or datetime.date.today().year
+    while True:
+        conn.execute("""
+            INSERT INTO sequencias_processo (ano, ultimo) VALUES (?, 1)
+            ON CONFLICT (ano) DO UPDATE SET ultimo = ultimo + 1
+        """, (ano,))
+        sequencial = conn.execute("SELECT ultimo FROM sequencias_processo WHERE ano = ?", (ano,)).fetchone()[0]
+        numero = formatar_numero_processo(sequencial, ano)
+        if not conn.execute("SELECT 1 FROM aproveitamentos_historico WHERE numero_processo = ?", (numero,)).fetchone():
+            return numero